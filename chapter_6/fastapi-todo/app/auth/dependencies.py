@@ -1,26 +1,65 @@
 # ============================================================
 # Route dependencies
 # ============================================================
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBasicCredentials
+from typing import Dict
+
+from fastapi import Depends, HTTPException, Request, Security, status
+from fastapi.security import HTTPBasicCredentials, SecurityScopes
 import secrets
 
 from app.core.security import get_pwd_ctx
+from app.core.hashing import get_password_hasher
 from app.auth.service import AuthService, basic_auth_scheme
 from app.users.service import UserService, get_user_service
 from app.auth.service import oauth2_scheme
+from app.auth.user_status import user_status_cache
+from app.auth.principal import Principal, resolve_principal
+from app.users.entities import UserEntity
+
+def get_auth_service(pwd_context=Depends(get_pwd_ctx), hasher=Depends(get_password_hasher)):
+    return AuthService(pwd_context, hasher)
 
-def get_auth_service(pwd_context=Depends(get_pwd_ctx)):
-    return AuthService(pwd_context)
 
+def get_principal(
+        request: Request,
+        token: str = Depends(oauth2_scheme),
+        user_service: UserService = Depends(get_user_service),
+) -> Principal:
+    """The request's authenticated principal; decoded once per request."""
+    return resolve_principal(token, request, user_service.get_user)
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
-    """Extract 'sub' (username) from JWT token."""
-    payload = AuthService.decode_token(token)
-    username = payload.get("sub")
-    if not username:
-        raise HTTPException(status_code=401, detail="Invalid token payload")
-    return username
+
+def get_current_user(request: Request = None, token: str = Depends(oauth2_scheme)) -> str:
+    """
+    Extract 'sub' (username) from JWT token.
+    ``request`` is optional so the function can also be called with just a token.
+    """
+    return resolve_principal(token, request).username
+
+
+def get_current_user_entity(principal: Principal = Depends(get_principal)) -> UserEntity:
+    """The stored user behind the token, loaded at most once per request."""
+    if principal.user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    return principal.user
+
+
+def get_token_claims(
+        security_scopes: SecurityScopes,
+        principal: Principal = Depends(get_principal),
+) -> Dict:
+    """
+    Return the verified token claims, enforcing the scopes the route asks
+    for with ``Security(get_token_claims, scopes=[...])``.
+    """
+    missing = [scope for scope in security_scopes.scopes if scope not in principal.scopes]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+            headers={"WWW-Authenticate": f'Bearer scope="{security_scopes.scope_str}"'},
+        )
+    return principal.claims
 
 
 def authenticate_basic(credentials: HTTPBasicCredentials = Depends(basic_auth_scheme)):
@@ -41,11 +80,14 @@ def authenticate_basic(credentials: HTTPBasicCredentials = Depends(basic_auth_sc
 
 
 def require_admin(
-        username: str = Depends(get_current_user),
-        user_service: UserService = Depends(get_user_service),
+        claims: Dict = Security(get_token_claims, scopes=["admin"]),
+        principal: Principal = Depends(get_principal),
 ):
-    """Ensures that routes that dependent routes are only accessible to admins."""
-    db_user = user_service.get_user(username=username)
-    role = db_user.role
-    if role != "admin":
+    """
+    Ensures that dependent routes are only accessible to admins. The role
+    comes from the verified token; the user store is only consulted when a
+    staleness bound is configured (see app.auth.user_status).
+    """
+    if principal.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
+    user_status_cache.check(claims, lambda username: principal.user)
@@ -0,0 +1,111 @@
+# ============================================================
+# Verifier-side JWKS key cache
+# ============================================================
+# Lets a downstream service or edge node verify our access tokens
+# locally: public keys are fetched from /.well-known/jwks.json, kept
+# for as long as the endpoint's Cache-Control allows, and refetched
+# early only when a token names a `kid` we have not seen yet. Cached
+# keys are read without a lock; only the refetch is serialized, so a slow
+# JWKS endpoint does not hold up tokens whose key is already known.
+# ============================================================
+import json
+import logging
+import re
+import threading
+import time
+import urllib.request
+from typing import Callable, Dict, Optional, Tuple
+
+from app.auth.jwt_codec import decode_signed
+from app.auth.keys import public_key_from_jwk
+
+DEFAULT_JWKS_TTL_SECONDS = 300
+# Unknown kids trigger at most one refetch per interval, so garbage
+# tokens cannot turn into a request flood against the auth service.
+MIN_REFRESH_INTERVAL_SECONDS = 30
+
+# Returns (jwks document, max-age in seconds or None).
+JWKSFetcher = Callable[[], Tuple[Dict, Optional[int]]]
+
+
+def http_fetcher(url: str, timeout: float = 5.0) -> JWKSFetcher:
+    """Build a fetcher that GETs a JWKS URL and reads max-age from Cache-Control."""
+    def fetch() -> Tuple[Dict, Optional[int]]:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+            return json.load(response), int(match.group(1)) if match else None
+    return fetch
+
+
+class JWKSKeyCache:
+    """Caches public keys from a JWKS document, indexed by ``kid``."""
+    def __init__(
+            self,
+            fetch: JWKSFetcher,
+            default_ttl: int = DEFAULT_JWKS_TTL_SECONDS,
+            min_refresh_interval: int = MIN_REFRESH_INTERVAL_SECONDS,
+    ):
+        self.fetch = fetch
+        self.default_ttl = default_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: Dict[str, Tuple[str, object]] = {}
+        self._expires_at = 0.0
+        self._last_fetch = float("-inf")
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def _refresh(self) -> None:
+        jwks, max_age = self.fetch()
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            try:
+                keys[jwk["kid"]] = public_key_from_jwk(jwk)
+            except (KeyError, ValueError):
+                continue
+        now = time.monotonic()
+        self._keys = keys
+        self._last_fetch = now
+        self._expires_at = now + (max_age if max_age is not None else self.default_ttl)
+        self.fetches += 1
+
+    def _needs_refresh(self, kid: Optional[str], now: float) -> bool:
+        stale = now >= self._expires_at
+        unknown = kid not in self._keys and now - self._last_fetch >= self.min_refresh_interval
+        return stale or unknown
+
+    def get(self, kid: Optional[str], algorithm: Optional[str] = None):
+        """Return the public key for kid, refetching the JWKS if needed."""
+        if self._needs_refresh(kid, time.monotonic()):
+            # One thread fetches. Others keep using the key they have and
+            # only wait for the fetch when they have none for this kid.
+            if self._lock.acquire(blocking=kid not in self._keys):
+                try:
+                    now = time.monotonic()
+                    if self._needs_refresh(kid, now):
+                        try:
+                            self._refresh()
+                        except (OSError, ValueError) as exc:
+                            # Keep serving the keys we have; retry after the refresh interval.
+                            self._last_fetch = now
+                            self._expires_at = max(self._expires_at, now + self.min_refresh_interval)
+                            logging.warning(f"JWKS refresh failed: {exc}")
+                finally:
+                    self._lock.release()
+        entry = self._keys.get(kid)
+        if entry is None or (algorithm is not None and entry[0] != algorithm):
+            return None
+        return entry[1]
+
+
+class RemoteTokenVerifier:
+    """Verifies tokens issued by the auth service without calling it per request."""
+    def __init__(self, key_cache: JWKSKeyCache):
+        self.key_cache = key_cache
+
+    @classmethod
+    def from_url(cls, jwks_url: str) -> "RemoteTokenVerifier":
+        return cls(JWKSKeyCache(http_fetcher(jwks_url)))
+
+    def decode(self, token: str) -> Dict:
+        """Return verified claims; raises TokenError like the local codecs."""
+        return decode_signed(token, self.key_cache.get)
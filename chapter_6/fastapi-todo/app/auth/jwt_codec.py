@@ -0,0 +1,218 @@
+# ============================================================
+# JWT encoding/decoding
+# ============================================================
+# AuthService signs and verifies tokens through a codec selected for
+# the configured algorithm. HS256 uses a dedicated codec that does all
+# per-key work once up front, EdDSA/RS256 sign with a key ring and
+# select the verification key by `kid`, and anything else falls back
+# to python-jose.
+# ============================================================
+import base64
+import hashlib
+import hmac
+import json
+import time
+from calendar import timegm
+from datetime import datetime
+from typing import Callable, Dict, Optional, Protocol, Tuple
+
+from jose import jwt, JWTError
+
+from app.auth.keys import ASYMMETRIC_ALGORITHMS, KeyRing, verify_signature
+
+
+class TokenError(Exception):
+    """Raised when a token is malformed, badly signed or its claims are invalid."""
+
+
+class TokenCodec(Protocol):
+    def encode(self, claims: Dict) -> str: ...
+
+    def decode(self, token: str) -> Dict: ...
+
+
+# ---------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------
+
+def b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _to_numeric_dates(claims: Dict) -> Dict:
+    """Convert datetime time claims to integer timestamps, as python-jose does."""
+    for time_claim in ("exp", "iat", "nbf"):
+        value = claims.get(time_claim)
+        if isinstance(value, datetime):
+            claims[time_claim] = timegm(value.utctimetuple())
+    return claims
+
+
+def split_token(token: str) -> Tuple[bytes, Dict, bytes, bytes]:
+    """Split a compact JWS into (header segment, header, payload segment, signature)."""
+    try:
+        header_segment, payload_segment, signature_segment = token.encode("ascii").split(b".")
+        header = json.loads(b64url_decode(header_segment))
+        signature = b64url_decode(signature_segment)
+    except (ValueError, UnicodeError, AttributeError):
+        raise TokenError("Malformed token")
+    if not isinstance(header, dict):
+        raise TokenError("Malformed token")
+    return header_segment, header, payload_segment, signature
+
+
+def decode_payload(payload_segment: bytes) -> Dict:
+    """Parse and validate the claims segment of a verified token."""
+    try:
+        claims = json.loads(b64url_decode(payload_segment))
+    except ValueError:
+        raise TokenError("Invalid payload")
+    validate_claims(claims)
+    return claims
+
+
+def validate_claims(claims: Dict) -> None:
+    """Check the registered claims python-jose checks by default."""
+    if not isinstance(claims, dict):
+        raise TokenError("Invalid payload")
+    now = int(time.time())
+    for name in ("exp", "nbf", "iat"):
+        if name in claims and not isinstance(claims[name], (int, float)):
+            raise TokenError(f"Claim '{name}' must be a number")
+    if "exp" in claims and int(claims["exp"]) < now:
+        raise TokenError("Signature has expired")
+    if "nbf" in claims and int(claims["nbf"]) > now:
+        raise TokenError("The token is not yet valid (nbf)")
+    if "sub" in claims and not isinstance(claims["sub"], str):
+        raise TokenError("Subject must be a string")
+    # No audience is configured, so like python-jose any `aud` is unexpected.
+    if "aud" in claims:
+        raise TokenError("Invalid audience")
+
+
+# ---------------------------------------------------------------------
+# Codecs
+# ---------------------------------------------------------------------
+
+class HS256Codec:
+    """
+    HS256 JWT codec producing the same tokens as ``jose.jwt.encode``.
+
+    The HMAC key schedule and the encoded header segment are computed once,
+    so each call only hashes the signing input and (de)serializes the claims.
+    """
+    HEADER = {"alg": "HS256", "typ": "JWT"}
+
+    def __init__(self, secret: str):
+        self._mac = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+        self._header_segment = b64url_encode(
+            json.dumps(self.HEADER, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        )
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return mac.digest()
+
+    def encode(self, claims: Dict) -> str:
+        payload = json.dumps(_to_numeric_dates(dict(claims)), separators=(",", ":")).encode("utf-8")
+        signing_input = self._header_segment + b"." + b64url_encode(payload)
+        return (signing_input + b"." + b64url_encode(self._sign(signing_input))).decode("ascii")
+
+    def decode(self, token: str) -> Dict:
+        try:
+            raw = token.encode("ascii")
+            signing_input, signature_segment = raw.rsplit(b".", 1)
+            header_segment, payload_segment = signing_input.split(b".", 1)
+            if header_segment != self._header_segment:
+                # Same header with a different key order or whitespace is still fine.
+                header = json.loads(b64url_decode(header_segment))
+                if header.get("alg") != "HS256":
+                    raise TokenError("The specified alg value is not allowed")
+            signature = b64url_decode(signature_segment)
+        except (ValueError, UnicodeError, AttributeError):
+            raise TokenError("Malformed token")
+
+        if not hmac.compare_digest(signature, self._sign(signing_input)):
+            raise TokenError("Signature verification failed")
+        return decode_payload(payload_segment)
+
+
+# Resolves (kid, alg) from a token header to a public key, or None if unknown.
+KeyResolver = Callable[[Optional[str], Optional[str]], Optional[object]]
+
+
+def decode_signed(token: str, resolve_key: KeyResolver) -> Dict:
+    """Verify an EdDSA/RS256 token with the key its ``kid`` header points to."""
+    header_segment, header, payload_segment, signature = split_token(token)
+    algorithm = header.get("alg")
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        raise TokenError("The specified alg value is not allowed")
+    public_key = resolve_key(header.get("kid"), algorithm)
+    if public_key is None:
+        raise TokenError("Unknown signing key")
+    if not verify_signature(algorithm, public_key, signature, header_segment + b"." + payload_segment):
+        raise TokenError("Signature verification failed")
+    return decode_payload(payload_segment)
+
+
+class AsymmetricCodec:
+    """Signs with the key ring's current key and verifies with any active key."""
+    def __init__(self, key_ring: KeyRing):
+        self.key_ring = key_ring
+        self._header_segments: Dict[str, bytes] = {}
+
+    def _header_segment(self, kid: str) -> bytes:
+        segment = self._header_segments.get(kid)
+        if segment is None:
+            header = {"alg": self.key_ring.algorithm, "kid": kid, "typ": "JWT"}
+            segment = b64url_encode(json.dumps(header, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+            self._header_segments[kid] = segment
+        return segment
+
+    def _resolve(self, kid: Optional[str], algorithm: Optional[str]):
+        key = self.key_ring.get(kid) if kid else None
+        if key is None or key.algorithm != algorithm:
+            return None
+        return key.public_key
+
+    def encode(self, claims: Dict) -> str:
+        key = self.key_ring.current
+        payload = json.dumps(_to_numeric_dates(dict(claims)), separators=(",", ":")).encode("utf-8")
+        signing_input = self._header_segment(key.kid) + b"." + b64url_encode(payload)
+        return (signing_input + b"." + b64url_encode(key.sign(signing_input))).decode("ascii")
+
+    def decode(self, token: str) -> Dict:
+        return decode_signed(token, self._resolve)
+
+
+class JoseCodec:
+    """Generic codec that delegates to python-jose for any other algorithm."""
+    def __init__(self, key, algorithm: str):
+        self.key = key
+        self.algorithm = algorithm
+
+    def encode(self, claims: Dict) -> str:
+        return jwt.encode(dict(claims), self.key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> Dict:
+        try:
+            return jwt.decode(token, self.key, algorithms=[self.algorithm])
+        except JWTError as exc:
+            raise TokenError(str(exc))
+
+
+def build_codec(key, algorithm: str) -> TokenCodec:
+    """
+    Return the fastest codec available for the algorithm. ``key`` is the
+    shared secret for HMAC algorithms and a KeyRing for EdDSA/RS256.
+    """
+    if algorithm == "HS256":
+        return HS256Codec(key)
+    if algorithm in ASYMMETRIC_ALGORITHMS:
+        return AsymmetricCodec(key)
+    return JoseCodec(key, algorithm)
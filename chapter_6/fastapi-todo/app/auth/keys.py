@@ -0,0 +1,180 @@
+# ============================================================
+# Asymmetric signing keys and JWKS
+# ============================================================
+import base64
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "RS256")
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64url_int(value: int) -> str:
+    return _b64url(value.to_bytes((value.bit_length() + 7) // 8 or 1, "big"))
+
+
+def _b64url_to_int(value: str) -> int:
+    return int.from_bytes(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)), "big")
+
+
+# ---------------------------------------------------------------------
+# Sign / verify primitives
+# ---------------------------------------------------------------------
+
+def generate_private_key(algorithm: str):
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+
+
+def sign(algorithm: str, private_key, data: bytes) -> bytes:
+    if algorithm == "EdDSA":
+        return private_key.sign(data)
+    return private_key.sign(data, padding.PKCS1v15(), hashes.SHA256())
+
+
+def verify_signature(algorithm: str, public_key, signature: bytes, data: bytes) -> bool:
+    try:
+        if algorithm == "EdDSA" and isinstance(public_key, ed25519.Ed25519PublicKey):
+            public_key.verify(signature, data)
+            return True
+        if algorithm == "RS256" and isinstance(public_key, rsa.RSAPublicKey):
+            public_key.verify(signature, data, padding.PKCS1v15(), hashes.SHA256())
+            return True
+    except InvalidSignature:
+        return False
+    return False
+
+
+def public_jwk(algorithm: str, public_key) -> Dict[str, str]:
+    """Return the public JWK members for the key (without kid/alg/use)."""
+    if algorithm == "EdDSA":
+        raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        return {"kty": "OKP", "crv": "Ed25519", "x": _b64url(raw)}
+    numbers = public_key.public_numbers()
+    return {"kty": "RSA", "n": _b64url_int(numbers.n), "e": _b64url_int(numbers.e)}
+
+
+def public_key_from_jwk(jwk: Dict) -> Tuple[str, object]:
+    """Build a (algorithm, public key) pair from a JWK dict."""
+    if jwk.get("kty") == "OKP" and jwk.get("crv") == "Ed25519":
+        raw = base64.urlsafe_b64decode(jwk["x"] + "=" * (-len(jwk["x"]) % 4))
+        return "EdDSA", ed25519.Ed25519PublicKey.from_public_bytes(raw)
+    if jwk.get("kty") == "RSA":
+        numbers = rsa.RSAPublicNumbers(_b64url_to_int(jwk["e"]), _b64url_to_int(jwk["n"]))
+        return "RS256", numbers.public_key()
+    raise ValueError(f"Unsupported JWK: kty={jwk.get('kty')}")
+
+
+def thumbprint(jwk: Dict[str, str]) -> str:
+    """RFC 7638 JWK thumbprint, used as the key id."""
+    required = {"OKP": ("crv", "kty", "x"), "RSA": ("e", "kty", "n")}[jwk["kty"]]
+    canonical = json.dumps({k: jwk[k] for k in required}, separators=(",", ":"), sort_keys=True)
+    return _b64url(hashlib.sha256(canonical.encode("utf-8")).digest())[:16]
+
+
+# ---------------------------------------------------------------------
+# Key ring
+# ---------------------------------------------------------------------
+
+@dataclass
+class SigningKey:
+    algorithm: str
+    private_key: object
+    kid: str = ""
+    public_key: object = field(init=False)
+
+    def __post_init__(self):
+        self.public_key = self.private_key.public_key()
+        if not self.kid:
+            self.kid = thumbprint(public_jwk(self.algorithm, self.public_key))
+
+    def jwk(self) -> Dict[str, str]:
+        return {
+            **public_jwk(self.algorithm, self.public_key),
+            "kid": self.kid,
+            "alg": self.algorithm,
+            "use": "sig",
+        }
+
+    def sign(self, data: bytes) -> bytes:
+        return sign(self.algorithm, self.private_key, data)
+
+
+class KeyRing:
+    """
+    The set of keys tokens may be signed with.
+
+    New tokens are signed with the current key; every active key verifies.
+    ``rotate()`` adds a new current key and keeps the old ones active until
+    they are retired, so tokens issued before a rotation stay valid.
+    """
+    def __init__(self, algorithm: str, keys: Optional[List[SigningKey]] = None):
+        """Without keys, a fresh current key is generated."""
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self._lock = threading.Lock()
+        self._keys: Dict[str, SigningKey] = {}
+        self._current: Optional[SigningKey] = None
+        for key in keys or []:
+            self.add(key)
+        if self._current is None:
+            self.rotate()
+
+    @property
+    def current(self) -> SigningKey:
+        return self._current
+
+    def add(self, key: SigningKey, make_current: bool = True) -> SigningKey:
+        with self._lock:
+            self._keys = {**self._keys, key.kid: key}
+            if make_current or self._current is None:
+                self._current = key
+        return key
+
+    def rotate(self) -> SigningKey:
+        """Generate a new key and start signing with it."""
+        return self.add(SigningKey(self.algorithm, generate_private_key(self.algorithm)))
+
+    def retire(self, kid: str) -> None:
+        """Stop accepting tokens signed with kid. The current key cannot be retired."""
+        with self._lock:
+            if self._current is not None and self._current.kid == kid:
+                raise ValueError("Cannot retire the current signing key")
+            self._keys = {k: v for k, v in self._keys.items() if k != kid}
+
+    def get(self, kid: str) -> Optional[SigningKey]:
+        return self._keys.get(kid)
+
+    def jwks(self) -> Dict[str, List[Dict[str, str]]]:
+        """Public JWK set of all active keys."""
+        return {"keys": [key.jwk() for key in self._keys.values()]}
+
+    @classmethod
+    def load(cls, algorithm: str, keys_dir: Optional[str] = None) -> "KeyRing":
+        """
+        Load PEM private keys named ``<kid>.pem`` from keys_dir; the newest
+        file is the current key. Without a directory an ephemeral key is
+        generated, which is only suitable for development.
+        """
+        paths = sorted(Path(keys_dir).glob("*.pem"), key=os.path.getmtime) if keys_dir else []
+        keys = [
+            SigningKey(algorithm, serialization.load_pem_private_key(path.read_bytes(), password=None), kid=path.stem)
+            for path in paths
+        ]
+        return cls(algorithm, keys)
@@ -0,0 +1,65 @@
+# ============================================================
+# Request-scoped principal
+# ============================================================
+from typing import Callable, Dict, List, Optional
+
+from fastapi import HTTPException, Request
+
+from app.auth.service import AuthService
+from app.ops.timing import phase
+from app.users.entities import UserEntity
+from app.users.service import get_user_service
+
+_UNLOADED = object()
+
+
+class Principal:
+    """
+    The authenticated caller of one request: the verified token claims plus
+    the user record, which is loaded on first access and then reused.
+    """
+    def __init__(self, claims: Dict, load_user: Optional[Callable[[str], Optional[UserEntity]]] = None):
+        self.claims = claims
+        self._load_user = load_user
+        self._user = _UNLOADED
+
+    @property
+    def username(self) -> str:
+        return self.claims["sub"]
+
+    @property
+    def scopes(self) -> List[str]:
+        return self.claims.get("scopes") or []
+
+    @property
+    def role(self) -> Optional[str]:
+        return self.claims.get("role")
+
+    @property
+    def user(self) -> Optional[UserEntity]:
+        if self._user is _UNLOADED:
+            load_user = self._load_user or get_user_service().get_user
+            self._user = load_user(self.username)
+        return self._user
+
+
+def resolve_principal(
+        token: str,
+        request: Optional[Request] = None,
+        load_user: Optional[Callable[[str], Optional[UserEntity]]] = None,
+) -> Principal:
+    """
+    Return the request's principal, decoding the token only the first time.
+    The principal is cached on ``request.state`` so every auth dependency of
+    the request shares it.
+    """
+    principal = getattr(request.state, "principal", None) if request is not None else None
+    if principal is None:
+        with phase("auth"):
+            payload = AuthService.decode_token_cached(token)
+        if not payload.get("sub"):
+            raise HTTPException(status_code=401, detail="Invalid token payload")
+        principal = Principal(payload, load_user)
+        if request is not None:
+            request.state.principal = principal
+    return principal
@@ -0,0 +1,218 @@
+# ============================================================
+# Rate limiting for credential endpoints
+# ============================================================
+# Every /auth/token and /auth/register request costs a password hash.
+# A token bucket per client IP and per username is checked before any
+# hashing happens, so a credential-stuffing burst is turned away with
+# 429 + Retry-After instead of consuming CPU.
+#
+# The SQLite backend waits on a file lock shared with the other workers;
+# async endpoints call `check_async`, which runs it in the "auth" lane.
+# ============================================================
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Protocol, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.core.lanes import lane_scheduler
+from app.core.state import ensure_parent_dir, state_path
+
+
+# ---------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------
+# "<burst>/<seconds>": up to <burst> requests at once, refilled at
+# <burst> per <seconds>.
+AUTH_RATE_LIMIT_PER_IP = os.getenv("AUTH_RATE_LIMIT_PER_IP", "30/60")
+AUTH_RATE_LIMIT_PER_USER = os.getenv("AUTH_RATE_LIMIT_PER_USER", "10/60")
+# "memory" is per process; "sqlite" shares buckets between the workers on a host.
+AUTH_RATE_LIMIT_BACKEND = os.getenv("AUTH_RATE_LIMIT_BACKEND", "memory")
+AUTH_RATE_LIMIT_DB_PATH = os.getenv("AUTH_RATE_LIMIT_DB_PATH", state_path("rate_limits.sqlite3"))
+AUTH_RATE_LIMIT_STATS_WINDOW_SECONDS = 60
+
+
+def parse_rate(rate: str) -> Tuple[float, float]:
+    """Parse "<burst>/<seconds>" into (capacity, refill per second)."""
+    burst, seconds = rate.split("/")
+    return float(burst), float(burst) / float(seconds)
+
+
+# ---------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------
+
+class BucketBackend(Protocol):
+    # True if consume() may wait on I/O or other processes.
+    blocking: bool
+
+    def consume(self, key: str, capacity: float, refill_per_second: float, now: float) -> float:
+        """Take one token from the bucket; return 0 if allowed, else seconds until one is available."""
+        ...
+
+    def reset(self) -> None: ...
+
+
+def _take(tokens: float, updated: float, capacity: float, refill_per_second: float, now: float) -> Tuple[float, float]:
+    """Refill then try to take one token. Returns (tokens left, retry after)."""
+    tokens = min(capacity, tokens + max(0.0, now - updated) * refill_per_second)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / refill_per_second
+
+
+class InMemoryBucketBackend:
+    """Buckets in a bounded LRU dict; the least recently seen keys are dropped first."""
+    blocking = False
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: float, refill_per_second: float, now: float) -> float:
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens, retry_after = _take(tokens, updated, capacity, refill_per_second, now)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketBackend:
+    """Buckets in a SQLite file, updated atomically so several worker processes can share it."""
+    blocking = True
+
+    def __init__(self, path: str = AUTH_RATE_LIMIT_DB_PATH):
+        self._conn = sqlite3.connect(ensure_parent_dir(path), check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: float, refill_per_second: float, now: float) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                tokens, retry_after = _take(tokens, updated, capacity, refill_per_second, now)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM buckets")
+
+
+# ---------------------------------------------------------------------
+# Stats
+# ---------------------------------------------------------------------
+
+class SlidingWindowCounter:
+    """Allowed/rejected counts over the last ``window_seconds``, in one-second slots."""
+    def __init__(self, window_seconds: int = AUTH_RATE_LIMIT_STATS_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._slots = [[-1, 0, 0] for _ in range(window_seconds)]
+        self._lock = threading.Lock()
+
+    def record(self, allowed: bool, now: float) -> None:
+        second = int(now)
+        with self._lock:
+            slot = self._slots[second % self.window_seconds]
+            if slot[0] != second:
+                slot[0], slot[1], slot[2] = second, 0, 0
+            slot[1 if allowed else 2] += 1
+
+    def totals(self, now: float) -> Dict[str, float]:
+        oldest = int(now) - self.window_seconds
+        with self._lock:
+            live = [slot for slot in self._slots if slot[0] > oldest]
+            allowed = sum(slot[1] for slot in live)
+            rejected = sum(slot[2] for slot in live)
+        total = allowed + rejected
+        return {
+            "window_seconds": self.window_seconds,
+            "allowed": allowed,
+            "rejected": rejected,
+            "reject_ratio": rejected / total if total else 0.0,
+        }
+
+
+# ---------------------------------------------------------------------
+# Limiter
+# ---------------------------------------------------------------------
+
+class RateLimiter:
+    def __init__(
+            self,
+            backend: BucketBackend,
+            per_ip: str = AUTH_RATE_LIMIT_PER_IP,
+            per_user: str = AUTH_RATE_LIMIT_PER_USER,
+    ):
+        self.backend = backend
+        self.per_ip = parse_rate(per_ip)
+        self.per_user = parse_rate(per_user)
+        self._stats: Dict[str, SlidingWindowCounter] = {}
+
+    def check(self, scope: str, client_ip: Optional[str], username: Optional[str]) -> None:
+        """Consume one request for the IP and the username; raise 429 if either is exhausted."""
+        now = time.time()
+        retry_after = 0.0
+        if client_ip:
+            retry_after = self.backend.consume(f"{scope}:ip:{client_ip}", *self.per_ip, now)
+        if username and not retry_after:
+            retry_after = self.backend.consume(f"{scope}:user:{username.lower()}", *self.per_user, now)
+        self._stats.setdefault(scope, SlidingWindowCounter()).record(not retry_after, now)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, try again later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    async def check_async(self, scope: str, client_ip: Optional[str], username: Optional[str]) -> None:
+        """``check`` for async endpoints; a blocking backend runs in the auth lane, off the event loop."""
+        if self.backend.blocking:
+            await lane_scheduler.get("auth").run(self.check, scope, client_ip, username)
+        else:
+            self.check(scope, client_ip, username)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        now = time.time()
+        return {scope: counter.totals(now) for scope, counter in self._stats.items()}
+
+    def reset(self) -> None:
+        self.backend.reset()
+        self._stats.clear()
+
+
+def build_backend(name: str = AUTH_RATE_LIMIT_BACKEND) -> BucketBackend:
+    if name == "sqlite":
+        return SQLiteBucketBackend(AUTH_RATE_LIMIT_DB_PATH)
+    return InMemoryBucketBackend()
+
+
+def client_ip(request: Request) -> Optional[str]:
+    return request.client.host if request.client else None
+
+
+auth_rate_limiter = RateLimiter(build_backend())
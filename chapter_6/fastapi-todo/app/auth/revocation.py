@@ -0,0 +1,202 @@
+# ============================================================
+# Refresh-token revocation
+# ============================================================
+# Revoked refresh-token ids (jti) are persisted in SQLite. An in-memory
+# Bloom filter built from the table answers the common "not revoked"
+# case without looking the id up; only possible hits are confirmed
+# against the table.
+#
+# Several worker processes share the file. Each one bumps a counter in
+# a small memory-mapped file next to it after committing revocations;
+# a check that sees the counter move first reads the rows other workers
+# added, so a negative is never stale. Revoking inserts the id only if
+# it is not there yet: of two concurrent rotations of one token only
+# the first succeeds.
+# ============================================================
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.core.state import ensure_parent_dir, state_path
+
+
+# ---------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------
+REVOCATION_DB_PATH = os.getenv("REVOCATION_DB_PATH", state_path("revoked_tokens.sqlite3"))
+REVOCATION_FILTER_CAPACITY = int(os.getenv("REVOCATION_FILTER_CAPACITY", "100000"))
+REVOCATION_FILTER_FP_RATE = float(os.getenv("REVOCATION_FILTER_FP_RATE", "0.01"))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, using double hashing."""
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationGeneration:
+    """Shared counter of revocation commits, in an 8-byte memory-mapped file."""
+    def __init__(self, path: str):
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < 8:
+            os.ftruncate(self._fd, 8)
+        self._map = mmap.mmap(self._fd, 8)
+
+    def read(self) -> int:
+        return int.from_bytes(self._map[:8], "little")
+
+    def bump(self) -> None:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            self._map[:8] = (self.read() + 1).to_bytes(8, "little")
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class RevocationStore:
+    """
+    Persistent set of revoked token ids with a Bloom-filter fast path.
+
+    Each revocation keeps the token's ``exp`` so rows can be purged once the
+    token could no longer be used anyway; that happens on startup and
+    before the filter would otherwise have to grow. ``seq`` only ever
+    increases, so each worker can read just the rows it has not seen.
+    """
+    def __init__(
+            self,
+            path: str = REVOCATION_DB_PATH,
+            capacity: int = REVOCATION_FILTER_CAPACITY,
+            fp_rate: float = REVOCATION_FILTER_FP_RATE,
+    ):
+        self.path = path
+        self.fp_rate = fp_rate
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ensure_parent_dir(path), check_same_thread=False)
+        # WAL keeps each revocation commit to a sequential append.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS revoked_tokens ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, jti TEXT NOT NULL UNIQUE, expires_at INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+        self._generation = RevocationGeneration(path + "-generation")
+        self.filter_negatives = 0
+        self.store_lookups = 0
+        self.false_positives = 0
+        self._rebuild(capacity)
+
+    def _rebuild(self, capacity: int) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM revoked_tokens").fetchone()[0]
+        self._filter = BloomFilter(max(capacity, count * 2), self.fp_rate)
+        self._last_seq = 0
+        self._sync()
+
+    def _sync(self) -> None:
+        """Add rows committed since the last sync to the filter. Caller holds the lock."""
+        # Read before the rows: a commit after this point moves the counter again.
+        self._seen_generation = self._generation.read()
+        for seq, jti in self._conn.execute(
+                "SELECT seq, jti FROM revoked_tokens WHERE seq > ? ORDER BY seq", (self._last_seq,)):
+            self._filter.add(jti)
+            self._last_seq = seq
+
+    def revoke(self, jti: str, expires_at: int) -> bool:
+        """
+        Revoke ``jti``. Returns False if it was already revoked, by this
+        or another worker, so the caller can treat the token as used.
+        """
+        return self.revoke_many([(jti, expires_at)]) == 1
+
+    def revoke_many(self, entries: Iterable[Tuple[str, int]]) -> int:
+        """Revoke several ids; returns how many were not revoked before."""
+        entries = list(entries)
+        with self._lock:
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)", entries
+            )
+            self._conn.commit()
+            self._generation.bump()
+            self._sync()
+            if self._filter.count > self._filter.capacity:
+                # The rebuild after purging sizes the filter for twice the rows left.
+                self._purge(int(time.time()))
+            return cursor.rowcount
+
+    def is_revoked(self, jti: str) -> bool:
+        if self._generation.read() != self._seen_generation:
+            with self._lock:
+                self._sync()
+        if jti not in self._filter:
+            self.filter_negatives += 1
+            return False
+        with self._lock:
+            self.store_lookups += 1
+            row = self._conn.execute("SELECT 1 FROM revoked_tokens WHERE jti = ?", (jti,)).fetchone()
+            if row is None:
+                self.false_positives += 1
+            return row is not None
+
+    def _purge(self, now: int) -> int:
+        cursor = self._conn.execute("DELETE FROM revoked_tokens WHERE expires_at < ?", (now,))
+        self._conn.commit()
+        self._rebuild(self._filter.capacity)
+        return cursor.rowcount
+
+    def purge_expired(self, now: Optional[int] = None) -> int:
+        """Delete revocations of tokens that have expired and rebuild the filter."""
+        with self._lock:
+            return self._purge(int(now or time.time()))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "revoked": self._filter.count,
+            "filter_bits": self._filter.size,
+            "filter_hashes": self._filter.hashes,
+            "filter_negatives": self.filter_negatives,
+            "store_lookups": self.store_lookups,
+            "false_positives": self.false_positives,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+        self._generation.close()
+
+
+_revocation_store: Optional[RevocationStore] = None
+
+def get_revocation_store() -> RevocationStore:
+    global _revocation_store
+    if _revocation_store is None:
+        _revocation_store = RevocationStore(REVOCATION_DB_PATH)
+    return _revocation_store
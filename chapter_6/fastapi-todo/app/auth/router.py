@@ -3,10 +3,12 @@
 # ============================================================
 
 # ---- Standard library ----
+import hashlib
+import json
 from datetime import timedelta
 
 # ---- Third-party packages ----
-from fastapi import HTTPException, Depends, APIRouter, status
+from fastapi import HTTPException, Depends, APIRouter, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 # ---- Local application imports ----
@@ -16,23 +18,41 @@ from app.users.service import UserService, get_user_service
 from app.auth.service import (
     AuthService,
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    REFRESH_TOKEN_EXPIRE_DAYS
+    JWKS_MAX_AGE_SECONDS,
 )
-from app.auth.dependencies import get_auth_service
+from app.auth.dependencies import get_auth_service, require_admin
+from app.auth.rate_limit import RateLimiter, auth_rate_limiter, client_ip
+from app.core.lanes import lane_route
 
 # ---- Router -----
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], route_class=lane_route("auth"))
+jwks_router = APIRouter(tags=["Auth"])
+
+
+def get_rate_limiter() -> RateLimiter:
+    return auth_rate_limiter
+
 
 @router.post("/token", response_model=Token, response_model_exclude_none=True)
-def login(
+async def login(
+        request: Request,
         form_data: OAuth2PasswordRequestForm = Depends(),
         user_service: UserService = Depends(get_user_service),
-        auth_service: AuthService = Depends(get_auth_service)
+        auth_service: AuthService = Depends(get_auth_service),
+        rate_limiter: RateLimiter = Depends(get_rate_limiter),
 ):
     """Authenticate user and return JWT token."""
+    await rate_limiter.check_async("login", client_ip(request), form_data.username)
     fetched_user = user_service.get_user(form_data.username)
-    if not fetched_user or not auth_service.verify_password(form_data.password, fetched_user.hashed_password):
+    verified, new_hash = False, None
+    if fetched_user:
+        verified, new_hash = await auth_service.verify_and_update_password_async(
+            form_data.password, fetched_user.hashed_password)
+    if not verified:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
+    if new_hash:
+        # The stored hash predates the current hash policy; upgrade it.
+        user_service.update_password_hash(fetched_user.username, new_hash)
     user = User(
         id=fetched_user.id,
         username=fetched_user.username,
@@ -46,9 +66,8 @@ def login(
         {"sub": user.username, "scopes": user.scopes, "role": user.role},
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    refresh_token = auth_service.create_token(
-        {"sub": user.username, "scopes": user.scopes, "type": "refresh"},
-        expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+    refresh_token = auth_service.create_refresh_token(
+        {"sub": user.username, "scopes": user.scopes, "role": user.role})
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -66,24 +85,38 @@ def refresh_token_endpoint(
         refresh_token: str,
         auth_service: AuthService = Depends(get_auth_service)
 ):
-    access_token = auth_service.create_access_token_from_refresh(refresh_token)
+    """Exchange a refresh token for a new access/refresh token pair."""
+    access_token, new_refresh_token = auth_service.rotate_refresh_token(refresh_token)
     return {
         "access_token": access_token,
         "token_type": "bearer",
         "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": new_refresh_token,
     }
 
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_refresh_token(
+        refresh_token: str,
+        auth_service: AuthService = Depends(get_auth_service)
+):
+    """Revoke a refresh token so it can no longer be exchanged."""
+    auth_service.revoke_refresh_token(refresh_token)
+
 @router.post("/register", response_model=UserRegOutSchema, response_model_exclude_none=True)
-def register_user(
+async def register_user(
+        request: Request,
         user_register: UserRegisterSchema,
         user_service: UserService = Depends(get_user_service),
+        rate_limiter: RateLimiter = Depends(get_rate_limiter),
 ):
     """Register a new user."""
+    await rate_limiter.check_async("register", client_ip(request), user_register.username)
     fetched_user = user_service.get_user(user_register.username)
     if fetched_user:
         raise HTTPException(status_code=400, detail="User already exists")
 
-    created_user = user_service.register_user(
+    created_user = await user_service.register_user_async(
         username=user_register.username,
         password=user_register.password,
         name=user_register.name,
@@ -93,3 +126,19 @@ def register_user(
     )
     return created_user
 
+
+@router.get("/rate-limits", dependencies=[Depends(require_admin)])
+def rate_limit_stats(rate_limiter: RateLimiter = Depends(get_rate_limiter)):
+    """Allowed/rejected credential requests over the recent window, per endpoint."""
+    return rate_limiter.stats()
+
+
+@jwks_router.get("/.well-known/jwks.json")
+def jwks(request: Request):
+    """Public signing keys, cacheable by downstream verifiers."""
+    body = json.dumps(AuthService.jwks(), separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    headers = {"Cache-Control": f"public, max-age={JWKS_MAX_AGE_SECONDS}", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
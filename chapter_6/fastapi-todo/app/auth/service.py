@@ -1,22 +1,36 @@
 # ============================================================
 # Business logic
 # ============================================================
+import os
+import uuid
+
 from fastapi import HTTPException
 from fastapi.security import OAuth2PasswordBearer, HTTPBasic
-from typing import Optional, Dict
-from jose import jwt, JWTError
+from typing import Optional, Dict, Tuple
 from datetime import datetime, timedelta, timezone
 
 from app.users.entities import UserEntity
+from app.core.hashing import PasswordHasher, password_hasher
+from app.auth.token_cache import token_claims_cache
+from app.auth.jwt_codec import TokenError, build_codec
+from app.auth.keys import ASYMMETRIC_ALGORITHMS, KeyRing
+from app.auth.revocation import get_revocation_store
 
 
 # ---------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------
 SECRET_KEY = "super-secret-key"       # In real apps, load from env
-ALGORITHM = "HS256"
+# HS256 signs with SECRET_KEY. EdDSA or RS256 sign with the keys in
+# JWT_KEYS_DIR (<kid>.pem, newest is current) and publish them as JWKS.
+ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR")
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+JWKS_MAX_AGE_SECONDS = 300
+
+signing_keys = KeyRing.load(ALGORITHM, JWT_KEYS_DIR) if ALGORITHM in ASYMMETRIC_ALGORITHMS else None
+token_codec = build_codec(signing_keys or SECRET_KEY, ALGORITHM)
 
 
 oauth2_scheme = OAuth2PasswordBearer(
@@ -31,8 +45,9 @@ basic_auth_scheme = HTTPBasic()
 
 
 class AuthService:
-    def __init__(self, pwd_context):
+    def __init__(self, pwd_context, hasher: PasswordHasher = password_hasher):
         self.pwd_context = pwd_context
+        self.hasher = hasher
 
     # ---------------------------------------------------------------------
     # Password hashing and verification
@@ -42,6 +57,15 @@ class AuthService:
         """Verify plain password against hashed password."""
         return self.pwd_context.verify(plain_password, hashed_password)
 
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify plain password on the password hashing process pool."""
+        return await self.hasher.verify(plain_password, hashed_password)
+
+    async def verify_and_update_password_async(
+            self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify and return a new hash when the stored one is outdated."""
+        return await self.hasher.verify_and_update(plain_password, hashed_password)
+
     def authenticate_user(self, username: str, password: str, users: Dict) -> Optional[UserEntity]:
         user = users.get(username)
         if not user or not self.verify_password(password, user["hashed_password"]):
@@ -56,33 +80,91 @@ class AuthService:
     def decode_token(token: str) -> Dict:
         """Decode JWT token; raise HTTPException if invalid or expired."""
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = token_codec.decode(token)
             return payload
-        except JWTError:
+        except TokenError:
             raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+    @staticmethod
+    def decode_token_cached(token: str) -> Dict:
+        """Like decode_token, but reuses claims of tokens verified before."""
+        payload = token_claims_cache.get(token)
+        if payload is None:
+            payload = AuthService.decode_token(token)
+            token_claims_cache.put(token, payload)
+        return payload
+
     @staticmethod
     def create_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """Create JWT token with optional expiration delta."""
         to_encode = data.copy()
         expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+        encoded_jwt = token_codec.encode(to_encode)
         return encoded_jwt
 
     @staticmethod
-    def create_access_token_from_refresh(refresh_token: str) -> str:
-        """Create JWT token from a refresh token."""
+    def jwks() -> Dict:
+        """Public keys downstream services can verify our tokens with."""
+        return signing_keys.jwks() if signing_keys else {"keys": []}
+
+    @staticmethod
+    def retire_signing_key(kid: str) -> None:
+        """Stop accepting tokens signed with kid, including already cached ones."""
+        if signing_keys is None:
+            raise ValueError("Key retirement requires an asymmetric ALGORITHM")
+        signing_keys.retire(kid)
+        token_claims_cache.clear()
+
+    @staticmethod
+    def create_refresh_token(data: dict) -> str:
+        """Create a revocable refresh token with a unique ``jti``."""
+        return AuthService.create_token(
+            {**data, "type": "refresh", "jti": uuid.uuid4().hex},
+            expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+
+    @staticmethod
+    def _decode_refresh_token(refresh_token: str) -> Dict:
+        """Decode a refresh token and reject it if it was revoked."""
         try:
-            payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
-            if payload.get("type") != "refresh":
-                raise HTTPException(status_code=401, detail="Invalid refresh token")
-        except JWTError:
+            payload = token_codec.decode(refresh_token)
+        except TokenError:
             raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+        if payload.get("type") != "refresh" or not payload.get("jti"):
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        if get_revocation_store().is_revoked(payload["jti"]):
+            raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+        return payload
 
+    @staticmethod
+    def create_access_token_from_refresh(refresh_token: str) -> str:
+        """Create JWT token from a refresh token."""
+        payload = AuthService._decode_refresh_token(refresh_token)
         new_access_token = AuthService.create_token(
             {"sub": payload.get('sub'), "scopes": payload.get("scopes"), "role": payload.get("role")},
             expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         )
         return new_access_token
 
+    @staticmethod
+    def rotate_refresh_token(refresh_token: str) -> Tuple[str, str]:
+        """
+        Exchange a refresh token for a new access token and a new refresh
+        token. The presented refresh token is revoked, so it works only once.
+        """
+        payload = AuthService._decode_refresh_token(refresh_token)
+        # Only the request whose insert wins may rotate; a concurrent reuse loses here.
+        if not get_revocation_store().revoke(payload["jti"], int(payload["exp"])):
+            raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+        claims = {"sub": payload.get("sub"), "scopes": payload.get("scopes"), "role": payload.get("role")}
+        access_token = AuthService.create_token(
+            claims, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        return access_token, AuthService.create_refresh_token(claims)
+
+    @staticmethod
+    def revoke_refresh_token(refresh_token: str) -> None:
+        """Revoke a refresh token, e.g. on logout."""
+        payload = AuthService._decode_refresh_token(refresh_token)
+        get_revocation_store().revoke(payload["jti"], int(payload["exp"]))
@@ -0,0 +1,103 @@
+# ============================================================
+# Verified-token claims cache
+# ============================================================
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.ops.metrics import registry
+
+# ---------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+
+class TokenClaimsCache:
+    """
+    Bounded LRU cache of claims for tokens that already passed verification.
+
+    Entries are keyed by the SHA-256 digest of the token, so raw tokens are
+    never held in memory, and each entry expires at the token's own ``exp``.
+    Tokens without an ``exp`` claim are never cached.
+    """
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        """Return a copy of the cached claims, or None if absent or expired."""
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(claims)
+
+    def put(self, token: str, claims: Dict) -> None:
+        """Cache verified claims until the token's ``exp``."""
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)) or self.max_entries <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (float(expires_at), dict(claims))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters describing cache effectiveness."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+            }
+
+
+token_claims_cache = TokenClaimsCache()
+
+
+def _cache_events() -> Dict[tuple, float]:
+    stats = token_claims_cache.stats()
+    return {(event,): stats[event] for event in ("hits", "misses", "expirations", "evictions")}
+
+
+TOKEN_CACHE_ENTRIES = registry.gauge(
+    "token_claims_cache_entries", "Verified tokens whose claims are cached.",
+    collect=lambda: {(): token_claims_cache.stats()["size"]},
+)
+TOKEN_CACHE_EVENTS = registry.gauge(
+    "token_claims_cache_events", "Claims cache lookups (hits, misses) and removals (expirations, evictions) since start.",
+    ("event",), collect=_cache_events,
+)
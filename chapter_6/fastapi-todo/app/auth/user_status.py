@@ -0,0 +1,55 @@
+# ============================================================
+# Bounded-staleness user status checks
+# ============================================================
+# Authorization trusts the role and scopes in a verified token. When
+# AUTHZ_MAX_STALENESS_SECONDS is set, the user record is additionally
+# re-read at most once per interval per user, so a deleted, disabled or
+# demoted user loses access within that bound instead of at token expiry.
+# ============================================================
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.users.entities import UserEntity
+
+
+# ---------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------
+# 0 disables the check: authorization then costs no repository reads.
+AUTHZ_MAX_STALENESS_SECONDS = float(os.getenv("AUTHZ_MAX_STALENESS_SECONDS", "0"))
+
+
+class UserStatusCache:
+    def __init__(self, max_staleness: float = AUTHZ_MAX_STALENESS_SECONDS):
+        self.max_staleness = max_staleness
+        self._checked: Dict[str, Tuple[float, Optional[UserEntity]]] = {}
+        self._lock = threading.Lock()
+
+    def check(self, claims: Dict, get_user: Callable[[str], Optional[UserEntity]]) -> None:
+        """Raise if the user behind the claims was removed, disabled or lost their role."""
+        if self.max_staleness <= 0:
+            return
+        username = claims.get("sub")
+        now = time.monotonic()
+        with self._lock:
+            entry = self._checked.get(username)
+        if entry is None or now - entry[0] >= self.max_staleness:
+            entry = (now, get_user(username))
+            with self._lock:
+                self._checked[username] = entry
+        user = entry[1]
+        if user is None or user.disabled:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User is no longer active")
+        if claims.get("role") is not None and user.role != claims.get("role"):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._checked.clear()
+
+
+user_status_cache = UserStatusCache()
@@ -0,0 +1,123 @@
+# ============================================================
+# Single-flight request coalescing
+# ============================================================
+# Many clients polling the same GET route at once would each run the
+# same repository scan and serialize the same list. With
+# CoalescingRoute, concurrent GET requests with the same key share one
+# call of the endpoint and one serialized body: the first request runs
+# it, the others wait for its result.
+#
+# The key is the route, the path and query string and the principal's
+# role and scopes. Authentication and scope checks still run for every
+# request; only the endpoint and serialization are shared, so use the
+# route class only for routes whose response does not depend on the
+# caller beyond their scopes. Nothing is cached: a request arriving
+# after the shared call finished starts a new one.
+# ============================================================
+import asyncio
+import functools
+import inspect
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from fastapi import Request, Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import serialize_response
+from starlette.concurrency import run_in_threadpool
+
+from app.ops.metrics import registry
+from app.ops.timing import TimedRoute, phase
+
+REQUEST_COALESCING_ENABLED = os.getenv("REQUEST_COALESCING_ENABLED", "1") == "1"
+
+COALESCED_REQUESTS = registry.counter(
+    "coalesced_requests_total", "GET requests answered by another request's in-flight call.", ("route",),
+)
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its result."""
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]) -> Tuple[Any, bool]:
+        """Return ``(result, shared)``; ``shared`` is True when another caller started the call."""
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = asyncio.ensure_future(fn())
+            self._flights[key] = flight
+            flight.add_done_callback(functools.partial(self._done, key))
+        # A caller that goes away must not cancel the call for the others.
+        return await asyncio.shield(flight), shared
+
+    def _done(self, key: Hashable, flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+def coalescing_key(route_path: str, request: Request) -> Tuple:
+    principal = getattr(request.state, "principal", None)
+    caller = (principal.role, tuple(sorted(principal.scopes))) if principal is not None else None
+    # Stable sort on the name keeps the order of repeated parameters.
+    query = tuple(sorted(request.query_params.multi_items(), key=lambda item: item[0]))
+    return route_path, request.url.path, query, caller
+
+
+class CoalescingRoute(TimedRoute):
+    """TimedRoute whose GET endpoints are shared by concurrent identical requests."""
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        self.flights = SingleFlight()
+        if REQUEST_COALESCING_ENABLED and set(kwargs.get("methods") or ["GET"]) == {"GET"}:
+            endpoint = self._coalesced(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def _coalesced(self, endpoint: Callable) -> Callable:
+        signature = inspect.signature(endpoint)
+        params = list(signature.parameters.values())
+        request_param = next((p.name for p in params if p.annotation is Request), None)
+        own_request = request_param is not None
+        if not own_request:
+            # Ask FastAPI for the request without showing it to the endpoint.
+            request_param = "coalescing_request"
+            params.append(inspect.Parameter(request_param, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+        async def render(kwargs: Dict) -> Tuple[bytes, int, str]:
+            if inspect.iscoroutinefunction(endpoint):
+                content = await endpoint(**kwargs)
+            else:
+                content = await run_in_threadpool(endpoint, **kwargs)
+            with phase("serialize"):
+                if isinstance(content, Response):
+                    return content.body, content.status_code, content.media_type
+                content = await serialize_response(
+                    field=self.response_field,
+                    response_content=content,
+                    include=self.response_model_include,
+                    exclude=self.response_model_exclude,
+                    by_alias=self.response_model_by_alias,
+                    exclude_unset=self.response_model_exclude_unset,
+                    exclude_defaults=self.response_model_exclude_defaults,
+                    exclude_none=self.response_model_exclude_none,
+                )
+                response_class = self.response_class
+                if isinstance(response_class, DefaultPlaceholder):
+                    response_class = response_class.value
+                response = response_class(content, status_code=self.status_code or 200)
+                return response.body, response.status_code, response.media_type
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            request = kwargs[request_param] if own_request else kwargs.pop(request_param)
+            (body, status_code, media_type), shared = await self.flights.do(
+                coalescing_key(self.path, request), lambda: render(kwargs),
+            )
+            if shared:
+                COALESCED_REQUESTS.inc((self.path,))
+            return Response(body, status_code=status_code, media_type=media_type)
+
+        wrapper.__signature__ = signature.replace(parameters=params)
+        return wrapper
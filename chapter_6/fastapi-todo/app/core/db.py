@@ -1,9 +1,8 @@
 # ============================================================
 # Core DB connection
 # ============================================================
-from typing import List
-from app.core.security import get_password_hash
-from app.users.entities import UserEntity
+from typing import List, Optional
+from app.core.seed import build_seed_users
 
 class DB:
     """
@@ -15,34 +14,23 @@ class DB:
         self.todos = todos or []
 
 
+def build_db() -> DB:
+    """Create a database populated with the seed data."""
+    return DB(build_seed_users(), [])
 
 
-fake_users = [
-    UserEntity(
-        id=1,
-        username="alice",
-        hashed_password=get_password_hash("wonderland"),
-        name="Alice Sharpe",
-        email="asharpe@example.com",
-        role="user",
-        scopes=["read", "write"],
-        disabled=False,
-    ),
-    UserEntity(
-        id=2,
-        username="admin",
-        hashed_password=get_password_hash("secret"),
-        name="Admin",
-        email="admin@example.com",
-        role="admin",
-        scopes=["read", "write", "admin"],
-        disabled=False,
-    ),
-]
-fake_todos = []
-
-# Mock database instance
-mock_db = DB(fake_users, fake_todos)
+# Mock database instance, created on first use by get_db()
+_mock_db: Optional[DB] = None
 
 def get_db() -> DB:
-    return mock_db
+    global _mock_db
+    if _mock_db is None:
+        _mock_db = build_db()
+    return _mock_db
+
+
+def __getattr__(name: str):
+    # Keep `from app.core.db import mock_db` working without building at import.
+    if name == "mock_db":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,91 @@
+# ============================================================
+# Password hashing policy
+# ============================================================
+# A HashPolicy names the scheme new hashes use and its work factors.
+# Hashes made under a different scheme or cost are reported by
+# CryptContext.needs_update() and rewritten on the next good login.
+# `calibrate()` picks work factors that make one verify take about a
+# target number of milliseconds on this host.
+# ============================================================
+import math
+import time
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+from passlib.context import CryptContext
+
+SUPPORTED_SCHEMES = ("bcrypt", "argon2")
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+ARGON2_MAX_TIME_COST = 10
+
+
+@dataclass(frozen=True)
+class HashPolicy:
+    scheme: str = "bcrypt"
+    bcrypt_rounds: int = 12
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536   # KiB
+    argon2_parallelism: int = 1
+
+
+@lru_cache(maxsize=8)
+def context_for(policy: HashPolicy) -> CryptContext:
+    """
+    Build the CryptContext for a policy. Every supported scheme can verify;
+    hashes not made with exactly the policy's scheme and cost need an update.
+    """
+    if policy.scheme not in SUPPORTED_SCHEMES:
+        raise ValueError(f"Unsupported password hash scheme: {policy.scheme}")
+    return CryptContext(
+        schemes=[policy.scheme] + [s for s in SUPPORTED_SCHEMES if s != policy.scheme],
+        deprecated="auto",
+        bcrypt__default_rounds=policy.bcrypt_rounds,
+        bcrypt__min_rounds=policy.bcrypt_rounds,
+        bcrypt__max_rounds=policy.bcrypt_rounds,
+        argon2__time_cost=policy.argon2_time_cost,
+        argon2__memory_cost=policy.argon2_memory_cost,
+        argon2__parallelism=policy.argon2_parallelism,
+    )
+
+
+def scheme_available(scheme: str) -> bool:
+    """Whether the hashing backend for scheme is installed (argon2 is optional)."""
+    try:
+        CryptContext(schemes=[scheme]).hash("probe")
+        return True
+    except Exception:
+        return False
+
+
+def measure_verify_ms(policy: HashPolicy, samples: int = 3) -> float:
+    """Median time in milliseconds of one verify under the policy."""
+    context = context_for(policy)
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate(policy: HashPolicy, target_ms: float) -> HashPolicy:
+    """
+    Return a copy of policy whose work factor makes one verify take about
+    target_ms. bcrypt cost doubles per round; argon2 cost grows linearly
+    with time_cost at a fixed memory cost.
+    """
+    if policy.scheme == "bcrypt":
+        baseline = replace(policy, bcrypt_rounds=BCRYPT_MIN_ROUNDS)
+        measured = measure_verify_ms(baseline)
+        rounds = BCRYPT_MIN_ROUNDS + round(math.log2(max(target_ms, 1e-3) / measured))
+        return replace(policy, bcrypt_rounds=min(BCRYPT_MAX_ROUNDS, max(BCRYPT_MIN_ROUNDS, rounds)))
+
+    # Fit cost = fixed + per_pass * time_cost from two measurements; the
+    # fixed part (filling memory) is large at realistic memory costs.
+    one_pass = measure_verify_ms(replace(policy, argon2_time_cost=1))
+    per_pass = max(measure_verify_ms(replace(policy, argon2_time_cost=2)) - one_pass, 1e-3)
+    time_cost = round(1 + (target_ms - one_pass) / per_pass)
+    return replace(policy, argon2_time_cost=min(ARGON2_MAX_TIME_COST, max(1, time_cost)))
@@ -0,0 +1,141 @@
+# ============================================================
+# Async password hashing on a dedicated process pool
+# ============================================================
+import asyncio
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.hash_policy import HashPolicy, context_for
+from app.core.lanes import lane_scheduler
+from app.core.security import get_hash_policy
+
+
+# ---------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------
+# Number of worker processes used for bcrypt. 0 runs hashing on the
+# threads of the "auth" executor lane instead.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+# Maximum hash/verify calls allowed in flight (running + queued).
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+PASSWORD_HASH_RETRY_AFTER_SECONDS = 1
+
+
+# ---------------------------------------------------------------------
+# Worker functions (must be module level so they can be pickled)
+# ---------------------------------------------------------------------
+
+def _hash(password: str, policy: HashPolicy) -> str:
+    return context_for(policy).hash(password)
+
+
+def _hash_many(passwords: List[str], policy: HashPolicy) -> List[str]:
+    context = context_for(policy)
+    return [context.hash(password) for password in passwords]
+
+
+def _verify(plain_password: str, hashed_password: str, policy: HashPolicy) -> bool:
+    return context_for(policy).verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str, policy: HashPolicy) -> Tuple[bool, Optional[str]]:
+    return context_for(policy).verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification off the request threadpool.
+
+    Work is sent to a process pool with ``workers`` processes, so at most
+    ``workers`` hashes run at once. Calls beyond ``max_pending`` are rejected
+    with a 503 instead of queueing without bound.
+    """
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def hash(self, password: str) -> str:
+        """Hash plain password using the active hash policy."""
+        return await self._run(_hash, password, get_hash_policy())
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        Hash many passwords, spread over all workers in chunks so the
+        per-task overhead is paid per chunk rather than per password.
+        Pending slots for all chunks are reserved up front, so a call is
+        either rejected before any hashing or runs to completion.
+        """
+        if not passwords:
+            return []
+        slots = min(max(1, self.workers) * 2, len(passwords), self.max_pending - self.pending)
+        self._reserve(slots)
+        try:
+            chunk_size = math.ceil(len(passwords) / slots)
+            chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+            policy = get_hash_policy()
+            results = await asyncio.gather(*(self._submit(_hash_many, chunk, policy) for chunk in chunks))
+        finally:
+            self.pending -= slots
+        return [hashed for chunk in results for hashed in chunk]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify plain password against hashed password."""
+        return await self._run(_verify, plain_password, hashed_password, get_hash_policy())
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify, and if the hash does not match the active policy return a
+        replacement hash as well: ``(verified, new_hash or None)``.
+        """
+        return await self._run(_verify_and_update, plain_password, hashed_password, get_hash_policy())
+
+    def start(self) -> None:
+        """Create the process pool ahead of the first request."""
+        if self.workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def shutdown(self) -> None:
+        """Stop the worker processes, if any were started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _reserve(self, slots: int) -> None:
+        if slots <= 0 or self.pending + slots > self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent authentication requests",
+                headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+            )
+        self.pending += slots
+
+    async def _submit(self, fn: Callable, *args):
+        if self.workers <= 0:
+            return await lane_scheduler.get("auth").run(fn, *args)
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def _run(self, fn: Callable, *args):
+        self._reserve(1)
+        try:
+            return await self._submit(fn, *args)
+        finally:
+            self.pending -= 1
+
+
+password_hasher = PasswordHasher()
+
+
+def get_password_hasher() -> PasswordHasher:
+    return password_hasher
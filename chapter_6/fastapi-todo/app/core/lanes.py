@@ -0,0 +1,197 @@
+# ============================================================
+# Executor lanes
+# ============================================================
+# Blocking work runs in named lanes instead of one shared threadpool.
+# Each lane has its own thread capacity and queue limit, so a login
+# storm that fills the "auth" lane does not delay todo reads in the
+# "crud" lane. Calls arriving at a lane whose queue is full are
+# rejected with 503 + Retry-After instead of waiting. While admission
+# control reports overload, lanes below the most important one accept
+# a shorter queue, so their work is rejected first.
+#
+# Routers opt in with `route_class=lane_route("crud")`: their sync
+# endpoints then run in that lane. Sync dependencies still use AnyIO's
+# default threadpool (see app.ops.runtime_monitor).
+# ============================================================
+import functools
+import inspect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Type
+
+from anyio import CapacityLimiter, to_thread
+from anyio.lowlevel import RunVar
+from fastapi import HTTPException, status
+from fastapi.routing import APIRoute
+
+from app.ops.admission import admission_controller
+from app.ops.deadlines import check_deadline
+from app.ops.metrics import registry
+from app.ops.timing import TimedRoute
+
+AUTH_LANE_THREADS = int(os.getenv("AUTH_LANE_THREADS", "4"))
+AUTH_LANE_MAX_QUEUE = int(os.getenv("AUTH_LANE_MAX_QUEUE", "64"))
+CRUD_LANE_THREADS = int(os.getenv("CRUD_LANE_THREADS", "32"))
+CRUD_LANE_MAX_QUEUE = int(os.getenv("CRUD_LANE_MAX_QUEUE", "512"))
+# Under overload each lane keeps this fraction of its queue per more important lane.
+LANE_OVERLOAD_QUEUE_FRACTION = float(os.getenv("LANE_OVERLOAD_QUEUE_FRACTION", "0.25"))
+LANE_RETRY_AFTER_SECONDS = 1
+
+# Set by app.ops.profiling while a request is profiled: lane threads add
+# their ident while they run one of that request's calls.
+profiled_threads: ContextVar[Optional[Set[int]]] = ContextVar("profiled_threads", default=None)
+
+LANE_QUEUE_WAIT = registry.histogram(
+    "lane_queue_wait_seconds", "Time calls waited for a thread in their executor lane.", ("lane",),
+)
+LANE_REJECTED = registry.counter(
+    "lane_rejected_total", "Calls rejected because their lane queue was full.", ("lane",),
+)
+
+
+@dataclass
+class Lane:
+    """
+    ``priority`` orders lanes from most to least important. ``rank``, the
+    number of more important lanes, is set by LaneScheduler; while the
+    worker is overloaded the lane's queue limit shrinks to
+    ``max_queue * LANE_OVERLOAD_QUEUE_FRACTION ** rank``.
+    """
+    name: str
+    capacity: int
+    max_queue: int
+    priority: int = 0
+    pending: int = 0   # running + queued
+    rank: int = 0
+
+    def __post_init__(self):
+        # Limiters belong to one event loop; keep one per loop.
+        self._limiter: RunVar = RunVar(f"lane_limiter_{self.name}")
+
+    @property
+    def limiter(self) -> CapacityLimiter:
+        try:
+            return self._limiter.get()
+        except LookupError:
+            limiter = CapacityLimiter(self.capacity)
+            self._limiter.set(limiter)
+            return limiter
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.pending - self.capacity)
+
+    def queue_limit(self, overloaded: bool) -> int:
+        if not overloaded or not self.rank:
+            return self.max_queue
+        return int(self.max_queue * LANE_OVERLOAD_QUEUE_FRACTION ** self.rank)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run a blocking call on a thread of this lane."""
+        if self.pending >= self.capacity + self.queue_limit(admission_controller.overloaded()):
+            LANE_REJECTED.inc((self.name,))
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, try again later",
+                headers={"Retry-After": str(LANE_RETRY_AFTER_SECONDS)},
+            )
+        queued_at = time.perf_counter()
+        started_at = queued_at
+
+        def call():
+            nonlocal started_at
+            started_at = time.perf_counter()
+            # Don't start work for a request that has given up while queued.
+            check_deadline("lane")
+            threads = profiled_threads.get()
+            if threads is None:
+                return fn(*args, **kwargs)
+            ident = threading.get_ident()
+            threads.add(ident)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                threads.discard(ident)
+
+        self.pending += 1
+        try:
+            return await to_thread.run_sync(call, limiter=self.limiter)
+        finally:
+            self.pending -= 1
+            LANE_QUEUE_WAIT.observe(started_at - queued_at, (self.name,))
+            admission_controller.observe_delay(started_at - queued_at)
+
+    def stats(self) -> Dict:
+        return {
+            "capacity": self.capacity,
+            "max_queue": self.max_queue,
+            "queue_limit": self.queue_limit(admission_controller.overloaded()),
+            "priority": self.priority,
+            "pending": self.pending,
+            "queued": self.queued,
+            "p99_queue_wait_ms": round(LANE_QUEUE_WAIT.percentile(99, (self.name,)) * 1000, 3),
+        }
+
+
+class LaneScheduler:
+    def __init__(self, lanes: List[Lane]):
+        self.lanes: Dict[str, Lane] = {lane.name: lane for lane in lanes}
+        for lane in lanes:
+            lane.rank = sum(other.priority > lane.priority for other in lanes)
+
+    def get(self, name: str) -> Lane:
+        return self.lanes[name]
+
+    def by_priority(self) -> List[Lane]:
+        """Lanes from the most to the least important."""
+        return sorted(self.lanes.values(), key=lambda lane: lane.priority, reverse=True)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {lane.name: lane.stats() for lane in self.by_priority()}
+
+
+lane_scheduler = LaneScheduler([
+    Lane("crud", CRUD_LANE_THREADS, CRUD_LANE_MAX_QUEUE, priority=10),
+    Lane("auth", AUTH_LANE_THREADS, AUTH_LANE_MAX_QUEUE, priority=0),
+])
+
+
+def _lane_threads() -> Dict[tuple, float]:
+    values = {}
+    for lane in lane_scheduler.lanes.values():
+        values[(lane.name, "capacity")] = lane.capacity
+        values[(lane.name, "running")] = lane.pending - lane.queued
+        values[(lane.name, "queued")] = lane.queued
+    return values
+
+
+LANE_THREADS = registry.gauge(
+    "lane_threads", "Threads and queued calls per executor lane.", ("lane", "state"), collect=_lane_threads,
+)
+
+
+def run_in_lane(lane_name: str, endpoint: Callable) -> Callable:
+    """Turn a sync endpoint into an async one that runs in the named lane."""
+    if inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        return await lane_scheduler.get(lane_name).run(endpoint, *args, **kwargs)
+
+    return wrapper
+
+
+def lane_route(lane_name: str, base: Type[APIRoute] = TimedRoute) -> Type[APIRoute]:
+    """A route class whose sync endpoints run in ``lane_name``."""
+    class LaneRoute(base):
+        lane = lane_name
+
+        def __init__(self, path: str, endpoint: Callable, **kwargs):
+            super().__init__(path, run_in_lane(lane_name, endpoint), **kwargs)
+
+    LaneRoute.__name__ = f"{lane_name.title()}LaneRoute"
+    return LaneRoute
@@ -1,7 +1,275 @@
+# ============================================================
+# Logging pipeline
+# ============================================================
+# Request handlers only put records on a bounded in-memory queue; a
+# background writer thread drains it and writes records to the output
+# handlers in batches (one write and one flush per batch). When the
+# queue is full records are dropped and counted instead of blocking the
+# event loop. A handler that fails is reported through its handleError
+# and the writer carries on with the next batch. Queued, dropped and
+# written counts are exported as `log_records{state}` on /metrics.
+# ============================================================
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, RotatingFileHandler
+from typing import Dict, List, Optional
 
+from app.ops.metrics import registry
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 
+
+# ---------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------
+# "json" writes one JSON object per line; anything else uses LOG_FORMAT.
+LOG_OUTPUT_FORMAT = os.getenv("LOG_OUTPUT_FORMAT", "text")
+# Also write to this file, rotated at LOG_FILE_MAX_BYTES. Unset: stderr only.
+LOG_FILE = os.getenv("LOG_FILE")
+LOG_FILE_MAX_BYTES = int(os.getenv("LOG_FILE_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_FILE_BACKUP_COUNT = int(os.getenv("LOG_FILE_BACKUP_COUNT", "5"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+LOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("LOG_FLUSH_INTERVAL_SECONDS", "0.5"))
+
+# Attributes every LogRecord has; anything else came from ``extra=``.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any fields passed with ``extra=``."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Formatted by DroppingQueueHandler before the record was queued.
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+# ---------------------------------------------------------------------
+# Batched output handlers
+# ---------------------------------------------------------------------
+
+def _render(handler: logging.Handler, records: List[logging.LogRecord]) -> str:
+    lines = []
+    for record in records:
+        if record.levelno < handler.level or not handler.filter(record):
+            continue
+        try:
+            lines.append(handler.format(record) + "\n")
+        except Exception:
+            handler.handleError(record)
+    return "".join(lines)
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        text = _render(self, records)
+        if text:
+            with self.lock:
+                self.stream.write(text)
+                self.stream.flush()
+
+
+class BatchRotatingFileHandler(RotatingFileHandler):
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        text = _render(self, records)
+        if not text:
+            return
+        with self.lock:
+            if self.stream is None:
+                self.stream = self._open()
+            position = self.stream.tell()
+            if self.maxBytes > 0 and position > 0 and position + len(text) > self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(text)
+            self.stream.flush()
+
+
+# ---------------------------------------------------------------------
+# Queue and writer thread
+# ---------------------------------------------------------------------
+
+_traceback_formatter = logging.Formatter()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Enqueue without blocking; count records dropped because the queue is full."""
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merge the arguments into the message and turn ``exc_info`` into
+        ``exc_text``, which the writer's formatters render. Unlike
+        QueueHandler.prepare the traceback is not folded into the message.
+        """
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_STOP = object()
+
+
+class LogWriter:
+    """
+    Drains the queue on a daemon thread. Records that arrive together are
+    written as one batch of up to ``batch_size``; the thread wakes at least
+    every ``flush_interval`` seconds.
+    """
+    def __init__(
+            self,
+            log_queue: queue.Queue,
+            handlers: List[logging.Handler],
+            batch_size: int = LOG_BATCH_SIZE,
+            flush_interval: float = LOG_FLUSH_INTERVAL_SECONDS,
+    ):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batches = 0
+        self.records = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Write everything already queued, then stop the thread."""
+        if self._thread is not None:
+            self.queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(record is _STOP for record in batch)
+            self._write([record for record in batch if record is not _STOP])
+            if stopping:
+                return
+
+    def _write(self, records: List[logging.LogRecord]) -> None:
+        if not records:
+            return
+        for handler in self.handlers:
+            emit_batch = getattr(handler, "emit_batch", None)
+            if emit_batch is None:
+                # A plain logging.Handler; it handles its own errors per record.
+                for record in records:
+                    handler.handle(record)
+                continue
+            try:
+                emit_batch(records)
+            except Exception:
+                handler.handleError(records[-1])
+        self.batches += 1
+        self.records += len(records)
+
+
+# ---------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------
+
+_queue_handler: Optional[DroppingQueueHandler] = None
+_writer: Optional[LogWriter] = None
+
+
+def build_handlers() -> List[logging.Handler]:
+    formatter = JsonFormatter() if LOG_OUTPUT_FORMAT == "json" else logging.Formatter(LOG_FORMAT)
+    handlers: List[logging.Handler] = [BatchStreamHandler(sys.stderr)]
+    if LOG_FILE:
+        handlers.append(BatchRotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUP_COUNT, delay=True,
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
 def setup_logging(level: int = logging.INFO) -> None:
-    """Configure root logger once with the same format/level used before."""
-    logging.basicConfig(level=level, format=LOG_FORMAT)
\ No newline at end of file
+    """Route the root logger through the queue and start the writer, once per process."""
+    global _queue_handler, _writer
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _writer is not None:
+        return
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _writer = LogWriter(log_queue, build_handlers())
+    root.addHandler(_queue_handler)
+    _writer.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _queue_handler, _writer
+    if _writer is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _writer.stop()
+    for handler in _writer.handlers:
+        handler.close()
+    _queue_handler = _writer = None
+
+
+def logging_stats() -> Dict[str, int]:
+    if _writer is None:
+        return {"queued": 0, "dropped": 0, "written": 0, "batches": 0}
+    return {
+        "queued": _writer.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+        "written": _writer.records,
+        "batches": _writer.batches,
+    }
+
+
+LOG_RECORDS = registry.gauge(
+    "log_records", "Log records queued, dropped because the queue was full, and written since start.",
+    ("state",), collect=lambda: {(state,): value for state, value in logging_stats().items() if state != "batches"},
+)
@@ -1,19 +1,67 @@
+import os
+import random
 import time
 import logging
-from typing import Callable, Awaitable
-from fastapi import FastAPI, Request
-from starlette.responses import Response
-
-async def request_logger(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
-    """Middleware function that logs method, path, and duration."""
-    start = time.time()
-    response = await call_next(request)
-    duration = time.time() - start
-    logging.info(f"{request.method} {request.url.path} completed in {duration:.4f}s")
-    return response
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Fraction of successful (< 400) requests that are logged. Errors and
+# requests slower than ACCESS_LOG_SLOW_SECONDS are always logged.
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+ACCESS_LOG_SLOW_SECONDS = float(os.getenv("ACCESS_LOG_SLOW_SECONDS", "1.0"))
+
+access_logger = logging.getLogger("app.access")
+
+
+def should_log(status_code: int, duration: float, sample_rate: float = ACCESS_LOG_SAMPLE_RATE) -> bool:
+    if status_code >= 400 or duration >= ACCESS_LOG_SLOW_SECONDS:
+        return True
+    return sample_rate >= 1 or random.random() < sample_rate
+
+
+def log_request(method: str, path: str, status_code: int, duration: float) -> None:
+    """Write one access log line, subject to sampling."""
+    if access_logger.isEnabledFor(logging.INFO) and should_log(status_code, duration):
+        access_logger.info(
+            "%s %s completed in %.4fs", method, path, duration,
+            extra={
+                "method": method,
+                "path": path,
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 3),
+            },
+        )
+
+
+class RequestLoggerMiddleware:
+    """
+    Pure ASGI middleware that logs method, path, status, and duration.
+    It only watches the ``http.response.start`` message, so the response
+    body, streamed or not, passes through untouched.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            log_request(scope["method"], scope["path"], status_code, time.perf_counter() - start)
+
 
 def register_request_logger(app: FastAPI) -> None:
-    """Registers the request_logger as an HTTP middleware on the given app."""
-    @app.middleware("http")
-    async def _mw(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
-        return await request_logger(request, call_next)
\ No newline at end of file
+    """Registers the RequestLoggerMiddleware on the given app."""
+    app.add_middleware(RequestLoggerMiddleware)
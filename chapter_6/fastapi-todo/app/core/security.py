@@ -1,13 +1,47 @@
 # ============================================================
 # Core Security ops
 # ============================================================
-from passlib.context import CryptContext
+import logging
+import os
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.hash_policy import HashPolicy, calibrate, context_for, scheme_available
+
+# ---------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------
+# Scheme for new hashes: "bcrypt" or "argon2" (needs argon2-cffi).
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+# When > 0, work factors are calibrated at startup so one verify takes
+# about this many milliseconds on the host.
+PASSWORD_HASH_TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS", "0"))
+
+hash_policy = HashPolicy(scheme=PASSWORD_HASH_SCHEME)
+pwd_context = context_for(hash_policy)
 
 def get_pwd_ctx():
     return pwd_context
 
+def get_hash_policy() -> HashPolicy:
+    return hash_policy
+
+def set_hash_policy(policy: HashPolicy) -> None:
+    """Switch the policy used for new hashes and rehash checks."""
+    global hash_policy, pwd_context
+    hash_policy = policy
+    pwd_context = context_for(policy)
+
+def configure_hash_policy() -> HashPolicy:
+    """Apply the configured scheme and, if requested, calibrate it. Run at startup."""
+    policy = hash_policy
+    if not scheme_available(policy.scheme):
+        logging.warning(f"Password hash scheme {policy.scheme!r} is not available, using bcrypt")
+        policy = HashPolicy(scheme="bcrypt")
+    if PASSWORD_HASH_TARGET_MS > 0:
+        policy = calibrate(policy, PASSWORD_HASH_TARGET_MS)
+        logging.info(f"Calibrated password hashing to {policy} for {PASSWORD_HASH_TARGET_MS}ms")
+    set_hash_policy(policy)
+    return policy
+
 def get_password_hash(password: str) -> str:
-    """Hash plain password using bcrypt."""
-    return pwd_context.hash(password)
\ No newline at end of file
+    """Hash plain password using the active hash policy."""
+    return pwd_context.hash(password)
@@ -0,0 +1,40 @@
+# ============================================================
+# Seed data
+# ============================================================
+# The password hashes below are precomputed so that building the
+# seed users does not run bcrypt at startup. Plain passwords:
+#   alice -> "wonderland"
+#   admin -> "secret"
+# Regenerate with: python -c "from app.core.security import get_password_hash; print(get_password_hash('...'))"
+# ============================================================
+from typing import List
+
+from app.users.entities import UserEntity
+
+SEED_USERS = [
+    {
+        "id": 1,
+        "username": "alice",
+        "hashed_password": "$2b$12$RKogItE.XtCtyutz.bwEfeyF6eRo7VCQQpqhbZ0o4FirogAOHWNM2",
+        "name": "Alice Sharpe",
+        "email": "asharpe@example.com",
+        "role": "user",
+        "scopes": ["read", "write"],
+        "disabled": False,
+    },
+    {
+        "id": 2,
+        "username": "admin",
+        "hashed_password": "$2b$12$MJl/8Px9AxutOsde7ZdfmuTw7pHNm1VzKSl5KZpxvEjE5MjboE862",
+        "name": "Admin",
+        "email": "admin@example.com",
+        "role": "admin",
+        "scopes": ["read", "write", "admin"],
+        "disabled": False,
+    },
+]
+
+
+def build_seed_users() -> List[UserEntity]:
+    """Return fresh UserEntity objects for the seed users."""
+    return [UserEntity(**{**user, "scopes": list(user["scopes"])}) for user in SEED_USERS]
@@ -0,0 +1,26 @@
+# ============================================================
+# Host-local state files
+# ============================================================
+# SQLite files shared by the worker processes on one host (revoked
+# refresh tokens, rate-limit buckets) default to APP_STATE_DIR instead
+# of the current working directory:
+# $XDG_STATE_HOME/fastapi-todo, or ~/.local/state/fastapi-todo.
+# ============================================================
+import os
+
+APP_STATE_DIR = os.getenv(
+    "APP_STATE_DIR",
+    os.path.join(os.getenv("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "fastapi-todo"),
+)
+
+
+def state_path(filename: str) -> str:
+    """Default location of a state file; the directory is created when the file is opened."""
+    return os.path.join(APP_STATE_DIR, filename)
+
+
+def ensure_parent_dir(path: str) -> str:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return path
@@ -7,6 +7,7 @@
 # ============================================================
 
 # ---- Standard library ----
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 
 # ---- Third-party packages ----
@@ -15,24 +16,61 @@ from fastapi import FastAPI, Depends
 # ---- Local application imports ----
 from app.core.logging_config import setup_logging
 from app.core.logging_middleware import register_request_logger
+from app.ops.admission import ADMISSION_ENABLED, AdmissionMiddleware
+from app.ops.deadlines import DeadlineMiddleware
+from app.ops.metrics import MetricsMiddleware
+from app.ops.timing import ServerTimingMiddleware
+from app.ops.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from app.ops.runtime_monitor import configure_threadpool, runtime_monitor
 from app.core.error_handlers import register_error_handlers, APIError
+from app.core.hashing import password_hasher
+from app.core.security import configure_hash_policy
+from app.auth.revocation import get_revocation_store
+from app.core.db import get_db
+from app.todos.events import close_event_store
+from app.todos.tiering import todo_tiering
 from app.auth.dependencies import authenticate_basic
 
 # ---- Routers ----
-from app.auth.router import router as auth_router
+from app.auth.router import router as auth_router, jwks_router
 from app.todos.router import router as todos_router
 from app.users.router import router as users_router
+from app.ops.router import router as ops_router
 
 # ---- logging setup (moved) ----
 setup_logging()
 
+# ---- lifespan ----
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_threadpool()
+    configure_hash_policy()
+    password_hasher.start()
+    get_revocation_store().purge_expired()  # drop expired rows and build the filter before serving
+    runtime_monitor.start()
+    todo_tiering.start(get_db())
+    yield
+    todo_tiering.shutdown()
+    close_event_store()
+    await runtime_monitor.stop()
+    password_hasher.shutdown()
+
 # ---- app ----
-app = FastAPI(title="FastAPI Todo Application – Tutorial Edition")
+app = FastAPI(title="FastAPI Todo Application – Tutorial Edition", lifespan=lifespan)
+app.add_middleware(DeadlineMiddleware)
 register_request_logger(app)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+# Added last, so it is the outermost layer: shed requests skip the others.
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
 register_error_handlers(app)
 
 # ---- Auth Routes ----
 app.include_router(auth_router)
+app.include_router(jwks_router)
 
 # ---- Todo CRUD Routes ----
 app.include_router(todos_router)
@@ -40,6 +78,9 @@ app.include_router(todos_router)
 # ---- User Routes -----
 app.include_router(users_router)
 
+# ---- Operational Routes -----
+app.include_router(ops_router)
+
 # ---- Demo Routes ----
 
 class BasicAuthDemoResponse(BaseModel):
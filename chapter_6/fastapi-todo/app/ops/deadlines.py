@@ -0,0 +1,154 @@
+# ============================================================
+# Per-request deadlines
+# ============================================================
+# DeadlineMiddleware gives each request a deadline in a context
+# variable: REQUEST_DEADLINE_SECONDS by default, or the budget of the
+# longest matching path prefix in REQUEST_DEADLINES
+# ("/auth=5,/api/users/bulk=120"). The context variable follows the
+# request into executor lane threads.
+#
+# Service and repository methods are wrapped in `@within_deadline`, and
+# executor lanes check the deadline when a queued call gets its thread.
+# Once the deadline has passed, the call raises DeadlineExceeded (504)
+# instead of spending a thread on a response nobody waits for any more.
+# Work already running is not interrupted.
+# ============================================================
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+from fastapi import HTTPException, status
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.ops.metrics import registry, route_template
+
+# Budget of a request in seconds; 0 disables deadlines.
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "10"))
+
+
+def parse_route_deadlines(value: str) -> Dict[str, float]:
+    """Parse "prefix=seconds,prefix=seconds" into a mapping."""
+    deadlines = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        prefix, _, seconds = entry.partition("=")
+        deadlines[prefix.strip()] = float(seconds)
+    return deadlines
+
+
+REQUEST_DEADLINES = parse_route_deadlines(os.getenv("REQUEST_DEADLINES", "/api/users/bulk=120"))
+
+DEADLINE_EXCEEDED = registry.counter(
+    "request_deadline_exceeded_total", "Calls aborted because their request's deadline had passed.",
+    ("route", "stage"),
+)
+
+
+class DeadlineExceeded(HTTPException):
+    def __init__(self, stage: str):
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Request deadline exceeded")
+        self.stage = stage
+
+
+class Deadline:
+    __slots__ = ("budget", "expires_at", "scope")
+
+    def __init__(self, budget: float, scope: Optional[Scope] = None):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+        self.scope = scope
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceeded, counted under ``stage``, if the deadline has passed."""
+        if time.monotonic() >= self.expires_at:
+            route = route_template(self.scope) if self.scope is not None else "<none>"
+            DEADLINE_EXCEEDED.inc((route, stage))
+            raise DeadlineExceeded(stage)
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left for the current request, or None outside a request."""
+    deadline = _current_deadline.get()
+    return None if deadline is None else deadline.remaining()
+
+
+def check_deadline(stage: str) -> None:
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+@contextmanager
+def deadline_scope(budget: float, scope: Optional[Scope] = None) -> Iterator[Deadline]:
+    """
+    Run the block under a deadline ``budget`` seconds from now. An
+    enclosing deadline that expires sooner is kept.
+    """
+    outer = _current_deadline.get()
+    deadline = Deadline(budget, scope)
+    if outer is not None and outer.expires_at <= deadline.expires_at:
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def within_deadline(stage: str) -> Callable:
+    """Decorator checking the current request's deadline before each call."""
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                check_deadline(stage)
+                return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            check_deadline(stage)
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def route_budget(path: str, routes: Dict[str, float] = REQUEST_DEADLINES,
+                 default: float = REQUEST_DEADLINE_SECONDS) -> float:
+    matches = [prefix for prefix in routes if path.startswith(prefix)]
+    return routes[max(matches, key=len)] if matches else default
+
+
+class DeadlineMiddleware:
+    """Pure ASGI middleware owning the request's Deadline."""
+    def __init__(self, app: ASGIApp, routes: Dict[str, float] = REQUEST_DEADLINES,
+                 default: float = REQUEST_DEADLINE_SECONDS):
+        self.app = app
+        self.routes = routes
+        self.default = default
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = route_budget(scope["path"], self.routes, self.default)
+        if budget <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        with deadline_scope(budget, scope):
+            await self.app(scope, receive, send)
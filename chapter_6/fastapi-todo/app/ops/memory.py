@@ -0,0 +1,190 @@
+# ============================================================
+# Memory instrumentation
+# ============================================================
+# Admin-controlled tracemalloc: start/stop tracing, take named
+# snapshots, and report the top allocation sites or the difference
+# between two snapshots, by line or grouped by module (app.todos,
+# app.users, ...). `collection_stats` counts the objects and bytes held
+# by each collection of the store, so growth can be attributed.
+# ============================================================
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from app.core.db import get_db
+from app.ops.metrics import registry
+
+# Snapshots kept in memory; the oldest is dropped first.
+MEMORY_MAX_SNAPSHOTS = int(os.getenv("MEMORY_MAX_SNAPSHOTS", "10"))
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def module_of(filename: str) -> str:
+    """
+    Group a source file: files of this app by subpackage ("app.todos"),
+    installed packages by top-level name ("pydantic"), the rest as "python".
+    """
+    if filename.startswith(_APP_DIR):
+        parts = os.path.relpath(filename, os.path.dirname(_APP_DIR)).split(os.sep)
+        return ".".join(parts[:2]).removesuffix(".py")
+    for marker in ("site-packages", "dist-packages"):
+        if marker in filename:
+            return filename.split(marker + os.sep, 1)[1].split(os.sep, 1)[0].removesuffix(".py")
+    return "python"
+
+
+def _group_by_module(stats: Iterable, diff: bool) -> List[Dict]:
+    groups: Dict[str, Dict] = {}
+    for stat in stats:
+        module = module_of(stat.traceback[0].filename)
+        group = groups.setdefault(module, {"module": module, "size": 0, "count": 0})
+        group["size"] += stat.size_diff if diff else stat.size
+        group["count"] += stat.count_diff if diff else stat.count
+    key = (lambda g: abs(g["size"])) if diff else (lambda g: g["size"])
+    return sorted(groups.values(), key=key, reverse=True)
+
+
+def _line_entries(stats: Iterable, diff: bool) -> List[Dict]:
+    entries = []
+    for stat in stats:
+        frame = stat.traceback[0]
+        entry = {"site": f"{frame.filename}:{frame.lineno}", "module": module_of(frame.filename),
+                 "size": stat.size, "count": stat.count}
+        if diff:
+            entry.update(size_diff=stat.size_diff, count_diff=stat.count_diff)
+        entries.append(entry)
+    return entries
+
+
+class MemoryTracer:
+    def __init__(self, max_snapshots: int = MEMORY_MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+        self._taken_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        """Stop tracing. Snapshots already taken are kept."""
+        tracemalloc.stop()
+
+    def status(self) -> Dict:
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": self.tracing,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "snapshots": self.snapshots(),
+        }
+
+    def take_snapshot(self, name: str) -> Dict:
+        if not self.tracing:
+            raise RuntimeError("tracemalloc is not tracing")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        with self._lock:
+            self._snapshots.pop(name, None)
+            self._snapshots[name] = snapshot
+            self._taken_at[name] = time.time()
+            while len(self._snapshots) > self.max_snapshots:
+                dropped, _ = self._snapshots.popitem(last=False)
+                self._taken_at.pop(dropped, None)
+        return self._summary(name, snapshot)
+
+    def snapshots(self) -> List[Dict]:
+        with self._lock:
+            return [self._summary(name, snapshot) for name, snapshot in self._snapshots.items()]
+
+    def _summary(self, name: str, snapshot: tracemalloc.Snapshot) -> Dict:
+        return {
+            "name": name,
+            "taken_at": self._taken_at.get(name),
+            "traced_bytes": sum(trace.size for trace in snapshot.traces),
+        }
+
+    def _get(self, name: str) -> tracemalloc.Snapshot:
+        with self._lock:
+            snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            raise KeyError(name)
+        return snapshot
+
+    def top(self, name: str, limit: int = 20, group_by: str = "module") -> List[Dict]:
+        """Largest allocation sites of a snapshot, by ``module`` or by ``line``."""
+        stats = self._get(name).statistics("lineno")
+        if group_by == "module":
+            return _group_by_module(stats, diff=False)[:limit]
+        return _line_entries(stats[:limit], diff=False)
+
+    def diff(self, base: str, target: str, limit: int = 20, group_by: str = "module") -> List[Dict]:
+        """What grew or shrank from snapshot ``base`` to ``target``."""
+        stats = self._get(target).compare_to(self._get(base), "lineno")
+        if group_by == "module":
+            return _group_by_module(stats, diff=True)[:limit]
+        return _line_entries(stats[:limit], diff=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+            self._taken_at.clear()
+
+
+memory_tracer = MemoryTracer()
+
+
+# ---------------------------------------------------------------------
+# Store accounting
+# ---------------------------------------------------------------------
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """Bytes held by obj and everything it references that is not already counted."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def collection_stats(db) -> Dict[str, Dict[str, int]]:
+    """Object count and deep size in bytes of every collection on the store."""
+    seen: set = set()
+    return {
+        name: {"objects": len(collection), "bytes": deep_sizeof(collection, seen)}
+        for name, collection in vars(db).items()
+        if isinstance(collection, (list, dict))
+    }
+
+
+def _store_objects() -> Dict[tuple, float]:
+    return {(name,): len(collection) for name, collection in vars(get_db()).items()
+            if isinstance(collection, (list, dict))}
+
+
+STORE_OBJECTS = registry.gauge(
+    "store_objects", "Objects held per store collection.", ("collection",), collect=_store_objects,
+)
@@ -0,0 +1,349 @@
+# ============================================================
+# In-process metrics
+# ============================================================
+# Counters, gauges and log-linear ("HDR-style") latency histograms,
+# rendered in the Prometheus text exposition format.
+#
+# Metrics are recorded on the event loop and from executor lane and
+# background threads. Counters and histograms keep one dict per thread,
+# which only that thread writes, so recording takes no locks; /metrics
+# merges them. Request latency is one histogram observation: a
+# thread-local lookup, a dict lookup, a bisect and three increments.
+# ============================================================
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from anyio import to_thread
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+Labels = Tuple[str, ...]
+
+
+def log_linear_bounds(lowest: float, highest: float, sub_buckets: int = 4) -> List[float]:
+    """
+    Bucket upper bounds from lowest to highest: every power of two is split
+    into sub_buckets equal steps, so relative error stays under 1/sub_buckets.
+    """
+    bounds = []
+    exponent = math.floor(math.log2(lowest))
+    while not bounds or bounds[-1] < highest:
+        base = 2.0 ** exponent
+        bounds.extend(base * (1 + step / sub_buckets) for step in range(1, sub_buckets + 1))
+        exponent += 1
+    return [bound for bound in bounds if bound >= lowest]
+
+
+# 50µs .. ~64s with at most 25% relative error.
+LATENCY_BOUNDS = log_linear_bounds(50e-6, 60.0)
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _PerThread:
+    """
+    One dict per thread that records into a metric. Each thread only
+    writes its own, so updates need no lock; readers merge them.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def mine(self) -> Dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._shards.append(values)
+            return values
+
+    def all(self) -> List[Dict]:
+        """A copy of every thread's dict."""
+        with self._lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = _PerThread()
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        values = self._values.mine()
+        values[labels] = values.get(labels, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        merged: Dict[Labels, float] = {}
+        for shard in self._values.all():
+            for labels, value in shard.items():
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+    def value(self, labels: Labels = ()) -> float:
+        return self.values().get(labels, 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge:
+    """A value set directly, or read from ``collect`` at render time."""
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            collect: Optional[Callable[[], Dict[Labels, float]]] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) - amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterable[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self.collect is not None:
+            values.update(self.collect())
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class HistogramSeries:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)   # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            bounds: Sequence[float] = LATENCY_BOUNDS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.bounds = list(bounds)
+        self._series = _PerThread()
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        shard = self._series.mine()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = HistogramSeries(len(self.bounds))
+        series.counts[bisect_left(self.bounds, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def all_series(self) -> Dict[Labels, HistogramSeries]:
+        """Every thread's observations, merged per label set."""
+        merged: Dict[Labels, HistogramSeries] = {}
+        for shard in self._series.all():
+            for labels, series in shard.items():
+                total = merged.get(labels)
+                if total is None:
+                    total = merged[labels] = HistogramSeries(len(self.bounds))
+                total.counts = [a + b for a, b in zip(total.counts, series.counts)]
+                total.sum += series.sum
+                total.count += series.count
+        return merged
+
+    def series(self, labels: Labels = ()) -> Optional[HistogramSeries]:
+        return self.all_series().get(labels)
+
+    def percentile(self, pct: float, labels: Labels = ()) -> float:
+        """Upper bound of the bucket holding the pct-th percentile (0-100)."""
+        series = self.series(labels)
+        if series is None or not series.count:
+            return 0.0
+        rank = pct / 100 * series.count
+        seen = 0
+        for index, count in enumerate(series.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[index] if index < len(self.bounds) else math.inf
+        return math.inf
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in sorted(self.all_series().items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds, series.counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{bound:.6g}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            le = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {series.count}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {repr(series.sum)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {series.count}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            collect: Optional[Callable[[], Dict[Labels, float]]] = None,
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            bounds: Sequence[float] = LATENCY_BOUNDS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, bounds))
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------
+# Request metrics
+# ---------------------------------------------------------------------
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status"),
+)
+# Only changed by MetricsMiddleware, on the event loop thread.
+_requests_in_flight = 0
+
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.",
+    collect=lambda: {(): _requests_in_flight},
+)
+
+
+def _threadpool_usage() -> Dict[Labels, float]:
+    """Tokens of AnyIO's default thread limiter, which runs sync endpoints and dependencies."""
+    try:
+        limiter = to_thread.current_default_thread_limiter()
+    except RuntimeError:   # no running event loop
+        return {}
+    return {
+        ("in_use",): limiter.borrowed_tokens,
+        ("capacity",): limiter.total_tokens,
+        ("waiting",): limiter.statistics().tasks_waiting,
+    }
+
+
+THREADPOOL_THREADS = registry.gauge(
+    "threadpool_threads", "Worker threads of the request threadpool, and calls waiting for one.", ("state",), collect=_threadpool_usage,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+_STATUS_CLASSES = {code: f"{code // 100}xx" for code in range(100, 600)}
+
+
+def route_template(scope: Scope) -> str:
+    """The path template of the matched route (``/api/todos/{todo_id}``), not the raw path."""
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+def record_request(method: str, route: str, status_code: int, duration: float) -> None:
+    REQUEST_DURATION.observe(duration, (method, route, _STATUS_CLASSES.get(status_code, "5xx")))
+
+
+class _StatusRecorder:
+    """The ``send`` callable passed down the stack; keeps the response status."""
+    __slots__ = ("send", "status")
+
+    def __init__(self, send: Send):
+        self.send = send
+        self.status = 500
+
+    def __call__(self, message: Message) -> Awaitable[None]:
+        # Not a coroutine itself: hands back the awaitable of the real send,
+        # so wrapping costs no extra coroutine per message.
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        return self.send(message)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency and the in-flight gauge."""
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        global _requests_in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recorder = _StatusRecorder(send)
+        _requests_in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, recorder)
+        finally:
+            _requests_in_flight -= 1
+            record_request(scope["method"], route_template(scope), recorder.status, time.perf_counter() - start)
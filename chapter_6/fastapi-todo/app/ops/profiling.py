@@ -0,0 +1,300 @@
+# ============================================================
+# On-demand request profiling
+# ============================================================
+# With PROFILING_ENABLED=1, ProfilingMiddleware profiles a request when
+# an admin sends `X-Profile: 1`, or at random with PROFILE_SAMPLE_RATE.
+# A sampling thread records the Python stacks of the threads working on
+# that request while it runs: the event loop while the request's task
+# is the one running, and executor lane threads while they run its
+# calls. Other requests running at the same time are left out, and so
+# are sync dependencies, which run on AnyIO's default threadpool. The
+# result is kept in memory as collapsed stacks ("frame;frame;frame
+# count") and can be fetched as text or as an SVG flamegraph from the
+# admin endpoints.
+#
+# With PROFILING_ENABLED unset the middleware is not installed, so
+# requests pay nothing.
+# ============================================================
+import asyncio
+import html
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from fastapi import HTTPException, Request
+from fastapi.security import SecurityScopes
+from fastapi.security.utils import get_authorization_scheme_param
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.auth.dependencies import get_principal, get_token_claims, require_admin
+from app.core.lanes import profiled_threads
+from app.users.service import get_user_service
+
+
+# ---------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+# Fraction of requests profiled without the header.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.001"))
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "20"))
+PROFILE_HEADER = "x-profile"
+
+# Only stacks that pass through this package are kept; idle threadpool
+# workers and the event loop waiting for I/O are left out.
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ---------------------------------------------------------------------
+# Sampler
+# ---------------------------------------------------------------------
+
+def _collapse(frame) -> Optional[str]:
+    names = []
+    in_app = False
+    while frame is not None:
+        code = frame.f_code
+        in_app = in_app or code.co_filename.startswith(_APP_DIR)
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+        frame = frame.f_back
+    if not in_app:
+        return None
+    names.reverse()
+    return ";".join(names)
+
+
+class StackSampler:
+    """
+    Samples other threads' stacks each ``interval`` seconds until stopped.
+    With ``task`` set, the event loop's thread is only sampled while that
+    task runs, and other threads only while their ident is in ``threads``.
+    """
+    def __init__(
+            self,
+            interval: float = PROFILE_INTERVAL_SECONDS,
+            task: Optional[asyncio.Task] = None,
+            threads: Optional[Set[int]] = None,
+    ):
+        self.interval = interval
+        self.task = task
+        self.threads = threads
+        self.samples: Counter = Counter()
+        self._loop_thread = threading.get_ident() if task is not None else None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _wanted(self, ident: int) -> bool:
+        if self.task is None:
+            return True
+        if ident == self._loop_thread:
+            return asyncio.current_task(self.task.get_loop()) is self.task
+        return self.threads is not None and ident in self.threads
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own or not self._wanted(ident):
+                    continue
+                stack = _collapse(frame)
+                if stack is not None:
+                    self.samples[stack] += 1
+
+
+# ---------------------------------------------------------------------
+# Stored profiles
+# ---------------------------------------------------------------------
+
+@dataclass
+class Profile:
+    id: str
+    method: str
+    path: str
+    started_at: float
+    duration: float = 0.0
+    samples: Dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": sum(self.samples.values()),
+        }
+
+
+class ProfileStore:
+    def __init__(self, max_profiles: int = PROFILE_MAX_STORED):
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_store = ProfileStore()
+
+
+# ---------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------
+
+def render_collapsed(samples: Dict[str, int]) -> str:
+    """Brendan Gregg's collapsed stack format, as read by flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(samples.items()))
+
+
+FRAME_HEIGHT = 16
+SVG_WIDTH = 1200
+
+
+def _stack_tree(samples: Dict[str, int]) -> Dict:
+    root: Dict = {"children": OrderedDict(), "count": 0}
+    for stack, count in sorted(samples.items()):
+        node = root
+        node["count"] += count
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"children": OrderedDict(), "count": 0})
+            node["count"] += count
+    return root
+
+
+def _depth(node: Dict) -> int:
+    return 1 + max((_depth(child) for child in node["children"].values()), default=0)
+
+
+def render_flamegraph(samples: Dict[str, int], title: str = "") -> str:
+    """A self-contained SVG flamegraph: width is sample share, callees stack upwards."""
+    root = _stack_tree(samples)
+    total = root["count"] or 1
+    height = (_depth(root) + 1) * FRAME_HEIGHT + 20
+    rects: List[str] = []
+
+    def place(node: Dict, x: float, depth: int) -> None:
+        for name, child in node["children"].items():
+            width = child["count"] / total * SVG_WIDTH
+            if width >= 0.5:
+                y = height - (depth + 1) * FRAME_HEIGHT
+                label = html.escape(name)
+                hue = 20 + zlib.crc32(name.encode()) % 40
+                rects.append(
+                    f'<g><title>{label} ({child["count"]} samples, {child["count"] / total:.1%})</title>'
+                    f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{FRAME_HEIGHT - 1}" '
+                    f'fill="hsl({hue},85%,60%)"/>'
+                    f'<text x="{x + 3:.1f}" y="{y + FRAME_HEIGHT - 4}" font-size="11">'
+                    f'{html.escape(name[:int(width / 7)])}</text></g>'
+                )
+                place(child, x, depth + 1)
+            x += width
+
+    place(root, 0.0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" font-family="monospace">\n'
+        f'<text x="4" y="14" font-size="12">{html.escape(title)} ({root["count"]} samples)</text>\n'
+        + "\n".join(rects)
+        + "\n</svg>\n"
+    )
+
+
+# ---------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------
+
+def is_admin_request(scope: Scope) -> bool:
+    """
+    Whether the request passes ``require_admin``, resolved through the same
+    dependencies the admin routes use. The principal is left on the
+    request state for the route's own auth dependencies.
+    """
+    request = Request(scope)
+    scheme, token = get_authorization_scheme_param(request.headers.get("authorization"))
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        principal = get_principal(request, token, get_user_service())
+        require_admin(get_token_claims(SecurityScopes(scopes=["admin"]), principal), principal)
+    except HTTPException:
+        return False
+    return True
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware; profiles one request at a time."""
+    def __init__(
+            self,
+            app: ASGIApp,
+            sample_rate: float = PROFILE_SAMPLE_RATE,
+            store: ProfileStore = profile_store,
+            interval: float = PROFILE_INTERVAL_SECONDS,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.store = store
+        self.interval = interval
+        self._busy = threading.Lock()
+
+    def _wanted(self, scope: Scope) -> bool:
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        return Headers(scope=scope).get(PROFILE_HEADER) == "1" and is_admin_request(scope)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(uuid.uuid4().hex, scope["method"], scope["path"], time.time())
+        threads: Set[int] = set()
+        token = profiled_threads.set(threads)
+        sampler = StackSampler(self.interval, asyncio.current_task(), threads)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile.id)
+            await send(message)
+
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiled_threads.reset(token)
+            profile.samples = dict(sampler.stop())
+            profile.duration = time.perf_counter() - start
+            self._busy.release()
+            self.store.add(profile)
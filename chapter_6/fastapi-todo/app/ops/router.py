@@ -0,0 +1,141 @@
+# ============================================================
+# Operational endpoints
+# ============================================================
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from app.auth.dependencies import require_admin
+from app.core.db import get_db
+from app.ops.memory import collection_stats, memory_tracer
+from app.ops.runtime_monitor import runtime_monitor
+from app.ops.admission import admission_controller
+from app.ops.metrics import registry
+from app.ops.profiling import Profile, profile_store, render_collapsed, render_flamegraph
+from app.todos.tiering import cold_store_for
+
+router = APIRouter(tags=["Operations"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/health/live", include_in_schema=False)
+async def liveness():
+    """The process is up and serving."""
+    return {"status": "ok"}
+
+
+@router.get("/health/ready", include_in_schema=False)
+async def readiness():
+    """503 while overloaded, so a load balancer can send traffic to other workers."""
+    admission = admission_controller.status()
+    if admission["overloaded"]:
+        return JSONResponse({"status": "overloaded", **admission}, status_code=503)
+    return {"status": "ready", **admission}
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the in-process metrics."""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# ---- Profiles (see app.ops.profiling) ----
+
+def _get_profile(profile_id: str) -> Profile:
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+@router.get("/admin/profiles", dependencies=[Depends(require_admin)])
+def list_profiles():
+    """Stored request profiles, newest first."""
+    return [profile.summary() for profile in profile_store.list()]
+
+
+@router.get("/admin/profiles/{profile_id}/collapsed", dependencies=[Depends(require_admin)],
+            response_class=PlainTextResponse)
+def profile_collapsed(profile_id: str):
+    """The profile as collapsed stacks, for flamegraph.pl or speedscope."""
+    return PlainTextResponse(render_collapsed(_get_profile(profile_id).samples))
+
+
+@router.get("/admin/profiles/{profile_id}/flamegraph.svg", dependencies=[Depends(require_admin)])
+def profile_flamegraph(profile_id: str):
+    """The profile as an SVG flamegraph."""
+    profile = _get_profile(profile_id)
+    svg = render_flamegraph(profile.samples, f"{profile.method} {profile.path} {profile.duration * 1000:.1f}ms")
+    return Response(svg, media_type="image/svg+xml")
+
+
+# ---- Memory (see app.ops.memory) ----
+
+memory_router = APIRouter(prefix="/admin/memory", tags=["Operations"], dependencies=[Depends(require_admin)])
+
+GroupBy = Query("module", pattern="^(module|line)$")
+
+
+@memory_router.get("")
+def memory_status():
+    """tracemalloc state and the stored snapshots."""
+    return memory_tracer.status()
+
+
+@memory_router.post("/tracemalloc/start")
+def start_tracemalloc(frames: int = Query(1, ge=1, le=25)):
+    memory_tracer.start(frames)
+    return memory_tracer.status()
+
+
+@memory_router.post("/tracemalloc/stop")
+def stop_tracemalloc():
+    memory_tracer.stop()
+    return memory_tracer.status()
+
+
+@memory_router.post("/snapshots/{name}")
+def take_snapshot(name: str):
+    try:
+        return memory_tracer.take_snapshot(name)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+
+@memory_router.get("/snapshots/{name}/top")
+def snapshot_top(name: str, limit: int = Query(20, ge=1, le=500), group_by: str = GroupBy):
+    """Largest allocation sites in a snapshot."""
+    try:
+        return memory_tracer.top(name, limit, group_by)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+
+
+@memory_router.get("/diff")
+def snapshot_diff(base: str, target: str, limit: int = Query(20, ge=1, le=500), group_by: str = GroupBy):
+    """Allocation growth from snapshot ``base`` to snapshot ``target``."""
+    try:
+        return memory_tracer.diff(base, target, limit, group_by)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=f"Snapshot {exc.args[0]} not found")
+
+
+@memory_router.get("/store")
+def store_stats(db=Depends(get_db)):
+    """Objects and bytes held by each collection of the store, and its cold todo segments."""
+    stats = collection_stats(db)
+    cold = cold_store_for(db)
+    if cold is not None:
+        stats["todos_cold"] = cold.stats()
+    return stats
+
+
+router.include_router(memory_router)
+
+
+# ---- Runtime (see app.ops.runtime_monitor) ----
+
+@router.get("/admin/diagnostics/runtime", dependencies=[Depends(require_admin)])
+async def runtime_diagnostics():
+    """Event-loop lag, threadpool usage and password hashing queue."""
+    return runtime_monitor.snapshot()
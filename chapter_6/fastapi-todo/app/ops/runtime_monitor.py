@@ -0,0 +1,114 @@
+# ============================================================
+# Event-loop lag and threadpool monitoring
+# ============================================================
+# A background task sleeps for a fixed interval and measures how late
+# it wakes up: that delay is the event-loop lag every request waiting
+# on the loop also sees. On each tick it also samples AnyIO's default
+# thread limiter, which runs sync endpoints and dependencies, for busy
+# workers and tasks waiting for one.
+# ============================================================
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+from anyio import to_thread
+
+from app.core.hashing import password_hasher
+from app.core.lanes import lane_scheduler
+from app.ops.admission import admission_controller
+from app.ops.metrics import log_linear_bounds, registry
+
+# Seconds between samples; 0 disables the monitor.
+RUNTIME_MONITOR_INTERVAL_SECONDS = float(os.getenv("RUNTIME_MONITOR_INTERVAL_SECONDS", "0.5"))
+# Worker threads for sync endpoints and dependencies (AnyIO's default is 40).
+THREADPOOL_MAX_WORKERS = int(os.getenv("THREADPOOL_MAX_WORKERS", "40"))
+
+LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds", "How late the monitor's timer fired.", bounds=log_linear_bounds(1e-4, 10.0),
+)
+THREADPOOL_SATURATED = registry.counter(
+    "threadpool_saturated_samples_total", "Samples taken while every worker thread was busy.",
+)
+
+
+def threadpool_stats() -> Dict[str, int]:
+    stats = to_thread.current_default_thread_limiter().statistics()
+    return {"capacity": stats.total_tokens, "in_use": stats.borrowed_tokens, "waiting": stats.tasks_waiting}
+
+
+def configure_threadpool(max_workers: int = THREADPOOL_MAX_WORKERS) -> None:
+    """Set the capacity of the threadpool; call from inside the running event loop."""
+    to_thread.current_default_thread_limiter().total_tokens = max_workers
+
+
+class RuntimeMonitor:
+    def __init__(self, interval: float = RUNTIME_MONITOR_INTERVAL_SECONDS):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.peak_in_use = 0
+        self.peak_waiting = 0
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record_lag(max(0.0, time.perf_counter() - start - self.interval))
+            self.sample_threadpool()
+
+    def record_lag(self, lag: float) -> None:
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        LOOP_LAG.observe(lag)
+        admission_controller.observe_delay(lag)
+
+    def sample_threadpool(self) -> None:
+        stats = threadpool_stats()
+        self.samples += 1
+        self.peak_in_use = max(self.peak_in_use, stats["in_use"])
+        self.peak_waiting = max(self.peak_waiting, stats["waiting"])
+        if stats["in_use"] >= stats["capacity"]:
+            THREADPOOL_SATURATED.inc()
+
+    def snapshot(self) -> Dict:
+        """Current values plus peaks since startup; call from the event loop."""
+        return {
+            "event_loop_lag": {
+                "interval_seconds": self.interval,
+                "last_ms": round(self.last_lag * 1000, 3),
+                "max_ms": round(self.max_lag * 1000, 3),
+                "p99_ms": round(LOOP_LAG.percentile(99) * 1000, 3),
+            },
+            "threadpool": {
+                **threadpool_stats(),
+                "peak_in_use": self.peak_in_use,
+                "peak_waiting": self.peak_waiting,
+                "saturated_samples": THREADPOOL_SATURATED.value(),
+            },
+            "lanes": lane_scheduler.stats(),
+            "password_hashing": {
+                "workers": password_hasher.workers,
+                "pending": password_hasher.pending,
+                "max_pending": password_hasher.max_pending,
+            },
+            "samples": self.samples,
+        }
+
+
+runtime_monitor = RuntimeMonitor()
@@ -0,0 +1,163 @@
+# ============================================================
+# Per-request phase timing
+# ============================================================
+# ServerTimingMiddleware gives each request a PhaseTimer in a context
+# variable. Code in the auth, service and repository layers wraps its
+# work in `phase(name)` / `@timed(name)`; TimedRoute adds the time spent
+# validating and serializing the endpoint's return value. The phases are
+# sent in a `Server-Timing` header and recorded per route in the
+# http_request_phase_seconds histogram.
+#
+# Phases nest: "service" includes the "repo" time it caused.
+# Outside a request (no timer set) the wrappers only do one
+# ContextVar lookup.
+# ============================================================
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.ops.metrics import registry, route_template
+
+# Send the Server-Timing header; phase metrics are recorded either way.
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "1") == "1"
+
+PHASE_DURATION = registry.histogram(
+    "http_request_phase_seconds", "Time spent per request phase, by route template.", ("route", "phase"),
+)
+
+
+class PhaseTimer:
+    __slots__ = ("phases", "endpoint_done")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.endpoint_done: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def header(self, total: float) -> str:
+        entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.phases.items()]
+        entries.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(entries)
+
+
+_current_timer: ContextVar[Optional[PhaseTimer]] = ContextVar("phase_timer", default=None)
+
+
+def current_timer() -> Optional[PhaseTimer]:
+    return _current_timer.get()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to the current request's phase ``name``."""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable:
+    """Decorator form of ``phase`` for service and repository methods."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            timer = _current_timer.get()
+            if timer is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timer.add(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def _mark_endpoint_done(endpoint: Callable) -> Callable:
+    """Wrap an endpoint so the timer knows when serialization starts."""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timer = _current_timer.get()
+                if timer is not None:
+                    timer.endpoint_done = time.perf_counter()
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            timer = _current_timer.get()
+            if timer is not None:
+                timer.endpoint_done = time.perf_counter()
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that records the "serialize" phase: response model validation
+    and JSON encoding after the endpoint returns.
+    """
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _mark_endpoint_done(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], "Response"]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            response = await handler(request)
+            timer = _current_timer.get()
+            if timer is not None and timer.endpoint_done is not None:
+                timer.add("serialize", time.perf_counter() - timer.endpoint_done)
+            return response
+
+        return timed_handler
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware owning the request's PhaseTimer."""
+    def __init__(self, app: ASGIApp, send_header: bool = SERVER_TIMING_HEADER):
+        self.app = app
+        self.send_header = send_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = PhaseTimer()
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.send_header:
+                MutableHeaders(scope=message).append("Server-Timing", timer.header(time.perf_counter() - start))
+            await send(message)
+
+        token = _current_timer.set(timer)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_timer.reset(token)
+            route = route_template(scope)
+            for name, seconds in timer.phases.items():
+                PHASE_DURATION.observe(seconds, (route, name))
@@ -0,0 +1,132 @@
+# ============================================================
+# Materialized todo list responses
+# ============================================================
+# Keeps the encoded JSON of every todo and of every list page served.
+# A page request whose store has not changed returns the stored bytes;
+# after a change the page is rebuilt by joining the stored item bytes,
+# and only the todos that changed are encoded again.
+#
+# Pages that include todos from the cold tier (app.todos.tiering) are
+# rebuilt on every request instead of stored, and a spill drops the
+# stored bytes of the todos it moved, so cold todos never stay resident.
+#
+# TodoRepository reports every mutation. Code that changes todos behind
+# its back must call `invalidate()`.
+# ============================================================
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.ops.metrics import registry
+from app.todos.entities import TodoItemEntity
+from app.todos.schemas import TodoItem
+
+# List pages (offset, limit) kept per store; the least recently used is dropped first.
+TODO_PAGE_CACHE_MAX_PAGES = int(os.getenv("TODO_PAGE_CACHE_MAX_PAGES", "64"))
+
+TODO_PAGE_REQUESTS = registry.counter(
+    "todo_page_cache_requests_total", "Todo list pages served from stored bytes (hit) or rebuilt (miss).",
+    ("result",),
+)
+
+Page = Tuple[int, Optional[int]]
+
+
+def encode_todo(todo: TodoItemEntity) -> bytes:
+    """The todo as it appears in a TodoItem response body."""
+    return TodoItem.model_validate(todo, from_attributes=True).model_dump_json().encode()
+
+
+class TodoResponseCache:
+    def __init__(self, max_pages: int = TODO_PAGE_CACHE_MAX_PAGES):
+        self.max_pages = max_pages
+        self.version = 0
+        # Keyed by object identity: ids can repeat after a delete. The
+        # entity is kept alongside so its identity is not reused.
+        self._items: Dict[int, Tuple[TodoItemEntity, bytes]] = {}
+        self._pages: "OrderedDict[Page, Tuple[int, int, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def changed(self, todo: TodoItemEntity) -> None:
+        """``todo`` was created, updated or deleted; only it is encoded again."""
+        with self._lock:
+            self._items.pop(id(todo), None)
+            self.version += 1
+
+    def spilled(self, todos: Iterable[TodoItemEntity]) -> None:
+        """``todos`` moved to the cold tier; forget their bytes and every stored page."""
+        with self._lock:
+            for todo in todos:
+                self._items.pop(id(todo), None)
+            self._pages.clear()
+            self.version += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._pages.clear()
+            self.version += 1
+
+    def _item(self, todo: TodoItemEntity) -> bytes:
+        cached = self._items.get(id(todo))
+        if cached is None:
+            cached = self._items[id(todo)] = (todo, encode_todo(todo))
+        return cached[1]
+
+    def page(self, todos: List[TodoItemEntity], offset: int = 0, limit: Optional[int] = None, cold=None) -> bytes:
+        """
+        JSON array of ``todos[offset:offset + limit]``. With a ``cold`` tier
+        (app.todos.tiering), its todos are merged in by id; their stored
+        bytes are used as they are, and the page is not kept.
+        """
+        key = (offset, limit)
+        total = len(todos) + (cold.count() if cold is not None else 0)
+        with self._lock:
+            cached = self._pages.get(key)
+            # The length check catches appends and deletes that bypassed the repository.
+            if cached is not None and cached[0] == self.version and cached[1] == total:
+                self._pages.move_to_end(key)
+                TODO_PAGE_REQUESTS.inc(("hit",))
+                return cached[2]
+            TODO_PAGE_REQUESTS.inc(("miss",))
+            version = self.version
+        end = None if limit is None else offset + limit
+        # Cold segments are read without holding the lock.
+        selected = todos[offset:end] if cold is None else cold.merge(todos, offset, end)
+        with self._lock:
+            items = [item if isinstance(item, bytes) else self._item(item) for item in selected]
+            body = b"[" + b",".join(items) + b"]"
+            # Not kept if it holds cold bytes or the store changed while it was built.
+            if version == self.version and not any(isinstance(item, bytes) for item in selected):
+                self._pages[key] = (self.version, total, body)
+                self._pages.move_to_end(key)
+                while len(self._pages) > self.max_pages:
+                    self._pages.popitem(last=False)
+            if len(self._items) > len(todos):
+                live = {id(todo) for todo in todos}
+                self._items = {ident: item for ident, item in self._items.items() if ident in live}
+            return body
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "pages": len(self._pages),
+                "bytes": sum(len(body) for _, body in self._items.values())
+                + sum(len(body) for _, _, body in self._pages.values()),
+            }
+
+
+_caches: "weakref.WeakKeyDictionary[object, TodoResponseCache]" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def response_cache_for(store: object) -> TodoResponseCache:
+    """The response cache of one store (a DB or a TodoEventStore), created on first use."""
+    with _caches_lock:
+        cache = _caches.get(store)
+        if cache is None:
+            cache = _caches[store] = TodoResponseCache()
+        return cache
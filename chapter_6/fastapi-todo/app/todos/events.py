@@ -0,0 +1,475 @@
+# ============================================================
+# Event-sourced todo store
+# ============================================================
+# With TODO_BACKEND=events, todo commands append immutable events to a
+# log instead of changing rows in place. Projections fold the events,
+# one at a time as they are appended, into read models:
+#
+#   current      todos by id, which the repository reads from
+#   by-status    open and completed todo ids
+#   by-owner     todo ids per creating user
+#   counts       totals, per status and per owner
+#   history      the events of each todo, for auditing
+#
+# Every projection only depends on the log, so any of them can be
+# rebuilt by replaying it (see app.todos.replay). With
+# TODO_EVENT_LOG_PATH set the log is also written to that file as JSON
+# lines and replayed on start. Each append is fsynced before the command
+# returns; with TODO_EVENT_LOG_FSYNC=0 it is only flushed to the OS, and
+# events from the last moments before a machine crash can be lost. The
+# file is fsynced and closed on shutdown either way. A last line torn by
+# a crash is cut off when the file is opened.
+#
+# Several worker processes may share the file: commands run under an
+# exclusive flock on it, after reading the events other workers appended,
+# and reads pick those up as soon as the file grows.
+# ============================================================
+import fcntl
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+from typing import BinaryIO, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.ops.metrics import registry
+from app.todos.cache import response_cache_for
+from app.todos.entities import TodoItemEntity
+
+TODO_BACKEND = os.getenv("TODO_BACKEND", "memory")
+TODO_EVENT_LOG_PATH = os.getenv("TODO_EVENT_LOG_PATH")
+TODO_EVENT_LOG_FSYNC = os.getenv("TODO_EVENT_LOG_FSYNC", "1") == "1"
+
+TODO_CREATED = "todo_created"
+TODO_UPDATED = "todo_updated"
+TODO_DELETED = "todo_deleted"
+
+TODO_EVENTS = registry.counter("todo_events_total", "Events appended to the todo event log.", ("type",))
+
+
+@dataclass(frozen=True)
+class TodoEvent:
+    seq: int
+    type: str
+    todo_id: int
+    data: Dict = field(default_factory=dict)
+    actor: Optional[str] = None
+    at: float = 0.0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line: str) -> "TodoEvent":
+        return cls(**json.loads(line))
+
+
+def _complete_lines(f: BinaryIO, offset: int) -> Iterator[Tuple[int, bytes]]:
+    """
+    ``(offset, line)`` for the lines of ``f`` from byte ``offset`` on. A
+    last line without its newline was torn by a crash during its append
+    and is left out.
+    """
+    f.seek(offset)
+    for line in f:
+        if not line.endswith(b"\n"):
+            return
+        yield offset, line
+        offset += len(line)
+
+
+def _decode(line: bytes, path: str, offset: int) -> TodoEvent:
+    try:
+        return TodoEvent.from_json(line)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"{path}: corrupt event at byte {offset}: {exc}") from None
+
+
+def read_log_file(path: str) -> Iterator[TodoEvent]:
+    """The events in a log file; ValueError for a corrupt line other than a torn last one."""
+    with open(path, "rb") as f:
+        for offset, line in _complete_lines(f, 0):
+            if line.strip():
+                yield _decode(line, path, offset)
+
+
+class _FileLock:
+    """Re-entrant flock on an EventLog's file; the log catches up when it is first taken."""
+    __slots__ = ("log", "depth")
+
+    def __init__(self, log: "EventLog"):
+        self.log = log
+        self.depth = 0
+
+    def __enter__(self) -> None:
+        if not self.depth:
+            fcntl.flock(self.log._file.fileno(), fcntl.LOCK_EX)
+            try:
+                self.log._catch_up()
+            except BaseException:
+                fcntl.flock(self.log._file.fileno(), fcntl.LOCK_UN)
+                raise
+        self.depth += 1
+
+    def __exit__(self, *exc_info) -> None:
+        self.depth -= 1
+        if not self.depth:
+            fcntl.flock(self.log._file.fileno(), fcntl.LOCK_UN)
+
+
+_NO_LOCK = nullcontext()
+
+
+class EventLog:
+    """
+    Append-only sequence of events, optionally mirrored to a JSON lines
+    file. Callers serialize threads (TodoEventStore.lock); ``locked``
+    serializes processes sharing the file.
+    """
+    def __init__(self, path: Optional[str] = None, fsync: bool = TODO_EVENT_LOG_FSYNC):
+        self.path = path
+        self.fsync = fsync
+        self.events: List[TodoEvent] = []
+        self._file: Optional[BinaryIO] = None
+        self._offset = 0      # bytes of the file read into ``events``
+        self._lock: ContextManager = _NO_LOCK
+        if path is not None:
+            self._file = open(path, "a+b")
+            self._lock = _FileLock(self)
+            with self.locked():
+                pass
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def locked(self) -> ContextManager:
+        """
+        Hold the file's exclusive lock, after reading the events other
+        processes appended. Re-entrant; a no-op without a file.
+        """
+        return self._lock
+
+    def _catch_up(self) -> None:
+        if not self.changed():
+            return
+        for offset, line in _complete_lines(self._file, self._offset):
+            if line.strip():
+                event = _decode(line, self.path, offset)
+                if event.seq != len(self.events) + 1:
+                    raise ValueError(f"{self.path}: event at byte {offset} has seq {event.seq}, "
+                                     f"expected {len(self.events) + 1}")
+                self.events.append(event)
+            self._offset = offset + len(line)
+        if self._file.seek(0, os.SEEK_END) > self._offset:
+            # A torn last line: while the lock is held no other process is appending.
+            self._file.truncate(self._offset)
+
+    def changed(self) -> bool:
+        """Whether another process appended to the file since it was last read."""
+        return self._file is not None and os.fstat(self._file.fileno()).st_size != self._offset
+
+    def append(self, type: str, todo_id: int, data: Dict, actor: Optional[str] = None) -> TodoEvent:
+        with self.locked():
+            event = TodoEvent(len(self.events) + 1, type, todo_id, dict(data), actor, time.time())
+            if self._file is not None:
+                line = (event.to_json() + "\n").encode()
+                self._file.write(line)
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+                self._offset += len(line)
+            self.events.append(event)
+        return event
+
+    def read(self, after: int = 0) -> List[TodoEvent]:
+        """Events with a sequence number above ``after``."""
+        return self.events[after:]
+
+    def get(self, seq: int) -> TodoEvent:
+        return self.events[seq - 1]
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._lock = _NO_LOCK
+
+
+# ---------------------------------------------------------------------
+# Projections
+# ---------------------------------------------------------------------
+
+class Projection(ABC):
+    """
+    A read model folded from events. Subclasses implement ``on_<type>``
+    handlers for the event types they care about and ``view``.
+    """
+    name = ""
+
+    def __init__(self):
+        self.position = 0
+        self._handlers = {
+            event_type: getattr(self, f"on_{event_type}")
+            for event_type in (TODO_CREATED, TODO_UPDATED, TODO_DELETED)
+            if hasattr(self, f"on_{event_type}")
+        }
+        self.reset()
+
+    def reset(self) -> None:
+        self.position = 0
+
+    def apply(self, event: TodoEvent) -> None:
+        handler = self._handlers.get(event.type)
+        if handler is not None:
+            handler(event)
+        self.position = event.seq
+
+    @abstractmethod
+    def view(self):
+        """The read model, as JSON-serializable data."""
+
+
+class CurrentTodos(Projection):
+    name = "current"
+
+    def reset(self) -> None:
+        super().reset()
+        self.todos: Dict[int, TodoItemEntity] = {}
+        self.last_id = 0
+
+    def on_todo_created(self, event: TodoEvent) -> None:
+        self.todos[event.todo_id] = TodoItemEntity(event.todo_id, event.data["title"], event.data["completed"])
+        self.last_id = max(self.last_id, event.todo_id)
+
+    def on_todo_updated(self, event: TodoEvent) -> None:
+        # In place, so the response cache's per-todo bytes stay keyed to it.
+        todo = self.todos[event.todo_id]
+        todo.title = event.data["title"]
+        todo.completed = event.data["completed"]
+
+    def on_todo_deleted(self, event: TodoEvent) -> None:
+        self.todos.pop(event.todo_id, None)
+
+    def view(self) -> List[Dict]:
+        return [asdict(todo) for todo in self.todos.values()]
+
+
+class TodosByStatus(Projection):
+    name = "by-status"
+
+    def reset(self) -> None:
+        super().reset()
+        # Dicts as insertion-ordered sets of ids.
+        self.open: Dict[int, None] = {}
+        self.completed: Dict[int, None] = {}
+
+    def _place(self, todo_id: int, completed: bool) -> None:
+        self.open.pop(todo_id, None)
+        self.completed.pop(todo_id, None)
+        (self.completed if completed else self.open)[todo_id] = None
+
+    def on_todo_created(self, event: TodoEvent) -> None:
+        self._place(event.todo_id, event.data["completed"])
+
+    def on_todo_updated(self, event: TodoEvent) -> None:
+        self._place(event.todo_id, event.data["completed"])
+
+    def on_todo_deleted(self, event: TodoEvent) -> None:
+        self.open.pop(event.todo_id, None)
+        self.completed.pop(event.todo_id, None)
+
+    def view(self) -> Dict[str, List[int]]:
+        return {"open": list(self.open), "completed": list(self.completed)}
+
+
+class TodosByOwner(Projection):
+    name = "by-owner"
+
+    def reset(self) -> None:
+        super().reset()
+        self.owners: Dict[Optional[str], Dict[int, None]] = {}
+        self.owner_of: Dict[int, Optional[str]] = {}
+
+    def on_todo_created(self, event: TodoEvent) -> None:
+        self.owner_of[event.todo_id] = event.actor
+        self.owners.setdefault(event.actor, {})[event.todo_id] = None
+
+    def on_todo_deleted(self, event: TodoEvent) -> None:
+        owner = self.owner_of.pop(event.todo_id, None)
+        todos = self.owners.get(owner)
+        if todos is not None:
+            todos.pop(event.todo_id, None)
+            if not todos:
+                del self.owners[owner]
+
+    def view(self) -> Dict[str, List[int]]:
+        return {owner or "": list(todos) for owner, todos in self.owners.items()}
+
+
+class TodoCounts(Projection):
+    name = "counts"
+
+    def reset(self) -> None:
+        super().reset()
+        self.total = 0
+        self.completed = 0
+        self.by_owner: Dict[Optional[str], int] = {}
+        self._state: Dict[int, tuple] = {}   # id -> (owner, completed)
+
+    def on_todo_created(self, event: TodoEvent) -> None:
+        completed = bool(event.data["completed"])
+        self._state[event.todo_id] = (event.actor, completed)
+        self.total += 1
+        self.completed += completed
+        self.by_owner[event.actor] = self.by_owner.get(event.actor, 0) + 1
+
+    def on_todo_updated(self, event: TodoEvent) -> None:
+        owner, was_completed = self._state[event.todo_id]
+        completed = bool(event.data["completed"])
+        self._state[event.todo_id] = (owner, completed)
+        self.completed += completed - was_completed
+
+    def on_todo_deleted(self, event: TodoEvent) -> None:
+        state = self._state.pop(event.todo_id, None)
+        if state is None:
+            return
+        owner, completed = state
+        self.total -= 1
+        self.completed -= completed
+        self.by_owner[owner] -= 1
+        if not self.by_owner[owner]:
+            del self.by_owner[owner]
+
+    def view(self) -> Dict:
+        return {
+            "total": self.total,
+            "open": self.total - self.completed,
+            "completed": self.completed,
+            "by_owner": {owner or "": count for owner, count in self.by_owner.items()},
+        }
+
+
+class TodoHistory(Projection):
+    """The sequence numbers of each todo's events; the events stay in the log."""
+    name = "history"
+
+    def reset(self) -> None:
+        super().reset()
+        self.seqs: Dict[int, array] = {}
+
+    def apply(self, event: TodoEvent) -> None:
+        seqs = self.seqs.get(event.todo_id)
+        if seqs is None:
+            seqs = self.seqs[event.todo_id] = array("q")
+        seqs.append(event.seq)
+        self.position = event.seq
+
+    def view(self) -> Dict[int, int]:
+        return {todo_id: len(seqs) for todo_id, seqs in self.seqs.items()}
+
+
+def default_projections() -> List[Projection]:
+    return [CurrentTodos(), TodosByStatus(), TodosByOwner(), TodoCounts(), TodoHistory()]
+
+
+def replay(events: Iterable[TodoEvent], projections: List[Projection]) -> int:
+    """Rebuild ``projections`` from scratch from ``events``; returns the number applied."""
+    for projection in projections:
+        projection.reset()
+    count = 0
+    applies = [projection.apply for projection in projections]
+    for event in events:
+        for apply in applies:
+            apply(event)
+        count += 1
+    return count
+
+
+# ---------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------
+
+class TodoEventStore:
+    """The event log plus the projections kept up to date from it."""
+    def __init__(self, log: EventLog, projections: Optional[List[Projection]] = None):
+        self.log = log
+        self.projections: Dict[str, Projection] = {
+            projection.name: projection for projection in projections or default_projections()
+        }
+        self.current: CurrentTodos = self.projections["current"]
+        self.lock = threading.RLock()
+        replay(log.events, list(self.projections.values()))
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """
+        Held by commands while they read the current state and append.
+        Also serializes them with other processes sharing the log file,
+        whose events are applied first.
+        """
+        with self.lock, self.log.locked():
+            self._apply_others()
+            yield
+
+    def refresh(self) -> None:
+        """Apply the events other processes appended to the log file."""
+        if self.log.changed():
+            with self.writing():
+                pass
+
+    def _apply(self, event: TodoEvent) -> None:
+        for projection in self.projections.values():
+            projection.apply(event)
+
+    def _apply_others(self) -> None:
+        # Called with the file lock held; anything past the projections came from another process.
+        if len(self.log) > self.current.position:
+            for event in self.log.read(self.current.position):
+                self._apply(event)
+            response_cache_for(self).invalidate()
+
+    def append(self, type: str, todo_id: int, data: Dict, actor: Optional[str] = None) -> TodoEvent:
+        with self.lock, self.log.locked():
+            self._apply_others()
+            event = self.log.append(type, todo_id, data, actor)
+            self._apply(event)
+        TODO_EVENTS.inc((type,))
+        return event
+
+    def view(self, name: str):
+        """The named projection's read model; KeyError for unknown names."""
+        self.refresh()
+        return self.projections[name].view()
+
+    def history(self, todo_id: int) -> List[Dict]:
+        self.refresh()
+        with self.lock:
+            seqs = list(self.projections["history"].seqs.get(todo_id, ()))
+        return [asdict(self.log.get(seq)) for seq in seqs]
+
+
+_event_store: Optional[TodoEventStore] = None
+_event_store_lock = threading.Lock()
+
+
+def get_event_store() -> TodoEventStore:
+    """The process's event store, loaded from TODO_EVENT_LOG_PATH on first use."""
+    global _event_store
+    with _event_store_lock:
+        if _event_store is None:
+            _event_store = TodoEventStore(EventLog(TODO_EVENT_LOG_PATH))
+        return _event_store
+
+
+def close_event_store() -> None:
+    """Fsync and close the event log file, if the store was loaded."""
+    global _event_store
+    with _event_store_lock:
+        if _event_store is not None:
+            _event_store.log.close()
+            _event_store = None
@@ -0,0 +1,36 @@
+# ============================================================
+# Todo event replay tool
+# ============================================================
+# Rebuilds the todo projections from an event log file written with
+# TODO_EVENT_LOG_PATH, reports how long it took and prints the
+# requested views as JSON.
+#
+#   poetry run python -m app.todos.replay events.jsonl --view counts --view by-status
+# ============================================================
+import argparse
+import json
+import sys
+import time
+
+from app.todos.events import default_projections, read_log_file, replay
+
+
+def main() -> int:
+    projections = {projection.name: projection for projection in default_projections()}
+    parser = argparse.ArgumentParser(description="Rebuild todo views from an event log")
+    parser.add_argument("path")
+    parser.add_argument("--view", action="append", default=[], choices=sorted(projections))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = replay(read_log_file(args.path), list(projections.values()))
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else 0
+    print(f"replayed {count} events in {elapsed * 1000:.1f}ms ({rate:.0f} events/s)", file=sys.stderr)
+    for name in args.view:
+        print(json.dumps({name: projections[name].view()}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,63 +1,188 @@
 # ============================================================
 # DB access layer
 # ============================================================
-from typing import Protocol, Iterable
+import bisect
+from contextlib import nullcontext
+from typing import Iterable, Optional, Protocol
 
 from app.todos.entities import TodoItemEntity
 from app.core.db import DB
+from app.ops.deadlines import within_deadline
+from app.ops.timing import timed
+from app.todos.cache import response_cache_for
+from app.todos.events import TODO_CREATED, TODO_DELETED, TODO_UPDATED, TodoEventStore
+from app.todos.tiering import cold_store_for, decode_todo
 
 
 class TodoRepositoryProtocol(Protocol):
+    """
+    Implementations check the request deadline (app.ops.deadlines) when
+    each method is called. ``actor`` is the user issuing a command; only
+    the event-sourced backend records it.
+    """
     def list_todos(self) -> Iterable[TodoItemEntity]: ...
 
-    def create_todo(self, title: str, completed: bool) -> TodoItemEntity: ...
+    def list_todos_json(self, offset: int = 0, limit: Optional[int] = None) -> bytes: ...
+
+    def create_todo(self, title: str, completed: bool, actor: Optional[str] = None) -> TodoItemEntity: ...
 
     def get_todo(self, id: int) -> TodoItemEntity: ...
 
-    def update_todo(self, id: int, title: str, completed: bool) -> TodoItemEntity: ...
+    def update_todo(self, id: int, title: str, completed: bool, actor: Optional[str] = None) -> TodoItemEntity: ...
 
-    def delete_todo(self, id: int) -> TodoItemEntity: ...
+    def delete_todo(self, id: int, actor: Optional[str] = None) -> TodoItemEntity: ...
 
 
 class TodoRepository(TodoRepositoryProtocol):
     def __init__(self, db: DB):
         self.db = db
-
+        self.cache = response_cache_for(db)
+        # Cold tier of the store (app.todos.tiering), if tiering is enabled.
+        self.cold = cold_store_for(db)
+        self._write_lock = self.cold.lock if self.cold is not None else nullcontext()
+
+    def _next_id(self) -> int:
+        if self.cold is None:
+            return len(self.db.todos) + 1
+        # Ids must stay unique across both tiers.
+        last_hot = self.db.todos[-1].id if self.db.todos else 0
+        return max(last_hot, self.cold.max_id) + 1
+
+    @within_deadline("repo")
+    @timed("repo")
     def list_todos(self):
         """Return all todos."""
-        return self.db.todos
-
-    def create_todo(self, title: str, completed: bool) -> TodoItemEntity:
+        if self.cold is None:
+            return self.db.todos
+        return [item if isinstance(item, TodoItemEntity) else decode_todo(item)
+                for item in self.cold.merge(self.db.todos)]
+
+    @within_deadline("repo")
+    @timed("repo")
+    def list_todos_json(self, offset: int = 0, limit: Optional[int] = None) -> bytes:
+        """Return a page of todos as an encoded JSON array."""
+        return self.cache.page(self.db.todos, offset, limit, self.cold)
+
+    @within_deadline("repo")
+    @timed("repo")
+    def create_todo(self, title: str, completed: bool, actor: Optional[str] = None) -> TodoItemEntity:
         """Adds a new TodoItem to the database."""
-        new_todo = TodoItemEntity(
-            id=len(self.db.todos) + 1,
-            title=title,
-            completed=completed
-        )
-        self.db.todos.append(new_todo)
-        return new_todo
-
+        with self._write_lock:
+            new_todo = TodoItemEntity(
+                id=self._next_id(),
+                title=title,
+                completed=completed
+            )
+            self.db.todos.append(new_todo)
+            self.cache.changed(new_todo)
+            return new_todo
+
+    @within_deadline("repo")
+    @timed("repo")
     def get_todo(self, id: int):
         """Retrieve a Todo item by ID."""
         found = next((todo for todo in self.db.todos if todo.id == id), None)
+        if found is None and self.cold is not None:
+            # Under the write lock, so an update moving the todo back to the
+            # hot list after the scan above cannot hide it from both tiers.
+            with self._write_lock:
+                found = self.cold.get(id) or next((todo for todo in self.db.todos if todo.id == id), None)
         return found
 
-    def update_todo(self, id: int, title: str, completed: bool) -> TodoItemEntity:
+    @within_deadline("repo")
+    @timed("repo")
+    def update_todo(self, id: int, title: str, completed: bool, actor: Optional[str] = None) -> TodoItemEntity:
         """Update a Todo item by ID."""
-        for todo in self.db.todos:
-            if todo.id == id:
-                todo.title = title
-                todo.completed = completed
-                return todo
-
-        return None
-
-    def delete_todo(self, id: int) -> TodoItemEntity:
+        with self._write_lock:
+            todo = next((todo for todo in self.db.todos if todo.id == id), None)
+            if todo is None and self.cold is not None:
+                # Updated todos are hot again.
+                todo = self.cold.remove(id)
+                if todo is not None:
+                    bisect.insort(self.db.todos, todo, key=lambda item: item.id)
+            if todo is None:
+                return None
+            todo.title = title
+            todo.completed = completed
+            self.cache.changed(todo)
+            return todo
+
+    @within_deadline("repo")
+    @timed("repo")
+    def delete_todo(self, id: int, actor: Optional[str] = None) -> TodoItemEntity:
         """Deletes an item by ID."""
-        for i, todo in enumerate(self.db.todos):
-            if todo.id == id:
-                deleted_todo = self.db.todos.pop(i)
+        with self._write_lock:
+            for i, todo in enumerate(self.db.todos):
+                if todo.id == id:
+                    deleted_todo = self.db.todos.pop(i)
+                    self.cache.changed(deleted_todo)
+                    return deleted_todo
+            if self.cold is not None:
+                deleted_todo = self.cold.remove(id)
+                if deleted_todo is not None:
+                    self.cache.changed(deleted_todo)
                 return deleted_todo
 
         return None
 
+
+class EventSourcedTodoRepository(TodoRepositoryProtocol):
+    """
+    Commands append events to a TodoEventStore; reads come from its
+    "current" projection.
+    """
+    def __init__(self, store: TodoEventStore):
+        self.store = store
+        self.cache = response_cache_for(store)
+
+    @within_deadline("repo")
+    @timed("repo")
+    def list_todos(self):
+        """Return all todos."""
+        self.store.refresh()
+        return list(self.store.current.todos.values())
+
+    @within_deadline("repo")
+    @timed("repo")
+    def list_todos_json(self, offset: int = 0, limit: Optional[int] = None) -> bytes:
+        """Return a page of todos as an encoded JSON array."""
+        self.store.refresh()
+        return self.cache.page(list(self.store.current.todos.values()), offset, limit)
+
+    @within_deadline("repo")
+    @timed("repo")
+    def create_todo(self, title: str, completed: bool, actor: Optional[str] = None) -> TodoItemEntity:
+        with self.store.writing():
+            todo_id = self.store.current.last_id + 1
+            self.store.append(TODO_CREATED, todo_id, {"title": title, "completed": completed}, actor)
+            todo = self.store.current.todos[todo_id]
+        self.cache.changed(todo)
+        return todo
+
+    @within_deadline("repo")
+    @timed("repo")
+    def get_todo(self, id: int):
+        self.store.refresh()
+        return self.store.current.todos.get(id)
+
+    @within_deadline("repo")
+    @timed("repo")
+    def update_todo(self, id: int, title: str, completed: bool, actor: Optional[str] = None) -> TodoItemEntity:
+        with self.store.writing():
+            todo = self.store.current.todos.get(id)
+            if todo is None:
+                return None
+            self.store.append(TODO_UPDATED, id, {"title": title, "completed": completed}, actor)
+        self.cache.changed(todo)
+        return todo
+
+    @within_deadline("repo")
+    @timed("repo")
+    def delete_todo(self, id: int, actor: Optional[str] = None) -> TodoItemEntity:
+        with self.store.writing():
+            todo = self.store.current.todos.get(id)
+            if todo is None:
+                return None
+            self.store.append(TODO_DELETED, id, {}, actor)
+        self.cache.changed(todo)
+        return todo
@@ -1,48 +1,70 @@
 # ============================================================
 # FastAPI routes
 # ============================================================
-from typing import List
+from typing import Dict, List, Optional
 
 # ---- Third-party packages ----
-from fastapi import Depends, APIRouter, HTTPException
+from fastapi import Depends, APIRouter, HTTPException, Query, Response, Security
 
 from app.core.db import get_db
-from app.auth.dependencies import get_current_user
-from app.todos.repository import TodoRepository
+from app.auth.dependencies import get_token_claims
+from app.todos import events as todo_events
+from app.todos.events import TodoEventStore, get_event_store
+from app.todos.repository import EventSourcedTodoRepository, TodoRepository
 from app.todos.service import TodoService
 from app.todos.schemas import TodoItem, TodoCreate
+from app.core.coalescing import CoalescingRoute
+from app.core.lanes import lane_route
 
 # ---- Constants ----
 from app.constants import TODO_NOT_FOUND
 
 # ---- Router -----
-router = APIRouter(prefix="/api/todos", tags=["ToDos"])
+router = APIRouter(prefix="/api/todos", tags=["ToDos"], route_class=lane_route("crud", base=CoalescingRoute))
 
 
 def get_todo_service(db=Depends(get_db)) -> TodoService:
+    if todo_events.TODO_BACKEND == "events":
+        return TodoService(EventSourcedTodoRepository(get_event_store()))
     repo = TodoRepository(db)
     return TodoService(repo)
 
 
+def get_todo_event_store() -> TodoEventStore:
+    if todo_events.TODO_BACKEND != "events":
+        raise HTTPException(status_code=404, detail="Todo events are only kept with TODO_BACKEND=events")
+    return get_event_store()
 
-@router.get("", dependencies=[Depends(get_current_user)], response_model=List[TodoItem])
+
+@router.get("", dependencies=[Security(get_token_claims, scopes=["read"])], response_model=List[TodoItem])
 def list_todos(
+        offset: int = Query(0, ge=0),
+        limit: Optional[int] = Query(None, ge=1),
         todo_service: TodoService = Depends(get_todo_service),
-) -> List[TodoItem]:
-    """List todos, but only if API key is valid."""
-    return todo_service.list_todos()
+) -> Response:
+    """List todos, but only if API key is valid. The body comes pre-encoded from the response cache."""
+    return Response(todo_service.list_todos_json(offset, limit), media_type="application/json")
+
 
+@router.get("/views/{name}", dependencies=[Security(get_token_claims, scopes=["read"])])
+def todo_view(name: str, store: TodoEventStore = Depends(get_todo_event_store)):
+    """A read model projected from the todo events: by-status, by-owner or counts."""
+    if name not in ("by-status", "by-owner", "counts"):
+        raise HTTPException(status_code=404, detail="Unknown view")
+    return store.view(name)
 
-@router.post("", dependencies=[Depends(get_current_user)])
+
+@router.post("")
 def create_todo(
         todo: TodoCreate,
+        claims: Dict = Security(get_token_claims, scopes=["write"]),
         todo_service: TodoService = Depends(get_todo_service),
 ) -> TodoItem:
     """Create a new Todo item."""
-    return todo_service.create_todo(title=todo.title, completed=False)
+    return todo_service.create_todo(title=todo.title, completed=False, actor=claims["sub"])
 
 
-@router.get("/{todo_id}", dependencies=[Depends(get_current_user)])
+@router.get("/{todo_id}", dependencies=[Security(get_token_claims, scopes=["read"])])
 def get_todo(todo_id: int, todo_service: TodoService = Depends(get_todo_service)) -> TodoItem:
     """Retrieve a Todo item by ID."""
     todo = todo_service.get_todo(todo_id)
@@ -50,22 +72,35 @@ def get_todo(todo_id: int, todo_service: TodoService = Depends(get_todo_service)
         raise HTTPException(status_code=404, detail=TODO_NOT_FOUND)
     return todo
 
-@router.put("/{todo_id}", dependencies=[Depends(get_current_user)])
+@router.get("/{todo_id}/history", dependencies=[Security(get_token_claims, scopes=["read"])])
+def todo_history(todo_id: int, store: TodoEventStore = Depends(get_todo_event_store)):
+    """Every event recorded for a Todo item, oldest first."""
+    history = store.history(todo_id)
+    if not history:
+        raise HTTPException(status_code=404, detail=TODO_NOT_FOUND)
+    return history
+
+@router.put("/{todo_id}")
 def update_todo(
         todo_id: int,
         updated_todo: TodoCreate,
+        claims: Dict = Security(get_token_claims, scopes=["write"]),
         todo_service: TodoService = Depends(get_todo_service)
 ) -> TodoItem:
     """Update a Todo item by ID."""
-    todo = todo_service.update_todo(todo_id, updated_todo.title, updated_todo.completed)
+    todo = todo_service.update_todo(todo_id, updated_todo.title, updated_todo.completed, actor=claims["sub"])
     if todo is None:
         raise HTTPException(status_code=404, detail=TODO_NOT_FOUND)
     return todo
 
-@router.delete("/{todo_id}", dependencies=[Depends(get_current_user)], response_model=TodoItem)
-def delete_todo(todo_id: int, todo_service: TodoService = Depends(get_todo_service)):
+@router.delete("/{todo_id}", response_model=TodoItem)
+def delete_todo(
+        todo_id: int,
+        claims: Dict = Security(get_token_claims, scopes=["write"]),
+        todo_service: TodoService = Depends(get_todo_service),
+):
     """Delete a Todo item by ID."""
-    todo = todo_service.delete_todo(todo_id)
+    todo = todo_service.delete_todo(todo_id, actor=claims["sub"])
     if todo is None:
         raise HTTPException(status_code=404, detail=TODO_NOT_FOUND)
     return todo
\ No newline at end of file
@@ -1,27 +1,44 @@
 # ============================================================
 # Business logic
 # ============================================================
-from typing import Iterable
+from typing import Iterable, Optional
 
 from app.todos.entities import TodoItemEntity
 from app.todos.repository import TodoRepositoryProtocol
+from app.ops.deadlines import within_deadline
+from app.ops.timing import timed
 
 class TodoService:
     def __init__(self, repository: TodoRepositoryProtocol):
         self.repository = repository
 
+    @within_deadline("service")
+    @timed("service")
     def list_todos(self) -> Iterable[TodoItemEntity]:
         return self.repository.list_todos()
 
-    def create_todo(self, title: str, completed: bool) -> TodoItemEntity:
-        return self.repository.create_todo(title=title, completed=completed)
+    @within_deadline("service")
+    @timed("service")
+    def list_todos_json(self, offset: int = 0, limit: Optional[int] = None) -> bytes:
+        return self.repository.list_todos_json(offset, limit)
 
+    @within_deadline("service")
+    @timed("service")
+    def create_todo(self, title: str, completed: bool, actor: Optional[str] = None) -> TodoItemEntity:
+        return self.repository.create_todo(title=title, completed=completed, actor=actor)
+
+    @within_deadline("service")
+    @timed("service")
     def get_todo(self, todo_id: int):
         return self.repository.get_todo(todo_id)
 
-    def update_todo(self, todo_id: int, title: str, completed: bool) -> TodoItemEntity:
-        return self.repository.update_todo(todo_id, title=title, completed=completed)
+    @within_deadline("service")
+    @timed("service")
+    def update_todo(self, todo_id: int, title: str, completed: bool, actor: Optional[str] = None) -> TodoItemEntity:
+        return self.repository.update_todo(todo_id, title=title, completed=completed, actor=actor)
 
-    def delete_todo(self, todo_id: int) -> TodoItemEntity:
-        return self.repository.delete_todo(todo_id)
+    @within_deadline("service")
+    @timed("service")
+    def delete_todo(self, todo_id: int, actor: Optional[str] = None) -> TodoItemEntity:
+        return self.repository.delete_todo(todo_id, actor=actor)
 
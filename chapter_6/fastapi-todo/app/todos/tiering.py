@@ -0,0 +1,376 @@
+# ============================================================
+# Hot/cold todo tiering
+# ============================================================
+# With TODO_COLD_DIR set, a background thread moves completed todos, and
+# the oldest open ones beyond TODO_HOT_MAX_ITEMS, out of `DB.todos` into
+# zlib-compressed segment files. Each segment holds the encoded JSON of
+# up to TODO_SEGMENT_MAX_ITEMS todos; in memory only its sorted ids are
+# kept (8 bytes per todo), so resident memory follows the hot set.
+#
+# Segment files are read, compressed and written outside the store lock;
+# only the segment list and the hot list are swapped under it.
+#
+# TodoRepository reads cold todos transparently. Updating a cold todo
+# moves it back to the hot list; deleting one leaves a tombstone, and the
+# next spill rewrites segments that are mostly tombstones.
+#
+# The store itself lives in memory, so each process writes its segments
+# to its own subdirectory of TODO_COLD_DIR and deletes it on shutdown.
+# ============================================================
+import bisect
+import copy
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import zlib
+from array import array
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from app.core.db import DB
+from app.ops.metrics import registry
+from app.todos.cache import encode_todo, response_cache_for
+from app.todos.entities import TodoItemEntity
+
+TODO_COLD_DIR = os.getenv("TODO_COLD_DIR")
+TODO_HOT_MAX_ITEMS = int(os.getenv("TODO_HOT_MAX_ITEMS", "10000"))
+TODO_SEGMENT_MAX_ITEMS = int(os.getenv("TODO_SEGMENT_MAX_ITEMS", "1000"))
+TODO_TIERING_INTERVAL_SECONDS = float(os.getenv("TODO_TIERING_INTERVAL_SECONDS", "30"))
+# Decompressed segments kept for reads of single cold todos.
+TODO_COLD_CACHE_SEGMENTS = int(os.getenv("TODO_COLD_CACHE_SEGMENTS", "4"))
+
+TODO_SPILLED = registry.counter("todo_spilled_total", "Todos moved from memory to cold segments.")
+TODO_COLD_READS = registry.counter(
+    "todo_cold_reads_total", "Cold segment reads, by whether the segment was already decompressed.", ("result",),
+)
+
+
+class Segment:
+    __slots__ = ("number", "path", "ids", "deleted")
+
+    def __init__(self, number: int, path: str, ids: array):
+        self.number = number
+        self.path = path
+        self.ids = ids            # sorted
+        self.deleted: Set[int] = set()
+
+    @property
+    def live(self) -> int:
+        return len(self.ids) - len(self.deleted)
+
+    def position(self, todo_id: int) -> Optional[int]:
+        if not self.ids or todo_id < self.ids[0] or todo_id > self.ids[-1] or todo_id in self.deleted:
+            return None
+        index = bisect.bisect_left(self.ids, todo_id)
+        return index if index < len(self.ids) and self.ids[index] == todo_id else None
+
+
+def decode_todo(row: bytes) -> TodoItemEntity:
+    return TodoItemEntity(**json.loads(row))
+
+
+class ColdTodoStore:
+    """Compressed, id-indexed segments of todos that left the hot list."""
+    def __init__(self, directory: str, segment_max_items: int = TODO_SEGMENT_MAX_ITEMS,
+                 cache_segments: int = TODO_COLD_CACHE_SEGMENTS):
+        self.segment_max_items = segment_max_items
+        self.cache_segments = cache_segments
+        self.segments: List[Segment] = []
+        self.max_id = 0
+        # Held by the repository for writes and by the spiller, so a todo
+        # is never changed while it is being moved.
+        self.lock = threading.RLock()
+        # Serializes spills, which run partly outside ``lock``.
+        self.spill_lock = threading.Lock()
+        self._next_number = 1
+        self._decompressed: "OrderedDict[int, List[bytes]]" = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        # Workers sharing ``directory`` each number their own segments.
+        self.directory = tempfile.mkdtemp(prefix=f"worker-{os.getpid()}-", dir=directory)
+
+    def count(self) -> int:
+        return sum(segment.live for segment in self.segments)
+
+    def close(self) -> None:
+        """Drop every cold todo and delete this store's segment directory."""
+        with self.lock:
+            self.segments = []
+            self._decompressed.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    # ---- writes ----
+
+    def write_segments(self, todos: List[TodoItemEntity]) -> List[Segment]:
+        """
+        Encode ``todos`` into new segment files. The segments are not part
+        of the store until passed to ``add_segments``; the lock is not held.
+        """
+        todos = sorted(todos, key=lambda todo: todo.id)
+        return [self._write_file([(todo.id, encode_todo(todo)) for todo in todos[start:start + self.segment_max_items]])
+                for start in range(0, len(todos), self.segment_max_items)]
+
+    def add_segments(self, segments: List[Segment], deleted: Set[int] = frozenset()) -> None:
+        """Add segments from ``write_segments``, with the ids in ``deleted`` already tombstoned."""
+        with self.lock:
+            for segment in segments:
+                segment.deleted.update(todo_id for todo_id in segment.ids if todo_id in deleted)
+                self.max_id = max(self.max_id, segment.ids[-1])
+                if segment.live:
+                    self.segments.append(segment)
+                else:
+                    os.remove(segment.path)
+
+    def write(self, todos: List[TodoItemEntity]) -> None:
+        """Store ``todos`` in new segments."""
+        self.add_segments(self.write_segments(todos))
+
+    def _write_file(self, rows: List[Tuple[int, bytes]]) -> Segment:
+        with self.lock:
+            number = self._next_number
+            self._next_number += 1
+        path = os.path.join(self.directory, f"segment-{number:06d}.z")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(b"\n".join(row for _, row in rows)))
+        os.replace(tmp_path, path)
+        return Segment(number, path, array("q", (todo_id for todo_id, _ in rows)))
+
+    def remove(self, todo_id: int) -> Optional[TodoItemEntity]:
+        """Tombstone a cold todo and return it, or None if it is not here."""
+        with self.lock:
+            found = self._find(todo_id)
+            if found is None:
+                return None
+            segment, position = found
+            todo = decode_todo(self._rows(segment)[position])
+            segment.deleted.add(todo_id)
+            return todo
+
+    def compact(self) -> int:
+        """
+        Rewrite the segments that are more than half tombstones and return
+        how many were rewritten. Like a spill, the files are read and
+        written outside the lock and only swapped in under it; todos
+        deleted meanwhile are tombstoned in the new segment. Called with
+        ``spill_lock`` held.
+        """
+        with self.lock:
+            sparse = [(segment, frozenset(segment.deleted), self._decompressed.get(segment.number))
+                      for segment in self.segments if segment.live * 2 < len(segment.ids)]
+        for segment, deleted, rows in sparse:
+            rows = rows or self._read(segment)
+            live = [(todo_id, rows[i]) for i, todo_id in enumerate(segment.ids) if todo_id not in deleted]
+            replacement = self._write_file(live) if live else None
+            with self.lock:
+                self.segments.remove(segment)
+                self._decompressed.pop(segment.number, None)
+                if replacement is not None:
+                    self.add_segments([replacement], deleted=segment.deleted)
+            # Readers holding a snapshot with the old segment retry on FileNotFoundError.
+            os.remove(segment.path)
+        return len(sparse)
+
+    # ---- reads ----
+
+    def _find(self, todo_id: int) -> Optional[Tuple[Segment, int]]:
+        for segment in self.segments:
+            position = segment.position(todo_id)
+            if position is not None:
+                return segment, position
+        return None
+
+    @staticmethod
+    def _read(segment: Segment) -> List[bytes]:
+        with open(segment.path, "rb") as f:
+            return zlib.decompress(f.read()).split(b"\n")
+
+    def _rows(self, segment: Segment) -> List[bytes]:
+        rows = self._decompressed.get(segment.number)
+        if rows is not None:
+            self._decompressed.move_to_end(segment.number)
+            TODO_COLD_READS.inc(("hit",))
+            return rows
+        TODO_COLD_READS.inc(("miss",))
+        rows = self._decompressed[segment.number] = self._read(segment)
+        while len(self._decompressed) > self.cache_segments:
+            self._decompressed.popitem(last=False)
+        return rows
+
+    def get_json(self, todo_id: int) -> Optional[bytes]:
+        with self.lock:
+            found = self._find(todo_id)
+            return None if found is None else self._rows(found[0])[found[1]]
+
+    def get(self, todo_id: int) -> Optional[TodoItemEntity]:
+        row = self.get_json(todo_id)
+        return None if row is None else decode_todo(row)
+
+    def _snapshot(self) -> List[Tuple[Segment, frozenset, Optional[List[bytes]]]]:
+        # Called with the lock held; the segment files are read after it is released.
+        return [(segment, frozenset(segment.deleted), self._decompressed.get(segment.number))
+                for segment in self.segments]
+
+    @staticmethod
+    def _merge_ids(hot: List[TodoItemEntity], snapshot) -> Iterator:
+        """
+        Hot entities and ``(id, segment index, position)`` of cold rows, in
+        id order. A todo in both tiers is yielded once, from ``hot``.
+        """
+        cold = sorted((todo_id, number, position)
+                      for number, (segment, deleted, _) in enumerate(snapshot)
+                      for position, todo_id in enumerate(segment.ids) if todo_id not in deleted)
+        last_id = None
+        hot_index = cold_index = 0
+        while hot_index < len(hot) or cold_index < len(cold):
+            if cold_index >= len(cold) or (hot_index < len(hot) and hot[hot_index].id <= cold[cold_index][0]):
+                item, item_id = hot[hot_index], hot[hot_index].id
+                hot_index += 1
+            else:
+                item = cold[cold_index]
+                item_id = item[0]
+                cold_index += 1
+            if item_id != last_id:
+                last_id = item_id
+                yield item
+
+    def _merged(self, hot: List[TodoItemEntity], start: int, stop: Optional[int]) -> List[Tuple[int, object]]:
+        while True:
+            with self.lock:
+                hot_copy = list(hot)
+                snapshot = self._snapshot()
+            selected = list(islice(self._merge_ids(hot_copy, snapshot), start, stop))
+            # Only the segments holding selected rows are read. A full scan
+            # does not go through _rows, so it won't flush the segments kept
+            # for single reads.
+            read: Dict[int, List[bytes]] = {}
+            segment = None
+            try:
+                merged = []
+                for item in selected:
+                    if isinstance(item, TodoItemEntity):
+                        merged.append((item.id, item))
+                        continue
+                    todo_id, number, position = item
+                    data = read.get(number)
+                    if data is None:
+                        segment, _, data = snapshot[number]
+                        data = read[number] = data or self._read(segment)
+                    merged.append((todo_id, data[position]))
+                return merged
+            except FileNotFoundError:
+                with self.lock:
+                    if segment in self.segments:
+                        # Not compacted away: the file itself is gone. Retrying
+                        # would fail the same way, so give its todos up.
+                        logging.error(f"Cold todo segment {segment.path} is missing, dropping {segment.live} todos")
+                        self.segments.remove(segment)
+                        self._decompressed.pop(segment.number, None)
+                # Take a new snapshot without the segment.
+                continue
+
+    def rows(self) -> List[Tuple[int, bytes]]:
+        """Every live cold todo as ``(id, encoded JSON)``, ordered by id."""
+        return self._merged([], 0, None)
+
+    def merge(self, hot: List[TodoItemEntity], start: int = 0, stop: Optional[int] = None) -> List:
+        """
+        Hot entities and cold rows' encoded bytes, in id order, sliced to
+        ``[start:stop]``. ``hot`` is the live hot list; it is copied together
+        with the segment list, so a todo moving between tiers is seen in at
+        least one of them. A todo seen in both is returned once, from ``hot``.
+        """
+        return [item for _, item in self._merged(hot, start, stop)]
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "segments": len(self.segments),
+                "todos": self.count(),
+                "bytes_on_disk": sum(os.path.getsize(segment.path) for segment in self.segments),
+                "index_bytes": sum(segment.ids.itemsize * len(segment.ids) for segment in self.segments),
+            }
+
+
+_cold_stores: "weakref.WeakKeyDictionary[DB, ColdTodoStore]" = weakref.WeakKeyDictionary()
+
+
+def cold_store_for(db: DB) -> Optional[ColdTodoStore]:
+    """The cold tier of a store, or None when tiering is not enabled for it."""
+    return _cold_stores.get(db)
+
+
+def enable_tiering(db: DB, directory: str) -> ColdTodoStore:
+    cold = _cold_stores.get(db)
+    if cold is None:
+        cold = _cold_stores[db] = ColdTodoStore(directory)
+    return cold
+
+
+def spill(db: DB, cold: ColdTodoStore, hot_max_items: int = TODO_HOT_MAX_ITEMS) -> int:
+    """
+    Compact segments that are mostly tombstones, then move completed
+    todos, and the oldest open ones over the cap, to cold segments. The
+    todos are copied under the lock and encoded, compressed and written
+    without it; a todo updated or deleted in the meantime stays as it is
+    and is tombstoned in its new segment.
+    """
+    with cold.spill_lock:
+        cold.compact()
+        with cold.lock:
+            hot = db.todos
+            open_todos = [todo for todo in hot if not todo.completed]
+            overflow = max(0, len(open_todos) - hot_max_items)
+            moving = [todo for todo in hot if todo.completed] + open_todos[:overflow]
+            copies = [copy.copy(todo) for todo in moving]
+        if not moving:
+            return 0
+        segments = cold.write_segments(copies)
+        with cold.lock:
+            still_hot = {id(todo) for todo in db.todos}
+            moved = {id(todo) for todo, written in zip(moving, copies) if id(todo) in still_hot and todo == written}
+            cold.add_segments(segments, deleted={todo.id for todo in moving if id(todo) not in moved})
+            # The rows are in a segment before they leave the hot list, so a
+            # concurrent reader always finds them in one of the two.
+            db.todos[:] = [todo for todo in db.todos if id(todo) not in moved]
+        response_cache_for(db).spilled(todo for todo in moving if id(todo) in moved)
+    TODO_SPILLED.inc(amount=len(moved))
+    return len(moved)
+
+
+class TodoTiering:
+    """Runs ``spill`` for one store every ``interval`` seconds on a daemon thread."""
+    def __init__(self, interval: float = TODO_TIERING_INTERVAL_SECONDS, hot_max_items: int = TODO_HOT_MAX_ITEMS):
+        self.interval = interval
+        self.hot_max_items = hot_max_items
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._db: Optional[DB] = None
+
+    def start(self, db: DB, directory: Optional[str] = TODO_COLD_DIR) -> None:
+        if directory is None or self._thread is not None:
+            return
+        self._db = db
+        cold = enable_tiering(db, directory)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(db, cold), name="todo-tiering", daemon=True)
+        self._thread.start()
+
+    def _run(self, db: DB, cold: ColdTodoStore) -> None:
+        while not self._stop.wait(self.interval):
+            spill(db, cold, self.hot_max_items)
+
+    def shutdown(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            _cold_stores.pop(self._db).close()
+            self._db = None
+
+
+todo_tiering = TodoTiering()
@@ -0,0 +1,96 @@
+# ============================================================
+# User provisioning CLI
+# ============================================================
+# Creates users from a CSV file with columns username, password, name
+# and (optionally) email by posting them to a running server's
+# POST /api/users/bulk, which hashes the passwords on its hashing
+# process pool. The users live in that server's store, so this needs
+# an admin: a bearer token in API_TOKEN, or an admin username whose
+# password is read from API_PASSWORD or prompted for.
+#
+#   API_TOKEN=... poetry run python -m app.users.cli provision users.csv
+#   poetry run python -m app.users.cli provision users.csv --url http://host:8000 --admin admin
+# ============================================================
+import argparse
+import csv
+import getpass
+import json
+import os
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional
+
+DEFAULT_URL = "http://127.0.0.1:8000"
+# Rows per request; the endpoint accepts up to 10000.
+DEFAULT_ROWS_PER_REQUEST = 1000
+REQUEST_TIMEOUT_SECONDS = 300
+
+
+def read_rows(path: str) -> List[dict]:
+    with open(path, newline="") as f:
+        return [{key: value for key, value in row.items() if value != ""} for row in csv.DictReader(f)]
+
+
+def _post(url: str, body: bytes, headers: Dict[str, str]) -> Dict:
+    request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT_SECONDS) as response:
+        return json.load(response)
+
+
+def login(base_url: str, username: str, password: str) -> str:
+    form = urllib.parse.urlencode({"username": username, "password": password}).encode()
+    token = _post(f"{base_url}/auth/token", form, {"Content-Type": "application/x-www-form-urlencoded"})
+    return token["access_token"]
+
+
+def provision(base_url: str, token: str, rows: List[dict], scopes: List[str], rows_per_request: int) -> int:
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    created = failed = 0
+    for start in range(0, len(rows), rows_per_request):
+        body = json.dumps({"users": rows[start:start + rows_per_request], "scopes": scopes}).encode()
+        response = _post(f"{base_url}/api/users/bulk", body, headers)
+        created += response["created"]
+        failed += response["failed"]
+        for result in response["results"]:
+            if result["status"] != "created":
+                print(f"row {start + result['index']} ({result['username']}): {result['error']}", file=sys.stderr)
+    print(f"created {created}, failed {failed}")
+    return 1 if failed else 0
+
+
+def resolve_token(base_url: str, admin: Optional[str]) -> str:
+    token = os.getenv("API_TOKEN")
+    if token:
+        return token
+    if not admin:
+        raise SystemExit("set API_TOKEN or pass --admin")
+    password = os.getenv("API_PASSWORD") or getpass.getpass(f"password for {admin}: ")
+    return login(base_url, admin, password)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Manage users")
+    commands = parser.add_subparsers(dest="command", required=True)
+    provision_parser = commands.add_parser("provision", help="create users from a CSV file")
+    provision_parser.add_argument("path")
+    provision_parser.add_argument("--url", default=os.getenv("API_URL", DEFAULT_URL))
+    provision_parser.add_argument("--admin", help="admin username to log in as when API_TOKEN is not set")
+    provision_parser.add_argument("--scopes", default="read,write")
+    provision_parser.add_argument("--rows-per-request", type=int, default=DEFAULT_ROWS_PER_REQUEST)
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+    try:
+        token = resolve_token(base_url, args.admin)
+        return provision(base_url, token, read_rows(args.path), args.scopes.split(","), args.rows_per_request)
+    except urllib.error.HTTPError as exc:
+        print(f"{exc.url}: {exc.code} {exc.read().decode(errors='replace')}", file=sys.stderr)
+    except urllib.error.URLError as exc:
+        print(f"{base_url}: {exc.reason}", file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,15 @@
 # ============================================================
 # DB access layer
 # ============================================================
+import threading
 from typing import Protocol, Optional, Iterable, List
 from app.users.entities import UserEntity
 from app.core.db import DB
+from app.ops.deadlines import within_deadline
 
 
 class UserRepositoryProtocol(Protocol):
+    """Implementations check the request deadline (app.ops.deadlines) when each method is called."""
     def create_user(
             self,
             username: str,
@@ -16,15 +19,25 @@ class UserRepositoryProtocol(Protocol):
             scopes: List[str],
     ) -> UserEntity: ...
 
+    def create_users(self, users: Iterable[dict]) -> List[Optional[UserEntity]]: ...
+
     def get_user(self, username: str) -> Optional[UserEntity]: ...
 
+    def update_password_hash(self, username: str, hashed_password: str) -> Optional[UserEntity]: ...
+
     def list_users(self) -> Iterable[UserEntity]: ...
 
 
+# Inserts pick the next id and append under this lock; batch inserts
+# also check for taken usernames under it.
+_create_lock = threading.Lock()
+
+
 class UserRepository(UserRepositoryProtocol):
     def __init__(self, db: DB):
         self.db = db
 
+    @within_deadline("repo")
     def create_user(
             self,
             username: str,
@@ -34,24 +47,65 @@ class UserRepository(UserRepositoryProtocol):
             scopes: List[str],
     ) -> UserEntity:
         """Adds a new user to the database."""
-        user = UserEntity(
-            id=len(self.db.users) + 1,
-            username=username,
-            hashed_password=hashed_password,
-            name=name,
-            email=email,
-            scopes=scopes,
-            role="user",
-            disabled=False
-        )
-        self.db.users.append(user)
-        return user
+        with _create_lock:
+            user = UserEntity(
+                id=len(self.db.users) + 1,
+                username=username,
+                hashed_password=hashed_password,
+                name=name,
+                email=email,
+                scopes=scopes,
+                role="user",
+                disabled=False
+            )
+            self.db.users.append(user)
+            return user
+
+    @within_deadline("repo")
+    def create_users(self, users: Iterable[dict]) -> List[Optional[UserEntity]]:
+        """
+        Adds a batch of users. Each dict has the create_user arguments.
+        Returns the created entity per dict, or None where the username
+        was taken by the time of the insert.
+        """
+        with _create_lock:
+            taken = {user.username for user in self.db.users}
+            next_id = len(self.db.users) + 1
+            created: List[Optional[UserEntity]] = []
+            for user in users:
+                if user["username"] in taken:
+                    created.append(None)
+                    continue
+                taken.add(user["username"])
+                created.append(UserEntity(
+                    id=next_id,
+                    username=user["username"],
+                    hashed_password=user["hashed_password"],
+                    name=user["name"],
+                    email=user["email"],
+                    scopes=user["scopes"],
+                    role="user",
+                    disabled=False,
+                ))
+                next_id += 1
+            self.db.users.extend(entity for entity in created if entity is not None)
+        return created
 
+    @within_deadline("repo")
     def get_user(self, username: str) -> Optional[UserEntity]:
         """Returns the user found in the users list."""
         found_user = next((user for user in self.db.users if user.username == username), None)
         return found_user
 
+    @within_deadline("repo")
+    def update_password_hash(self, username: str, hashed_password: str) -> Optional[UserEntity]:
+        """Replaces the stored password hash of a user."""
+        user = self.get_user(username)
+        if user is not None:
+            user.hashed_password = hashed_password
+        return user
+
+    @within_deadline("repo")
     def list_users(self) -> Iterable[UserEntity]:
         """Returns the users list."""
         return self.db.users
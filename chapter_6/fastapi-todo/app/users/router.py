@@ -7,11 +7,13 @@ from typing import List
 from fastapi import Depends, APIRouter
 
 from app.users.service import UserService, get_user_service
-from app.users.schemas import User
-from app.auth.dependencies import require_admin
+from app.users.schemas import User, BulkProvisionRequest, BulkProvisionResponse
+from app.auth.dependencies import require_admin, get_current_user_entity
+from app.users.entities import UserEntity
+from app.core.lanes import lane_route
 
 # ---- Router -----
-router = APIRouter(prefix="/api/users", tags=["Users"])
+router = APIRouter(prefix="/api/users", tags=["Users"], route_class=lane_route("crud"))
 
 
 @router.get("", response_model=List[User], dependencies=[Depends(require_admin)])
@@ -20,4 +22,21 @@ def list_users(
 ):
     """List all users from the database."""
     fetched_users = user_service.list_users()
-    return fetched_users
\ No newline at end of file
+    return fetched_users
+
+
+@router.get("/me", response_model=User)
+def read_current_user(user: UserEntity = Depends(get_current_user_entity)):
+    """Return the authenticated user's own record."""
+    return user
+
+
+@router.post("/bulk", response_model=BulkProvisionResponse, dependencies=[Depends(require_admin)])
+async def bulk_provision_users(
+        provision_request: BulkProvisionRequest,
+        user_service: UserService = Depends(get_user_service),
+):
+    """Create many users in one call; the result lists the outcome of every row."""
+    results = await user_service.provision_users(provision_request.users, scopes=provision_request.scopes)
+    created = sum(1 for result in results if result["status"] == "created")
+    return {"created": created, "failed": len(results) - created, "results": results}
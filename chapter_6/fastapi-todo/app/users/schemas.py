@@ -2,7 +2,7 @@
 # Pydantic request/response models
 # ============================================================
 from typing import List, Optional
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 class User(BaseModel):
     id: int
@@ -22,4 +22,21 @@ class UserRegisterSchema(BaseModel):
 class UserRegOutSchema(BaseModel):
     username: str
     name: str
-    role: str
\ No newline at end of file
+    role: str
+
+class BulkProvisionRequest(BaseModel):
+    """Rows are validated one by one so a bad row does not fail the batch."""
+    users: List[dict] = Field(..., max_length=10000)
+    scopes: List[str] = ["read", "write"]
+
+class ProvisionRowResult(BaseModel):
+    index: int
+    username: Optional[str] = None
+    status: str
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkProvisionResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[ProvisionRowResult]
@@ -1,18 +1,28 @@
 # ============================================================
 # Business logic
 # ============================================================
-from typing import Optional, Iterable, List
+from typing import Dict, Optional, Iterable, List
+
+from fastapi import HTTPException
+from pydantic import ValidationError
 
 from app.core.db import get_db
 from app.users.entities import UserEntity
 from app.users.repository import UserRepository
 from app.core.security import get_password_hash
+from app.core.hashing import PasswordHasher, password_hasher
+from app.users.schemas import UserRegisterSchema
+from app.ops.deadlines import check_deadline, within_deadline
+
+PROVISION_BATCH_SIZE = 500
 
 
 class UserService:
-    def __init__(self, repo: UserRepository):
+    def __init__(self, repo: UserRepository, hasher: PasswordHasher = password_hasher):
         self.repo = repo
+        self.hasher = hasher
 
+    @within_deadline("service")
     def register_user(
             self,
             username: str,
@@ -31,16 +41,104 @@ class UserService:
             scopes=scopes,
         )
 
+    @within_deadline("service")
+    async def register_user_async(
+            self,
+            username: str,
+            password: str,
+            name: Optional[str] = "",
+            email: Optional[str] = "",
+            scopes: Optional[List[str]] = None,
+    ) -> UserEntity:
+        """Same as register_user, but hashes on the password hashing process pool."""
+        hashed_password = await self.hasher.hash(password)
+        return self.repo.create_user(
+            username=username,
+            hashed_password=hashed_password,
+            name=name,
+            email=email,
+            scopes=scopes,
+        )
+
+    @within_deadline("service")
+    async def provision_users(
+            self,
+            rows: List[dict],
+            scopes: Optional[List[str]] = None,
+            batch_size: int = PROVISION_BATCH_SIZE,
+    ) -> List[Dict]:
+        """
+        Create many users at once. Rows are validated individually, usernames
+        already taken (in the store or earlier in rows) are reported as
+        errors, and the remaining passwords are hashed in parallel on the
+        hashing pool and inserted batch by batch. Usernames are checked
+        again on insert, since other registrations can take one while the
+        hashes are computed. Returns one result per row; rows left when the
+        request deadline passes or the hashing queue fills up after the
+        first batch are reported as errors.
+        """
+        results: List[Dict] = []
+        pending: List[tuple] = []
+        taken = {user.username for user in self.repo.list_users()}
+        for index, row in enumerate(rows):
+            username = row.get("username") if isinstance(row, dict) else None
+            try:
+                user = UserRegisterSchema.model_validate(row)
+            except ValidationError as exc:
+                error = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+                results.append({"index": index, "username": username, "status": "error", "error": error})
+                continue
+            if user.username in taken:
+                results.append({"index": index, "username": user.username, "status": "error",
+                                "error": "User already exists"})
+                continue
+            taken.add(user.username)
+            result = {"index": index, "username": user.username, "status": "created"}
+            results.append(result)
+            pending.append((result, user))
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            try:
+                check_deadline("service")
+                hashes = await self.hasher.hash_many([user.password for _, user in batch])
+                created = self.repo.create_users(
+                    {
+                        "username": user.username,
+                        "hashed_password": hashed_password,
+                        "name": user.name,
+                        "email": user.email,
+                        "scopes": list(scopes or []),
+                    }
+                    for (_, user), hashed_password in zip(batch, hashes)
+                )
+            except HTTPException as exc:
+                # The deadline passed (504) or the hashing queue is full (503).
+                if not start or exc.status_code not in (503, 504):
+                    raise   # nothing was inserted: the request fails as a whole
+                # Earlier batches are committed; report the rest per row.
+                for result, _ in pending[start:]:
+                    result.update(status="error", error=exc.detail)
+                break
+            for (result, _), entity in zip(batch, created):
+                if entity is None:
+                    result.update(status="error", error="User already exists")
+                else:
+                    result["id"] = entity.id
+        return results
+
+    @within_deadline("service")
     def get_user(self, username: str) -> Optional[UserEntity]:
         return self.repo.get_user(username)
 
+    @within_deadline("service")
+    def update_password_hash(self, username: str, hashed_password: str) -> Optional[UserEntity]:
+        return self.repo.update_password_hash(username, hashed_password)
+
+    @within_deadline("service")
     def list_users(self) -> Iterable[UserEntity]:
         return self.repo.list_users()
 
 
-# Create a repo singleton
-db = get_db()
-user_repo = UserRepository(db)
-
 def get_user_service() -> UserService:
-    return UserService(user_repo)
+    return UserService(UserRepository(get_db()))
@@ -0,0 +1,99 @@
+# ============================================================
+# Access logging overhead
+# ============================================================
+# Serves --requests requests through the request logger and reports
+# request latency with a blocking file handler on the root logger (what
+# basicConfig gives) vs. the queue handler and batching writer thread.
+# --sink-delay-ms adds a delay to every write, like a slow disk or a
+# blocked stdout pipe.
+#
+#   poetry run python -m benchmarks.access_logging --requests 2000
+# ============================================================
+import argparse
+import asyncio
+import logging
+import queue
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.logging_config import LOG_FORMAT, BatchRotatingFileHandler, DroppingQueueHandler, LogWriter
+from app.core.logging_middleware import register_request_logger
+from benchmarks.common import summarize
+
+
+class SlowFileHandler(logging.FileHandler):
+    delay_s = 0.0
+
+    def flush(self) -> None:
+        super().flush()
+        time.sleep(self.delay_s)
+
+
+class SlowBatchFileHandler(BatchRotatingFileHandler):
+    delay_s = 0.0
+
+    def flush(self) -> None:
+        super().flush()
+        time.sleep(self.delay_s)
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    register_request_logger(app)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def run(app: FastAPI, requests: int) -> list:
+    samples = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            await client.get("/ping")
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sink-delay-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    SlowFileHandler.delay_s = SlowBatchFileHandler.delay_s = args.sink_delay_ms / 1000
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    app = build_app()
+    with tempfile.TemporaryDirectory() as tmp:
+        blocking = SlowFileHandler(f"{tmp}/blocking.log")
+        blocking.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.handlers = [blocking]
+        blocking_samples = asyncio.run(run(app, args.requests))
+        blocking.close()
+
+        batched = SlowBatchFileHandler(f"{tmp}/queued.log")
+        batched.setFormatter(logging.Formatter(LOG_FORMAT))
+        queue_handler = DroppingQueueHandler(queue.Queue(maxsize=10000))
+        writer = LogWriter(queue_handler.queue, [batched])
+        root.handlers = [queue_handler]
+        writer.start()
+        queued_samples = asyncio.run(run(app, args.requests))
+        writer.stop()
+        batched.close()
+        root.handlers = []
+
+    print(summarize("blocking file handler", blocking_samples))
+    print(summarize("queue + batching writer", queued_samples))
+    print(f"writer: {writer.records} records in {writer.batches} batches, {queue_handler.dropped} dropped")
+
+
+if __name__ == "__main__":
+    main()
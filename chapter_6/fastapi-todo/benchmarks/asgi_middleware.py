@@ -0,0 +1,99 @@
+# ============================================================
+# Pure ASGI vs. BaseHTTPMiddleware request logging
+# ============================================================
+# Calls the ASGI app directly (no HTTP client in between) with the
+# request logger implemented as @app.middleware("http") and as the pure
+# ASGI RequestLoggerMiddleware. Reports per-request latency for a small
+# JSON route and, for a streamed response, the time to the first body
+# chunk and to the end of the body.
+#
+#   poetry run python -m benchmarks.asgi_middleware --requests 5000
+# ============================================================
+import argparse
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.logging_middleware import RequestLoggerMiddleware, access_logger, log_request
+from benchmarks.common import summarize
+
+STREAM_CHUNKS = 5
+STREAM_CHUNK_DELAY_S = 0.02
+
+
+def build_app(pure_asgi: bool) -> FastAPI:
+    app = FastAPI()
+    if pure_asgi:
+        app.add_middleware(RequestLoggerMiddleware)
+    else:
+        @app.middleware("http")
+        async def request_logger(request: Request, call_next):
+            start = time.perf_counter()
+            response = await call_next(request)
+            log_request(request.method, request.url.path, response.status_code, time.perf_counter() - start)
+            return response
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(STREAM_CHUNKS):
+                await asyncio.sleep(STREAM_CHUNK_DELAY_S)
+                yield f"chunk {i}\n"
+        return StreamingResponse(chunks())
+
+    return app
+
+
+async def call(app: FastAPI, path: str) -> tuple:
+    """Run one request; return (seconds to first body chunk, seconds to end)."""
+    scope = {"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""}
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    start = time.perf_counter()
+    first_chunk = None
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal first_chunk
+        if message["type"] == "http.response.body" and message.get("body") and first_chunk is None:
+            first_chunk = time.perf_counter() - start
+
+    await app(scope, receive, send)
+    return first_chunk, time.perf_counter() - start
+
+
+async def run(app: FastAPI, requests: int, streams: int) -> tuple:
+    for _ in range(100):
+        await call(app, "/ping")
+    pings = [(await call(app, "/ping"))[1] for _ in range(requests)]
+    stream_results = [await call(app, "/stream") for _ in range(streams)]
+    return pings, [first for first, _ in stream_results], [total for _, total in stream_results]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--streams", type=int, default=20)
+    args = parser.parse_args()
+    # Measure the middleware itself, not log output.
+    access_logger.setLevel(logging.WARNING)
+
+    for label, pure_asgi in (("BaseHTTP", False), ("pure ASGI", True)):
+        pings, first_chunks, totals = asyncio.run(run(build_app(pure_asgi), args.requests, args.streams))
+        print(summarize(f"{label}: /ping", pings))
+        print(summarize(f"{label}: stream 1st chunk", first_chunks))
+        print(summarize(f"{label}: stream done", totals))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# ============================================================
+# Bulk user provisioning
+# ============================================================
+# Provisions --users users through UserService.provision_users with
+# 0 (threadpool), 1, 2, ... hashing workers and reports users per
+# second, showing how throughput scales with cores.
+#
+#   poetry run python -m benchmarks.bulk_provision --users 400
+# ============================================================
+import argparse
+import asyncio
+import os
+import time
+
+from app.core.db import DB
+from app.core.hash_policy import HashPolicy
+from app.core.hashing import PasswordHasher
+from app.core.security import set_hash_policy
+from app.users.repository import UserRepository
+from app.users.service import UserService
+
+
+def run(workers: int, users: int) -> float:
+    hasher = PasswordHasher(workers=workers, max_pending=users)
+    hasher.start()
+    try:
+        # Warm the pool so process start-up is not measured.
+        asyncio.run(hasher.hash_many(["warm-up"] * max(1, workers)))
+        service = UserService(UserRepository(DB(users=[], todos=[])), hasher=hasher)
+        rows = [{"username": f"user{i}", "password": f"password-{i}", "name": f"User {i}"} for i in range(users)]
+        start = time.perf_counter()
+        results = asyncio.run(service.provision_users(rows))
+        elapsed = time.perf_counter() - start
+        assert all(result["status"] == "created" for result in results)
+        return users / elapsed
+    finally:
+        hasher.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=400)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    set_hash_policy(HashPolicy(bcrypt_rounds=args.bcrypt_rounds))
+    worker_counts = sorted({0, 1, 2, 4, args.max_workers} & set(range(args.max_workers + 1)))
+    print(f"{'workers':>8} {'users/s':>10}")
+    for workers in worker_counts:
+        print(f"{workers:>8} {run(workers, args.users):10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# ============================================================
+# Shared helpers for the benchmark scripts
+# ============================================================
+import statistics
+import time
+from typing import Callable, List, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Return the pct-th percentile (0-100) of samples using nearest rank."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(label: str, samples_s: Sequence[float]) -> str:
+    """Format latency samples (in seconds) as a one-line millisecond summary."""
+    ms: List[float] = [s * 1000 for s in samples_s]
+    return (
+        f"{label:<32} n={len(ms):<6} "
+        f"mean={statistics.fmean(ms) if ms else 0:8.2f}ms "
+        f"p50={percentile(ms, 50):8.2f}ms "
+        f"p99={percentile(ms, 99):8.2f}ms "
+        f"max={max(ms, default=0):8.2f}ms"
+    )
+
+
+def ops_per_second(fn: Callable[[], object], iterations: int) -> float:
+    """Call fn iterations times and return the achieved calls per second."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
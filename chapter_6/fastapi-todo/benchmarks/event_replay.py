@@ -0,0 +1,57 @@
+# ============================================================
+# Todo event log: append cost and replay speed
+# ============================================================
+# Runs --events todo commands (creates, updates and deletes from a few
+# owners) through the event-sourced repository with the log written to
+# a temporary file, then rebuilds every projection from that file the
+# way app.todos.replay does.
+#
+#   poetry run python -m benchmarks.event_replay --events 200000
+# ============================================================
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.todos.events import EventLog, TodoEventStore, default_projections, read_log_file, replay
+from app.todos.repository import EventSourcedTodoRepository
+from benchmarks.common import summarize
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--owners", type=int, default=50)
+    args = parser.parse_args()
+    owners = [f"user{i}" for i in range(args.owners)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "events.jsonl")
+        store = TodoEventStore(EventLog(path))
+        repo = EventSourcedTodoRepository(store)
+        samples = []
+        for i in range(args.events):
+            live = store.current.todos
+            roll = random.random()
+            if roll < 0.5 or len(live) < 10:
+                command = (repo.create_todo, f"Todo {i}", False, random.choice(owners))
+            elif roll < 0.9:
+                command = (repo.update_todo, random.randrange(store.current.last_id) + 1, f"Todo {i}", True, "bench")
+            else:
+                command = (repo.delete_todo, next(iter(live)), "bench")
+            start = time.perf_counter()
+            command[0](*command[1:])
+            samples.append(time.perf_counter() - start)
+        store.log.close()
+
+        start = time.perf_counter()
+        count = replay(read_log_file(path), default_projections())
+        elapsed = time.perf_counter() - start
+
+    print(summarize("command (append + project)", samples))
+    print(f"replay: {count} events in {elapsed * 1000:.0f}ms ({count / elapsed:.0f} events/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# ============================================================
+# Executor lanes: todo reads during an auth burst
+# ============================================================
+# Runs the mixed_load scenario (a burst of logins while todo reads
+# stream in) with password hashing on threads, first with auth and CRUD
+# sharing one lane of --crud-threads threads (like the single default
+# threadpool), then with a separate auth lane of --auth-threads threads.
+#
+#   poetry run python -m benchmarks.executor_lanes --logins 100 --reads 300
+# ============================================================
+import argparse
+import asyncio
+import logging
+
+from app.auth.rate_limit import InMemoryBucketBackend, RateLimiter
+from app.auth.router import get_rate_limiter
+from app.core.hashing import password_hasher
+from app.core.lanes import Lane, lane_scheduler
+from app.main import app
+from benchmarks.common import summarize
+from benchmarks.mixed_load import run_round
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--reads", type=int, default=300)
+    parser.add_argument("--auth-threads", type=int, default=2)
+    parser.add_argument("--crud-threads", type=int, default=16)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    password_hasher.workers = 0
+    password_hasher.max_pending = args.logins + 1
+    unlimited = RateLimiter(InMemoryBucketBackend(), per_ip="1000000/1", per_user="1000000/1")
+    app.dependency_overrides[get_rate_limiter] = lambda: unlimited
+    queue = args.logins + args.reads
+
+    shared = Lane("shared", args.crud_threads, queue)
+    lane_scheduler.lanes.update(auth=shared, crud=shared)
+    shared_samples = asyncio.run(run_round(args.logins, args.reads))
+
+    lane_scheduler.lanes.update(
+        auth=Lane("auth", args.auth_threads, queue, priority=0),
+        crud=Lane("crud", args.crud_threads, queue, priority=10),
+    )
+    split_samples = asyncio.run(run_round(args.logins, args.reads))
+
+    print(summarize("reads, one shared lane", shared_samples))
+    print(summarize(f"reads, auth lane of {args.auth_threads}", split_samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# ============================================================
+# Password hash calibration
+# ============================================================
+# Reports verify latency and hashes per second per core for each
+# available scheme and work factor, and the policy `calibrate()` would
+# choose for --target-ms (PASSWORD_HASH_TARGET_MS) on this host.
+#
+#   poetry run python -m benchmarks.hash_calibration --target-ms 250
+# ============================================================
+import argparse
+from dataclasses import replace
+
+from app.core.hash_policy import (
+    BCRYPT_MIN_ROUNDS,
+    HashPolicy,
+    calibrate,
+    measure_verify_ms,
+    scheme_available,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--max-bcrypt-rounds", type=int, default=13)
+    parser.add_argument("--max-argon2-time-cost", type=int, default=4)
+    args = parser.parse_args()
+
+    rows = []
+    if scheme_available("bcrypt"):
+        for rounds in range(BCRYPT_MIN_ROUNDS, args.max_bcrypt_rounds + 1):
+            rows.append(("bcrypt", f"rounds={rounds}", HashPolicy(bcrypt_rounds=rounds)))
+    if scheme_available("argon2"):
+        for time_cost in range(1, args.max_argon2_time_cost + 1):
+            policy = HashPolicy(scheme="argon2", argon2_time_cost=time_cost)
+            rows.append(("argon2", f"t={time_cost},m={policy.argon2_memory_cost}", policy))
+    else:
+        print("argon2: not available (pip install argon2-cffi)")
+
+    print(f"{'scheme':<8} {'params':<18} {'verify':>10} {'hashes/s/core':>14}")
+    for scheme, params, policy in rows:
+        ms = measure_verify_ms(policy)
+        print(f"{scheme:<8} {params:<18} {ms:8.1f}ms {1000 / ms:14.1f}")
+
+    for scheme in ("bcrypt", "argon2"):
+        if scheme_available(scheme):
+            tuned = calibrate(HashPolicy(scheme=scheme), args.target_ms)
+            print(f"calibrated for {args.target_ms:.0f}ms: {tuned} "
+                  f"(measured {measure_verify_ms(tuned):.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# ============================================================
+# Token issue/verify throughput: python-jose vs. HS256Codec
+# ============================================================
+#   poetry run python -m benchmarks.jwt_codec --iterations 20000
+# ============================================================
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from jose import jwt
+
+from app.auth.jwt_codec import HS256Codec
+from app.auth.service import SECRET_KEY, ALGORITHM
+from benchmarks.common import ops_per_second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    codec = HS256Codec(SECRET_KEY)
+    claims = {
+        "sub": "alice",
+        "scopes": ["read", "write"],
+        "role": "user",
+        "exp": datetime.now(timezone.utc) + timedelta(minutes=30),
+    }
+    token = codec.encode(claims)
+
+    rows = [
+        ("issue   python-jose", lambda: jwt.encode(dict(claims), SECRET_KEY, algorithm=ALGORITHM)),
+        ("issue   HS256Codec", lambda: codec.encode(claims)),
+        ("verify  python-jose", lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])),
+        ("verify  HS256Codec", lambda: codec.decode(token)),
+    ]
+    for label, fn in rows:
+        rate = ops_per_second(fn, args.iterations)
+        print(f"{label:<22} {rate:12,.0f} ops/s  {1e6 / rate:8.2f}us/op")
+
+
+if __name__ == "__main__":
+    main()
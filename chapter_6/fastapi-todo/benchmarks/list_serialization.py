@@ -0,0 +1,63 @@
+# ============================================================
+# Todo list serialization: full encode vs. materialized bytes
+# ============================================================
+# Microseconds to produce the GET /api/todos body for --todos items:
+# validating and encoding List[TodoItem] the way FastAPI does for a
+# response_model, serving an unchanged page from the response cache,
+# and rebuilding the page after one todo was updated.
+#
+#   poetry run python -m benchmarks.list_serialization --todos 2000
+# ============================================================
+import argparse
+import asyncio
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.db import DB
+from app.todos.repository import TodoRepository
+from app.todos.schemas import TodoItem
+
+
+def _us_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--todos", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    repo = TodoRepository(DB(users=[], todos=[]))
+    for i in range(args.todos):
+        repo.create_todo(title=f"Todo {i}", completed=i % 2 == 0)
+    field = create_model_field(name="Response_list_todos", type_=List[TodoItem], mode="serialization")
+
+    def full_encode() -> bytes:
+        content = asyncio.run(serialize_response(field=field, response_content=repo.list_todos()))
+        return JSONResponse(content).body
+
+    assert full_encode() == repo.list_todos_json()
+    full = _us_per_call(full_encode, args.iterations)
+    hit = _us_per_call(repo.list_todos_json, args.iterations)
+
+    def patch_one() -> bytes:
+        repo.update_todo(args.todos // 2, title="Patched", completed=True)
+        return repo.list_todos_json()
+
+    patched = _us_per_call(patch_one, args.iterations)
+
+    print(f"full List[TodoItem] encode: {full:10.1f} us/request")
+    print(f"unchanged page (cache hit): {hit:10.1f} us/request")
+    print(f"page after one update:      {patched:10.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
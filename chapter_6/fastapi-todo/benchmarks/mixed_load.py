@@ -0,0 +1,86 @@
+# ============================================================
+# Mixed-load benchmark: login burst vs. todo reads
+# ============================================================
+# Fires a burst of POST /auth/token requests while a steady stream of
+# GET /api/todos requests runs, and reports the todo read latency with
+# password hashing on the threads of the "auth" executor lane vs. on the
+# process pool.
+#
+#   poetry run python -m benchmarks.mixed_load --logins 200 --reads 400
+# ============================================================
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.main import app
+from app.core.hashing import password_hasher
+from app.auth.rate_limit import InMemoryBucketBackend, RateLimiter
+from app.auth.router import get_rate_limiter
+from app.ops.admission import admission_controller
+from benchmarks.common import summarize
+
+
+async def _timed_get(client: httpx.AsyncClient, url: str, headers: dict, samples: list) -> None:
+    start = time.perf_counter()
+    response = await client.get(url, headers=headers)
+    samples.append(time.perf_counter() - start)
+    response.raise_for_status()
+
+
+async def _login(client: httpx.AsyncClient) -> None:
+    await client.post("/auth/token", data={"username": "alice", "password": "wonderland"})
+
+
+async def run_round(logins: int, reads: int) -> list:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/auth/token", data={"username": "alice", "password": "wonderland"})
+        if response.status_code != 200:
+            raise SystemExit(f"login failed with {response.status_code}: {response.text}")
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        samples: list = []
+        login_tasks = [asyncio.create_task(_login(client)) for _ in range(logins)]
+        # Spread the reads over the burst so they compete with it.
+        for _ in range(reads):
+            await _timed_get(client, "/api/todos", headers, samples)
+            await asyncio.sleep(0)
+        await asyncio.gather(*login_tasks)
+        return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=password_hasher.workers or 2)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    password_hasher.max_pending = args.logins + 1
+    # The burst comes from one client; keep the login rate limiter out of the way.
+    unlimited = RateLimiter(InMemoryBucketBackend(), per_ip="1000000/1", per_user="1000000/1")
+    app.dependency_overrides[get_rate_limiter] = lambda: unlimited
+    # Likewise admission control: once the first burst trips it, it would
+    # shed the logins (and shrink the auth lane queue) of the next round.
+    admission_controller.target_delay = float("inf")
+    admission_controller.max_in_flight = admission_controller.hard_limit = args.logins + args.reads + 1
+
+    password_hasher.workers = 0
+    in_lane = asyncio.run(run_round(args.logins, args.reads))
+
+    password_hasher.workers = args.workers
+    password_hasher.start()
+    try:
+        offloaded = asyncio.run(run_round(args.logins, args.reads))
+    finally:
+        password_hasher.shutdown()
+
+    print(summarize("reads, hashing in auth lane", in_lane))
+    print(summarize(f"reads, hashing on {args.workers} procs", offloaded))
+
+
+if __name__ == "__main__":
+    main()
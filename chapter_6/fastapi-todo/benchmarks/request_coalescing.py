@@ -0,0 +1,68 @@
+# ============================================================
+# Request coalescing: many clients polling GET /api/todos
+# ============================================================
+# Fires waves of --fan-in concurrent GET /api/todos requests against a
+# list of --todos items, first with a distinct query string per request
+# (every request runs its own scan and serialization), then with
+# identical requests that CoalescingRoute answers from one shared call.
+#
+#   poetry run python -m benchmarks.request_coalescing --fan-in 200 --todos 2000
+# ============================================================
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.auth.service import AuthService
+from app.core.coalescing import COALESCED_REQUESTS
+from app.core.db import get_db
+from app.main import app
+from app.todos.entities import TodoItemEntity
+from benchmarks.common import summarize
+
+
+async def _timed_get(client: httpx.AsyncClient, url: str, headers: dict, samples: list) -> None:
+    start = time.perf_counter()
+    response = await client.get(url, headers=headers)
+    samples.append(time.perf_counter() - start)
+    response.raise_for_status()
+
+
+async def run_waves(waves: int, fan_in: int, distinct: bool) -> tuple:
+    token = AuthService.create_token({"sub": "alice", "role": "user", "scopes": ["read"]})
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    samples: list = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        for _ in range(waves):
+            urls = [f"/api/todos?client={i}" if distinct else "/api/todos" for i in range(fan_in)]
+            await asyncio.gather(*(_timed_get(client, url, headers, samples) for url in urls))
+        elapsed = time.perf_counter() - start
+    return samples, len(samples) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fan-in", type=int, default=200)
+    parser.add_argument("--waves", type=int, default=5)
+    parser.add_argument("--todos", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    get_db().todos[:] = [TodoItemEntity(id=i, title=f"Todo {i}", completed=i % 2 == 0)
+                         for i in range(1, args.todos + 1)]
+
+    separate, separate_rps = asyncio.run(run_waves(args.waves, args.fan_in, distinct=True))
+    before = COALESCED_REQUESTS.value(("/api/todos",))
+    coalesced, coalesced_rps = asyncio.run(run_waves(args.waves, args.fan_in, distinct=False))
+    shared = COALESCED_REQUESTS.value(("/api/todos",)) - before
+
+    print(summarize("separate requests", separate) + f" {separate_rps:8.0f} req/s")
+    print(summarize("coalesced requests", coalesced) + f" {coalesced_rps:8.0f} req/s")
+    print(f"{int(shared)} of {len(coalesced)} requests answered from a shared call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# ============================================================
+# Startup benchmark: import of app.main to first served request
+# ============================================================
+# Each run starts a fresh interpreter, imports app.main, and sends a
+# first authenticated GET /api/todos, so any work done at import time
+# or on first use of the DB shows up here.
+#
+#   poetry run python -m benchmarks.startup --runs 5
+# ============================================================
+import argparse
+import json
+import subprocess
+import sys
+
+from benchmarks.common import summarize
+
+PROBE = r"""
+import json, logging, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.auth.service import AuthService
+logging.disable(logging.INFO)
+client = TestClient(app)
+headers = {"Authorization": "Bearer " + AuthService.create_token({"sub": "alice", "scopes": ["read"]})}
+assert client.get("/api/todos", headers=headers).status_code == 200
+first_request = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_request": first_request - start}))
+"""
+
+
+def run_once() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    print(summarize("import app.main", [r["import"] for r in results]))
+    print(summarize("import to first request", [r["first_request"] for r in results]))
+
+
+if __name__ == "__main__":
+    main()
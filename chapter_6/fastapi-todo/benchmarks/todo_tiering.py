@@ -0,0 +1,93 @@
+# ============================================================
+# Hot/cold todo tiering: memory and read latency
+# ============================================================
+# Builds a store of --todos todos of which --completed-pct percent are
+# completed, then spills the completed ones to cold segments. Reports
+# the memory held by the store and its response cache (tracemalloc)
+# before and after, each measured after serving list traffic: the full
+# list and --pages pages of --page-size todos. Also reports the latency
+# of get_todo for hot and cold todos and of list requests on the
+# tiered store.
+#
+#   poetry run python -m benchmarks.todo_tiering --todos 200000
+# ============================================================
+import argparse
+import gc
+import random
+import tempfile
+import time
+import tracemalloc
+
+from app.core.db import DB
+from app.todos.repository import TodoRepository
+from app.todos.tiering import enable_tiering, spill
+from benchmarks.common import summarize
+
+
+def _traced() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _get_latencies(repo: TodoRepository, ids: list) -> list:
+    samples = []
+    for todo_id in ids:
+        start = time.perf_counter()
+        repo.get_todo(todo_id)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _list_traffic(repo: TodoRepository, pages: int, page_size: int, total: int) -> list:
+    """Serve the full list and ``pages`` pages spread over the store; returns the latencies."""
+    samples = []
+    offsets = [i * max(total - page_size, 0) // max(pages - 1, 1) for i in range(pages)]
+    for offset, limit in [(0, None)] + [(offset, page_size) for offset in offsets]:
+        start = time.perf_counter()
+        repo.list_todos_json(offset=offset, limit=limit)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--todos", type=int, default=200_000)
+    parser.add_argument("--completed-pct", type=int, default=90)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        baseline = _traced()
+        db = DB(users=[], todos=[])
+        cold = enable_tiering(db, directory)
+        repo = TodoRepository(db)
+        for i in range(args.todos):
+            repo.create_todo(title=f"Todo number {i}", completed=random.randrange(100) < args.completed_pct)
+        _list_traffic(repo, args.pages, args.page_size, args.todos)
+        all_hot = _traced() - baseline
+        moved = spill(db, cold, hot_max_items=args.todos)
+        _list_traffic(repo, args.pages, args.page_size, args.todos)
+        tiered = _traced() - baseline
+        tracemalloc.stop()
+
+        hot_ids = [todo.id for todo in db.todos]
+        cold_ids = [row_id for row_id, _ in cold.rows()]
+        hot = _get_latencies(repo, random.choices(hot_ids, k=args.reads))
+        cold_reads = _get_latencies(repo, random.choices(cold_ids, k=args.reads))
+        # Timed again without tracemalloc, which slows allocations down.
+        lists = _list_traffic(repo, args.pages, args.page_size, args.todos)
+
+        print(f"store memory, all hot:    {all_hot / 1e6:8.1f} MB")
+        print(f"store memory, tiered:     {tiered / 1e6:8.1f} MB "
+              f"({moved} todos in {cold.stats()['segments']} segments, "
+              f"{cold.stats()['bytes_on_disk'] / 1e6:.1f} MB on disk)")
+        print(summarize("get_todo, hot", hot))
+        print(summarize("get_todo, cold", cold_reads))
+        print(summarize("list requests, tiered", lists))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# ============================================================
+# Per-request auth overhead with and without the claims cache
+# ============================================================
+#   poetry run python -m benchmarks.token_cache --iterations 20000
+# ============================================================
+import argparse
+
+from app.auth.service import AuthService
+from app.auth.token_cache import token_claims_cache
+from benchmarks.common import ops_per_second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = AuthService.create_token({"sub": "alice", "scopes": ["read", "write"], "role": "user"})
+    token_claims_cache.clear()
+
+    uncached = ops_per_second(lambda: AuthService.decode_token(token), args.iterations)
+    cached = ops_per_second(lambda: AuthService.decode_token_cached(token), args.iterations)
+
+    print(f"full decode   {uncached:12,.0f} ops/s  {1e6 / uncached:8.2f}us/request")
+    print(f"claims cache  {cached:12,.0f} ops/s  {1e6 / cached:8.2f}us/request")
+    print(f"cache stats   {token_claims_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
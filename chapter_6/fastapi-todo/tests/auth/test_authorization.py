@@ -0,0 +1,68 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.auth.service import AuthService
+from app.auth.user_status import UserStatusCache, user_status_cache
+from app.users.repository import UserRepository
+from app.main import app
+
+client = TestClient(app)
+
+
+def _headers(**claims):
+    return {"Authorization": f"Bearer {AuthService.create_token(claims)}"}
+
+
+@pytest.fixture
+def repo_reads(monkeypatch):
+    calls = []
+    original = UserRepository.get_user
+
+    def counting_get_user(self, username):
+        calls.append(username)
+        return original(self, username)
+
+    monkeypatch.setattr(UserRepository, "get_user", counting_get_user)
+    return calls
+
+
+def test_admin_route_needs_no_repository_reads(repo_reads):
+    headers = _headers(sub="admin", role="admin", scopes=["read", "write", "admin"])
+    response = client.get("/api/users", headers=headers)
+    assert response.status_code == 200
+    assert repo_reads == []
+
+
+def test_admin_route_rejects_missing_scope():
+    response = client.get("/api/users", headers=_headers(sub="alice", role="user", scopes=["read"]))
+    assert response.status_code == 403
+    assert response.headers["WWW-Authenticate"] == 'Bearer scope="admin"'
+
+
+def test_admin_route_rejects_non_admin_role():
+    response = client.get("/api/users", headers=_headers(sub="alice", role="user", scopes=["admin"]))
+    assert response.status_code == 403
+
+
+def test_read_scope_cannot_write():
+    headers = _headers(sub="alice", role="user", scopes=["read"])
+    assert client.get("/api/todos", headers=headers).status_code == 200
+    assert client.post("/api/todos", json={"title": "x"}, headers=headers).status_code == 403
+
+
+def test_staleness_check_reads_store_at_most_once_per_interval(monkeypatch, repo_reads):
+    monkeypatch.setattr(user_status_cache, "max_staleness", 60)
+    user_status_cache.clear()
+    headers = _headers(sub="admin", role="admin", scopes=["admin"])
+    for _ in range(3):
+        assert client.get("/api/users", headers=headers).status_code == 200
+    assert repo_reads == ["admin"]
+    user_status_cache.clear()
+
+
+def test_staleness_check_rejects_removed_users():
+    cache = UserStatusCache(max_staleness=60)
+    with pytest.raises(HTTPException) as exc_info:
+        cache.check({"sub": "ghost", "role": "admin"}, lambda username: None)
+    assert exc_info.value.status_code == 401
@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from jose import jwt
+
+from app.auth.jwt_codec import HS256Codec, JoseCodec, TokenError, build_codec
+
+SECRET = "codec-test-secret"
+
+
+@pytest.fixture(scope="module")
+def codec():
+    return HS256Codec(SECRET)
+
+
+def test_encode_is_byte_identical_to_jose(codec):
+    exp = datetime.now(timezone.utc) + timedelta(minutes=5)
+    claims = {"sub": "alice", "scopes": ["read", "write"], "role": "user", "exp": exp}
+    assert codec.encode(claims) == jwt.encode(dict(claims), SECRET, algorithm="HS256")
+
+
+def test_decodes_tokens_issued_by_jose(codec):
+    token = jwt.encode({"sub": "alice", "exp": int(time.time()) + 60}, SECRET, algorithm="HS256")
+    assert codec.decode(token)["sub"] == "alice"
+
+
+def test_jose_decodes_tokens_issued_by_codec(codec):
+    token = codec.encode({"sub": "alice", "exp": int(time.time()) + 60})
+    assert jwt.decode(token, SECRET, algorithms=["HS256"])["sub"] == "alice"
+
+
+def test_rejects_wrong_key(codec):
+    token = jwt.encode({"sub": "alice"}, "other-secret", algorithm="HS256")
+    with pytest.raises(TokenError):
+        codec.decode(token)
+
+
+def test_rejects_other_algorithms(codec):
+    token = jwt.encode({"sub": "alice"}, SECRET, algorithm="HS512")
+    with pytest.raises(TokenError):
+        codec.decode(token)
+
+
+@pytest.mark.parametrize("claims", [
+    {"sub": "alice", "exp": int(time.time()) - 10},
+    {"sub": "alice", "nbf": int(time.time()) + 600},
+    {"sub": 42},
+    {"sub": "alice", "aud": "other-service"},
+    {"sub": "alice", "aud": ["todo-api"]},
+])
+def test_rejects_invalid_claims(codec, claims):
+    with pytest.raises(TokenError):
+        codec.decode(jwt.encode(claims, SECRET, algorithm="HS256"))
+
+
+def test_rejects_audience_like_jose(codec):
+    token = codec.encode({"sub": "alice", "aud": "todo-api"})
+    with pytest.raises(jwt.JWTError):
+        jwt.decode(token, SECRET, algorithms=["HS256"])
+    with pytest.raises(TokenError):
+        codec.decode(token)
+
+
+@pytest.mark.parametrize("token", ["not-a-jwt", "a.b", "a.b.c", ""])
+def test_rejects_malformed_tokens(codec, token):
+    with pytest.raises(TokenError):
+        codec.decode(token)
+
+
+def test_build_codec_falls_back_to_jose():
+    assert isinstance(build_codec(SECRET, "HS256"), HS256Codec)
+    fallback = build_codec(SECRET, "HS512")
+    assert isinstance(fallback, JoseCodec)
+    assert fallback.decode(fallback.encode({"sub": "alice"}))["sub"] == "alice"
@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth.dependencies import (
+    get_current_user,
+    get_current_user_entity,
+    get_principal,
+    require_admin,
+)
+from app.auth.principal import Principal
+from app.auth.service import AuthService
+from app.users.repository import UserRepository
+from app.main import app as main_app
+
+
+def _headers(**claims):
+    return {"Authorization": f"Bearer {AuthService.create_token(claims)}"}
+
+
+def build_app():
+    app = FastAPI()
+    router = APIRouter()
+
+    @router.get("/stacked", dependencies=[Depends(require_admin)])
+    def stacked(
+            username: str = Depends(get_current_user),
+            principal: Principal = Depends(get_principal),
+            user=Depends(get_current_user_entity),
+    ):
+        return {"username": username, "same_user": principal.user is user}
+
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_stacked_dependencies_decode_and_load_once(monkeypatch):
+    decodes, loads = [], []
+    original_decode = AuthService.decode_token_cached
+
+    def counting_decode(token):
+        decodes.append(token)
+        return original_decode(token)
+
+    monkeypatch.setattr(AuthService, "decode_token_cached", staticmethod(counting_decode))
+    original_get_user = UserRepository.get_user
+    monkeypatch.setattr(
+        UserRepository, "get_user",
+        lambda self, username: loads.append(username) or original_get_user(self, username),
+    )
+
+    client = build_app()
+    response = client.get("/stacked", headers=_headers(sub="admin", role="admin", scopes=["admin"]))
+    assert response.status_code == 200
+    assert response.json() == {"username": "admin", "same_user": True}
+    assert len(decodes) == 1
+    assert loads == ["admin"]
+
+
+def test_me_returns_current_user():
+    client = TestClient(main_app)
+    response = client.get("/api/users/me", headers=_headers(sub="alice", role="user", scopes=["read"]))
+    assert response.status_code == 200
+    assert response.json()["email"] == "asharpe@example.com"
+
+
+def test_me_rejects_unknown_user():
+    client = TestClient(main_app)
+    response = client.get("/api/users/me", headers=_headers(sub="nobody", scopes=["read"]))
+    assert response.status_code == 401
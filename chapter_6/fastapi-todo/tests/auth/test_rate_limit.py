@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.auth.rate_limit import (
+    InMemoryBucketBackend,
+    RateLimiter,
+    SlidingWindowCounter,
+    SQLiteBucketBackend,
+    parse_rate,
+)
+from app.auth.router import get_rate_limiter
+from app.auth.service import AuthService
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_parse_rate():
+    assert parse_rate("10/60") == (10.0, 10 / 60)
+
+
+@pytest.mark.parametrize("make_backend", [
+    lambda tmp_path: InMemoryBucketBackend(),
+    lambda tmp_path: SQLiteBucketBackend(str(tmp_path / "buckets.sqlite3")),
+])
+def test_bucket_allows_burst_then_refills(tmp_path, make_backend):
+    backend = make_backend(tmp_path)
+    assert backend.consume("k", 2, 1.0, now=100.0) == 0
+    assert backend.consume("k", 2, 1.0, now=100.0) == 0
+    assert backend.consume("k", 2, 1.0, now=100.0) == pytest.approx(1.0)
+    assert backend.consume("k", 2, 1.0, now=101.5) == 0
+
+
+def test_sqlite_buckets_are_shared_between_connections(tmp_path):
+    path = str(tmp_path / "buckets.sqlite3")
+    first, second = SQLiteBucketBackend(path), SQLiteBucketBackend(path)
+    assert first.consume("k", 1, 0.1, now=100.0) == 0
+    assert second.consume("k", 1, 0.1, now=100.0) > 0
+
+
+def test_sqlite_check_runs_off_the_event_loop(tmp_path):
+    limiter = RateLimiter(SQLiteBucketBackend(str(tmp_path / "buckets.sqlite3")), per_ip="1/60", per_user="10/60")
+    consume = limiter.backend.consume
+    threads = []
+
+    def recording_consume(*args):
+        threads.append(threading.current_thread())
+        return consume(*args)
+
+    limiter.backend.consume = recording_consume
+
+    async def attempt():
+        await limiter.check_async("login", "10.0.0.1", "alice")
+
+    asyncio.run(attempt())
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(attempt())
+    assert exc_info.value.status_code == 429
+    assert threading.main_thread() not in threads
+
+
+def test_limiter_rejects_per_username_across_ips():
+    limiter = RateLimiter(InMemoryBucketBackend(), per_ip="100/60", per_user="2/60")
+    limiter.check("login", "10.0.0.1", "alice")
+    limiter.check("login", "10.0.0.2", "Alice")
+    with pytest.raises(HTTPException) as exc_info:
+        limiter.check("login", "10.0.0.3", "alice")
+    assert exc_info.value.status_code == 429
+    assert int(exc_info.value.headers["Retry-After"]) >= 1
+    assert limiter.stats()["login"]["rejected"] == 1
+
+
+def test_sliding_window_forgets_old_slots():
+    counter = SlidingWindowCounter(window_seconds=10)
+    counter.record(True, now=100.0)
+    counter.record(False, now=105.0)
+    assert counter.totals(now=105.0)["allowed"] == 1
+    assert counter.totals(now=111.0) == {"window_seconds": 10, "allowed": 0, "rejected": 1, "reject_ratio": 1.0}
+
+
+def test_login_is_rejected_before_password_verification(monkeypatch):
+    limiter = RateLimiter(InMemoryBucketBackend(), per_ip="1/60", per_user="10/60")
+    app.dependency_overrides[get_rate_limiter] = lambda: limiter
+    verifications = []
+
+    async def counting_verify(self, plain_password, hashed_password):
+        verifications.append(plain_password)
+        return False, None
+
+    monkeypatch.setattr(AuthService, "verify_and_update_password_async", counting_verify)
+    try:
+        first = client.post("/auth/token", data={"username": "alice", "password": "guess-1"})
+        second = client.post("/auth/token", data={"username": "alice", "password": "guess-2"})
+    finally:
+        app.dependency_overrides.clear()
+    assert first.status_code == 401
+    assert second.status_code == 429
+    assert "Retry-After" in second.headers
+    assert verifications == ["guess-1"]
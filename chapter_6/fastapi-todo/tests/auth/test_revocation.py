@@ -0,0 +1,115 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import app.auth.revocation as revocation_module
+from app.auth.revocation import BloomFilter, RevocationStore
+from app.auth.service import AuthService
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = RevocationStore(str(tmp_path / "revoked.sqlite3"), capacity=100)
+    monkeypatch.setattr(revocation_module, "_revocation_store", store)
+    yield store
+    store.close()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, fp_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_revocations_survive_restart(tmp_path):
+    path = str(tmp_path / "revoked.sqlite3")
+    first = RevocationStore(path, capacity=10)
+    first.revoke("abc", int(time.time()) + 60)
+    first.close()
+
+    second = RevocationStore(path, capacity=10)
+    assert second.is_revoked("abc")
+    assert not second.is_revoked("def")
+    second.close()
+
+
+def test_filter_grows_past_capacity(tmp_path):
+    store = RevocationStore(str(tmp_path / "revoked.sqlite3"), capacity=4)
+    store.revoke_many((f"jti-{i}", int(time.time()) + 60) for i in range(20))
+    assert all(store.is_revoked(f"jti-{i}") for i in range(20))
+    assert store.stats()["revoked"] == 20
+    store.close()
+
+
+def test_purge_expired(tmp_path):
+    store = RevocationStore(str(tmp_path / "revoked.sqlite3"), capacity=10)
+    store.revoke("old", int(time.time()) - 10)
+    store.revoke("new", int(time.time()) + 60)
+    assert store.purge_expired() == 1
+    assert not store.is_revoked("old")
+    assert store.is_revoked("new")
+    store.close()
+
+
+def test_revoke_reports_ids_revoked_before(store):
+    expires_at = int(time.time()) + 60
+    assert store.revoke("abc", expires_at)
+    assert not store.revoke("abc", expires_at)
+    assert store.revoke_many([("abc", expires_at), ("def", expires_at)]) == 1
+
+
+def test_revocations_from_other_workers_are_seen(store):
+    other_worker = RevocationStore(store.path, capacity=100)
+    assert not store.is_revoked("abc")
+    other_worker.revoke("abc", int(time.time()) + 60)
+    assert store.is_revoked("abc")
+    other_worker.close()
+
+
+def test_concurrent_reuse_loses_the_rotation(store, monkeypatch):
+    refresh_token = AuthService.create_refresh_token({"sub": "alice"})
+    payload = AuthService.decode_token(refresh_token)
+    other_worker = RevocationStore(store.path, capacity=100)
+    # Both requests passed the revocation check; the other one rotated first.
+    monkeypatch.setattr(store, "is_revoked", lambda jti: False)
+    other_worker.revoke(payload["jti"], payload["exp"])
+    with pytest.raises(HTTPException) as exc_info:
+        AuthService.rotate_refresh_token(refresh_token)
+    assert exc_info.value.status_code == 401
+    other_worker.close()
+
+
+def test_refresh_rotates_and_rejects_reuse(store):
+    refresh_token = AuthService.create_refresh_token({"sub": "alice", "scopes": ["read"], "role": "user"})
+    response = client.post("/auth/refresh", params={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    new_refresh_token = response.json()["refresh_token"]
+    assert AuthService.decode_token(response.json()["access_token"])["role"] == "user"
+
+    response = client.post("/auth/refresh", params={"refresh_token": refresh_token})
+    assert response.status_code == 401
+    response = client.post("/auth/refresh", params={"refresh_token": new_refresh_token})
+    assert response.status_code == 200
+
+
+def test_revoke_endpoint(store):
+    refresh_token = AuthService.create_refresh_token({"sub": "alice", "scopes": ["read"], "role": "user"})
+    assert client.post("/auth/revoke", params={"refresh_token": refresh_token}).status_code == 204
+    with pytest.raises(HTTPException) as exc_info:
+        AuthService.create_access_token_from_refresh(refresh_token)
+    assert exc_info.value.status_code == 401
+
+
+def test_unrevoked_checks_skip_storage(store):
+    for _ in range(10):
+        AuthService.create_access_token_from_refresh(AuthService.create_refresh_token({"sub": "alice"}))
+    assert store.stats()["store_lookups"] <= 1
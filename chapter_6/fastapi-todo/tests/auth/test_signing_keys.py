@@ -0,0 +1,113 @@
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from fastapi.testclient import TestClient
+from jose import jwt
+
+import app.auth.service as auth_service_module
+from app.auth.jwks_client import JWKSKeyCache, RemoteTokenVerifier
+from app.auth.jwt_codec import AsymmetricCodec, TokenError
+from app.auth.keys import KeyRing
+from app.main import app
+
+client = TestClient(app)
+
+
+def _claims():
+    return {"sub": "alice", "exp": int(time.time()) + 60}
+
+
+@pytest.mark.parametrize("algorithm", ["EdDSA", "RS256"])
+def test_round_trip_and_kid_header(algorithm):
+    ring = KeyRing(algorithm)
+    codec = AsymmetricCodec(ring)
+    token = codec.encode(_claims())
+    assert jwt.get_unverified_header(token)["kid"] == ring.current.kid
+    assert codec.decode(token)["sub"] == "alice"
+
+
+def test_rs256_tokens_verify_with_jose():
+    ring = KeyRing("RS256")
+    token = AsymmetricCodec(ring).encode(_claims())
+    public_pem = ring.current.public_key.public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    assert jwt.decode(token, public_pem, algorithms=["RS256"])["sub"] == "alice"
+
+
+def test_rotation_keeps_old_keys_until_retired():
+    ring = KeyRing("EdDSA")
+    codec = AsymmetricCodec(ring)
+    old_kid = ring.current.kid
+    old_token = codec.encode(_claims())
+
+    ring.rotate()
+    assert ring.current.kid != old_kid
+    assert codec.decode(old_token)["sub"] == "alice"
+    assert {key["kid"] for key in ring.jwks()["keys"]} == {old_kid, ring.current.kid}
+
+    ring.retire(old_kid)
+    with pytest.raises(TokenError):
+        codec.decode(old_token)
+    with pytest.raises(ValueError):
+        ring.retire(ring.current.kid)
+
+
+def test_remote_verifier_caches_jwks_and_refetches_for_new_kid():
+    ring = KeyRing("EdDSA")
+    codec = AsymmetricCodec(ring)
+    cache = JWKSKeyCache(lambda: (ring.jwks(), 300), min_refresh_interval=0)
+    verifier = RemoteTokenVerifier(cache)
+
+    for _ in range(3):
+        assert verifier.decode(codec.encode(_claims()))["sub"] == "alice"
+    assert cache.fetches == 1
+
+    ring.rotate()
+    assert verifier.decode(codec.encode(_claims()))["sub"] == "alice"
+    assert cache.fetches == 2
+
+
+def test_known_keys_are_served_while_a_refresh_is_in_flight():
+    ring = KeyRing("EdDSA")
+    codec = AsymmetricCodec(ring)
+    cache = JWKSKeyCache(lambda: (ring.jwks(), 0), min_refresh_interval=0)
+    verifier = RemoteTokenVerifier(cache)
+    token = codec.encode(_claims())
+    assert verifier.decode(token)["sub"] == "alice"
+
+    # The keys are stale (max-age 0); another thread is fetching them.
+    cache._lock.acquire()
+    try:
+        assert verifier.decode(token)["sub"] == "alice"
+    finally:
+        cache._lock.release()
+    assert cache.fetches == 1
+
+
+def test_remote_verifier_rate_limits_unknown_kids():
+    ring = KeyRing("EdDSA")
+    cache = JWKSKeyCache(lambda: (ring.jwks(), 300), min_refresh_interval=60)
+    verifier = RemoteTokenVerifier(cache)
+    stranger = AsymmetricCodec(KeyRing("EdDSA")).encode(_claims())
+    for _ in range(5):
+        with pytest.raises(TokenError):
+            verifier.decode(stranger)
+    assert cache.fetches == 1
+
+
+def test_jwks_endpoint_sets_cache_headers(monkeypatch):
+    monkeypatch.setattr(auth_service_module, "signing_keys", KeyRing("EdDSA"))
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=300"
+    assert response.json()["keys"][0]["kty"] == "OKP"
+
+    response = client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+
+def test_jwks_endpoint_is_empty_for_hmac(monkeypatch):
+    monkeypatch.setattr(auth_service_module, "signing_keys", None)
+    assert client.get("/.well-known/jwks.json").json() == {"keys": []}
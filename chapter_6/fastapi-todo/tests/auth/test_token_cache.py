@@ -0,0 +1,59 @@
+import time
+
+from app.auth.service import AuthService
+from app.auth.token_cache import TokenClaimsCache, token_claims_cache
+from app.ops.metrics import registry
+
+
+def test_get_returns_copy_of_cached_claims():
+    cache = TokenClaimsCache(max_entries=4)
+    cache.put("token", {"sub": "alice", "exp": time.time() + 60})
+    claims = cache.get("token")
+    claims["sub"] = "mallory"
+    assert cache.get("token")["sub"] == "alice"
+    assert cache.stats()["hits"] == 2
+
+
+def test_expired_entries_are_dropped():
+    cache = TokenClaimsCache(max_entries=4)
+    cache.put("token", {"sub": "alice", "exp": time.time() - 1})
+    assert cache.get("token") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["size"] == 0
+
+
+def test_tokens_without_exp_are_not_cached():
+    cache = TokenClaimsCache(max_entries=4)
+    cache.put("token", {"sub": "alice"})
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TokenClaimsCache(max_entries=2)
+    exp = time.time() + 60
+    cache.put("a", {"sub": "a", "exp": exp})
+    cache.put("b", {"sub": "b", "exp": exp})
+    cache.get("a")
+    cache.put("c", {"sub": "c", "exp": exp})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_decode_token_cached_populates_shared_cache():
+    token = AuthService.create_token({"sub": "carol"})
+    token_claims_cache.clear()
+    assert AuthService.decode_token_cached(token)["sub"] == "carol"
+    hits_before = token_claims_cache.stats()["hits"]
+    assert AuthService.decode_token_cached(token)["sub"] == "carol"
+    assert token_claims_cache.stats()["hits"] == hits_before + 1
+
+
+def test_cache_counters_are_exported():
+    token = AuthService.create_token({"sub": "dave"})
+    AuthService.decode_token_cached(token)
+    AuthService.decode_token_cached(token)
+    text = registry.render()
+    assert f'token_claims_cache_events{{event="hits"}} {token_claims_cache.stats()["hits"]}' in text
+    assert "token_claims_cache_entries " in text
@@ -0,0 +1,21 @@
+import pytest
+
+import app.auth.revocation as revocation_module
+from app.auth.rate_limit import auth_rate_limiter
+
+
+@pytest.fixture(autouse=True, scope="session")
+def state_files_in_tmp(tmp_path_factory):
+    """Keep SQLite state files the app opens at its default paths out of the source tree."""
+    state_dir = tmp_path_factory.mktemp("state")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(revocation_module, "REVOCATION_DB_PATH", str(state_dir / "revoked_tokens.sqlite3"))
+        patch.setattr(revocation_module, "_revocation_store", None)
+        yield state_dir
+
+
+@pytest.fixture(autouse=True)
+def reset_auth_rate_limiter():
+    """Each test starts with full login/register rate-limit buckets."""
+    auth_rate_limiter.reset()
+    yield
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app.auth.service import AuthService
+from app.core.coalescing import COALESCED_REQUESTS, SingleFlight
+from app.main import app
+from app.todos.repository import TodoRepository
+
+
+def _headers(scopes) -> dict:
+    token = AuthService.create_token({"sub": "alice", "role": "user", "scopes": scopes})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _slow_list(calls: list):
+    lock = threading.Lock()
+
+    def list_todos_json(self, offset=0, limit=None):
+        with lock:
+            calls.append(1)
+        time.sleep(0.1)
+        return b'[{"id":1,"title":"Shared","completed":false}]'
+
+    return list_todos_json
+
+
+async def _get_all(url: str, headers_list) -> list:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.get(url, headers=headers) for headers in headers_list))
+
+
+def test_single_flight_shares_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("key", compute) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert calls == [1]
+    assert [result for result, _ in results] == ["result"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flights.in_flight() == 0
+
+
+def test_concurrent_list_requests_share_one_scan(monkeypatch):
+    calls = []
+    monkeypatch.setattr(TodoRepository, "list_todos_json", _slow_list(calls))
+    before = COALESCED_REQUESTS.value(("/api/todos",))
+
+    responses = asyncio.run(_get_all("/api/todos", [_headers(["read"])] * 8))
+
+    assert calls == [1]
+    assert {response.status_code for response in responses} == {200}
+    assert {response.content for response in responses} == {b'[{"id":1,"title":"Shared","completed":false}]'}
+    assert responses[0].headers["content-type"] == "application/json"
+    assert COALESCED_REQUESTS.value(("/api/todos",)) - before == 7
+
+
+def test_requests_with_different_scopes_are_not_shared(monkeypatch):
+    calls = []
+    monkeypatch.setattr(TodoRepository, "list_todos_json", _slow_list(calls))
+
+    responses = asyncio.run(_get_all("/api/todos", [_headers(["read"]), _headers(["read", "write"])]))
+
+    assert len(calls) == 2
+    assert {response.status_code for response in responses} == {200}
+
+
+def test_scope_checks_still_run_per_request(monkeypatch):
+    calls = []
+    monkeypatch.setattr(TodoRepository, "list_todos_json", _slow_list(calls))
+
+    allowed, denied = asyncio.run(_get_all("/api/todos", [_headers(["read"]), _headers(["write"])]))
+
+    assert allowed.status_code == 200
+    assert denied.status_code == 403
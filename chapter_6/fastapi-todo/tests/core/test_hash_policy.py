@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.db import get_db
+from app.core.hash_policy import (
+    BCRYPT_MAX_ROUNDS,
+    BCRYPT_MIN_ROUNDS,
+    HashPolicy,
+    calibrate,
+    context_for,
+    scheme_available,
+)
+from app.core.security import get_hash_policy, set_hash_policy
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def policy():
+    original = get_hash_policy()
+    yield
+    set_hash_policy(original)
+
+
+def _alice():
+    return next(user for user in get_db().users if user.username == "alice")
+
+
+def _alice_hash() -> str:
+    return _alice().hashed_password
+
+
+@pytest.fixture
+def alice_seed_hash():
+    """Logins rehash alice's password; later tests expect the seed hash back."""
+    original = _alice_hash()
+    yield
+    _alice().hashed_password = original
+
+
+def test_outdated_cost_needs_update():
+    hashed = context_for(HashPolicy(bcrypt_rounds=10)).hash("secret")
+    assert not context_for(HashPolicy(bcrypt_rounds=10)).needs_update(hashed)
+    assert context_for(HashPolicy(bcrypt_rounds=11)).needs_update(hashed)
+    assert context_for(HashPolicy(bcrypt_rounds=11)).verify("secret", hashed)
+
+
+def test_calibrate_bcrypt_stays_in_bounds():
+    tuned = calibrate(HashPolicy(), target_ms=1)
+    assert tuned.bcrypt_rounds == BCRYPT_MIN_ROUNDS
+    tuned = calibrate(HashPolicy(), target_ms=10 ** 9)
+    assert tuned.bcrypt_rounds == BCRYPT_MAX_ROUNDS
+
+
+def test_login_rehashes_outdated_hash(policy, alice_seed_hash):
+    set_hash_policy(HashPolicy(bcrypt_rounds=10))
+    response = client.post("/auth/token", data={"username": "alice", "password": "wonderland"})
+    assert response.status_code == 200
+    assert _alice_hash().startswith("$2b$10$")
+
+
+@pytest.mark.skipif(not scheme_available("argon2"), reason="argon2-cffi not installed")
+def test_login_migrates_to_argon2(policy, alice_seed_hash):
+    set_hash_policy(HashPolicy(scheme="argon2", argon2_time_cost=1, argon2_memory_cost=8192))
+    response = client.post("/auth/token", data={"username": "alice", "password": "wonderland"})
+    assert response.status_code == 200
+    assert _alice_hash().startswith("$argon2")
+    response = client.post("/auth/token", data={"username": "alice", "password": "wonderland"})
+    assert response.status_code == 200
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.hashing import PasswordHasher
+from app.core.security import get_password_hash
+
+
+def test_process_pool_hash_and_verify():
+    hasher = PasswordHasher(workers=1, max_pending=4)
+    try:
+        hashed = asyncio.run(hasher.hash("wonderland"))
+        assert asyncio.run(hasher.verify("wonderland", hashed)) is True
+        assert asyncio.run(hasher.verify("wrong", hashed)) is False
+    finally:
+        hasher.shutdown()
+
+
+def test_threadpool_mode_verifies_existing_hash():
+    hasher = PasswordHasher(workers=0, max_pending=4)
+    hashed = get_password_hash("secret")
+    assert asyncio.run(hasher.verify("secret", hashed)) is True
+    assert hasher.pending == 0
+
+
+def test_queue_limit_rejects_with_retry_after():
+    hasher = PasswordHasher(workers=0, max_pending=0)
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(hasher.hash("secret"))
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "1"
+
+
+def test_hash_many_reserves_its_chunks_within_the_queue_limit():
+    hasher = PasswordHasher(workers=64, max_pending=8)
+    hasher.pending = 3
+    chunks = []
+
+    async def submit(fn, passwords, policy):
+        chunks.append(passwords)
+        assert hasher.pending == 8
+        return [password.upper() for password in passwords]
+
+    hasher._submit = submit
+    assert asyncio.run(hasher.hash_many([f"pw-{i}" for i in range(20)])) == [f"PW-{i}" for i in range(20)]
+    assert len(chunks) == 5
+    assert hasher.pending == 3
+
+    hasher.pending = 8
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(hasher.hash_many(["pw"]))
+    assert exc_info.value.status_code == 503
+    assert len(chunks) == 5
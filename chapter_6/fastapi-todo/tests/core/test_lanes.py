@@ -0,0 +1,93 @@
+import asyncio
+import inspect
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.auth.service import AuthService
+from app.core.lanes import LANE_QUEUE_WAIT, Lane, LaneScheduler, run_in_lane
+from app.ops.admission import admission_controller
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_lane_rejects_when_queue_is_full():
+    lane = Lane("test", capacity=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.create_task(lane.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert (lane.pending, lane.queued) == (2, 1)
+        with pytest.raises(HTTPException) as exc_info:
+            await lane.run(lambda: None)
+        release.set()
+        await asyncio.gather(*running)
+        return exc_info.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
+    assert lane.pending == 0
+
+
+def test_lower_priority_lanes_shed_first_under_overload(monkeypatch):
+    crud = Lane("c", capacity=1, max_queue=4, priority=10)
+    auth = Lane("a", capacity=1, max_queue=4, priority=0)
+    LaneScheduler([crud, auth])
+    assert (crud.rank, auth.rank) == (0, 1)
+    assert auth.queue_limit(overloaded=False) == 4
+    assert auth.queue_limit(overloaded=True) == 1
+    assert crud.queue_limit(overloaded=True) == 4
+
+    monkeypatch.setattr(admission_controller, "overloaded", lambda now=None: True)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.create_task(lane.run(release.wait)) for lane in (auth, auth, crud, crud)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException):
+            await auth.run(lambda: None)
+        queued_crud = asyncio.create_task(crud.run(lambda: "served"))
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.gather(*running)
+        return await queued_crud
+
+    assert asyncio.run(scenario()) == "served"
+
+
+def test_lanes_have_independent_capacity():
+    auth, crud = Lane("a", capacity=1, max_queue=10), Lane("c", capacity=1, max_queue=10)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = asyncio.create_task(auth.run(release.wait))
+        await asyncio.sleep(0.05)
+        result = await asyncio.wait_for(crud.run(lambda: "served"), timeout=1)
+        release.set()
+        await blocked
+        return result
+
+    assert asyncio.run(scenario()) == "served"
+
+
+def test_run_in_lane_keeps_the_endpoint_signature():
+    def endpoint(todo_id: int, verbose: bool = False):
+        return threading.get_ident()
+
+    wrapped = run_in_lane("crud", endpoint)
+    assert inspect.iscoroutinefunction(wrapped)
+    assert inspect.signature(wrapped) == inspect.signature(endpoint)
+    assert asyncio.run(wrapped(1)) != threading.get_ident()
+
+
+def test_todo_routes_run_in_the_crud_lane():
+    series = LANE_QUEUE_WAIT.series(("crud",))
+    before = series.count if series else 0
+    token = AuthService.create_token({"sub": "alice", "scopes": ["read"]})
+    assert client.get("/api/todos", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert LANE_QUEUE_WAIT.series(("crud",)).count == before + 1
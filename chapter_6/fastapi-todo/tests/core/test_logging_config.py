@@ -0,0 +1,116 @@
+import io
+import json
+import logging
+import queue
+
+from app.core import logging_config
+from app.core.logging_config import (
+    BatchRotatingFileHandler,
+    BatchStreamHandler,
+    DroppingQueueHandler,
+    JsonFormatter,
+    LogWriter,
+)
+from app.ops.metrics import registry
+
+
+def _record(message, **extra):
+    record = logging.makeLogRecord({"name": "app.access", "levelno": logging.INFO, "levelname": "INFO", "msg": message})
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    line = JsonFormatter().format(_record("GET /ping", status=200, duration_ms=1.5))
+    entry = json.loads(line)
+    assert entry["message"] == "GET /ping"
+    assert entry["level"] == "INFO"
+    assert entry["status"] == 200
+    assert entry["duration_ms"] == 1.5
+
+
+def test_queue_handler_drops_when_full():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(_record("first"))
+    handler.handle(_record("second"))
+    assert handler.dropped == 1
+
+
+def test_writer_writes_queued_records_in_batches():
+    stream = io.StringIO()
+    handler = BatchStreamHandler(stream)
+    log_queue = queue.Queue()
+    for i in range(5):
+        log_queue.put(_record(f"line {i}"))
+    writer = LogWriter(log_queue, [handler], batch_size=2, flush_interval=0.01)
+    writer.start()
+    writer.stop()
+    assert stream.getvalue().splitlines() == [f"line {i}" for i in range(5)]
+    assert writer.records == 5
+    assert writer.batches == 3
+
+
+def test_file_handler_rotates_between_batches(tmp_path):
+    path = tmp_path / "app.log"
+    handler = BatchRotatingFileHandler(str(path), maxBytes=20, backupCount=2, delay=True)
+    handler.emit_batch([_record("a" * 15)])
+    handler.emit_batch([_record("b" * 15)])
+    handler.close()
+    assert path.read_text() == "b" * 15 + "\n"
+    assert (tmp_path / "app.log.1").read_text() == "a" * 15 + "\n"
+
+
+class FailingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.errors = 0
+
+    def emit_batch(self, records):
+        raise OSError("disk full")
+
+    def handleError(self, record):
+        self.errors += 1
+
+
+def test_writer_survives_failing_handlers():
+    stream = io.StringIO()
+    failing = FailingHandler()
+    plain = logging.StreamHandler(stream)
+    log_queue = queue.Queue()
+    writer = LogWriter(log_queue, [failing, plain], batch_size=1, flush_interval=0.01)
+    writer.start()
+    log_queue.put(_record("first"))
+    log_queue.put(_record("second"))
+    writer.stop()
+    assert failing.errors == 2
+    assert stream.getvalue().splitlines() == ["first", "second"]
+    assert writer.records == 2
+
+
+def test_queued_records_keep_their_traceback():
+    log_queue = queue.Queue()
+    handler = DroppingQueueHandler(log_queue)
+    logger = logging.getLogger("test.queued.traceback")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed %s", "hard")
+    finally:
+        logger.removeHandler(handler)
+    entry = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+    assert entry["message"] == "failed hard"
+    assert "ValueError: boom" in entry["exc_info"]
+
+
+def test_dropped_records_are_exported(monkeypatch):
+    log_queue = queue.Queue(maxsize=1)
+    handler = DroppingQueueHandler(log_queue)
+    handler.handle(_record("first"))
+    handler.handle(_record("second"))
+    monkeypatch.setattr(logging_config, "_queue_handler", handler)
+    monkeypatch.setattr(logging_config, "_writer", LogWriter(log_queue, []))
+    text = registry.render()
+    assert 'log_records{state="dropped"} 1' in text
+    assert 'log_records{state="queued"} 1' in text
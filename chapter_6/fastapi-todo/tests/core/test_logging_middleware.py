@@ -1,10 +1,12 @@
+import asyncio
 import logging
 import re
 from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
 from fastapi.testclient import TestClient
 
 from app.core.logging_config import setup_logging
-from app.core.logging_middleware import register_request_logger
+from app.core.logging_middleware import register_request_logger, should_log
 
 
 def build_test_app() -> TestClient:
@@ -47,3 +49,47 @@ def test_setup_logging_applies_format_and_level(caplog):
         rec.levelno == logging.INFO and
         rec.message == "hello-format" for rec in caplog.records
     )
+
+
+def test_sampling_keeps_errors_and_slow_requests():
+    assert should_log(200, 0.001, sample_rate=0) is False
+    assert should_log(500, 0.001, sample_rate=0) is True
+    assert should_log(200, 5.0, sample_rate=0) is True
+    assert should_log(200, 0.001, sample_rate=1) is True
+
+
+def test_request_logger_logs_status_of_errors(caplog):
+    client = build_test_app()
+    caplog.set_level(logging.INFO)
+
+    assert client.get("/missing").status_code == 404
+    assert any(getattr(rec, "status", None) == 404 and rec.path == "/missing" for rec in caplog.records)
+
+
+def test_request_logger_does_not_buffer_streaming_bodies():
+    app = FastAPI()
+    register_request_logger(app)
+    events = []
+
+    @app.get("/stream")
+    def stream():
+        def chunks():
+            for i in range(3):
+                events.append(f"produced {i}")
+                yield f"{i}\n"
+        return StreamingResponse(chunks())
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()  # no disconnect until the response is done
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            events.append(f"sent {message['body'].decode().strip()}")
+
+    scope = {"type": "http", "method": "GET", "path": "/stream", "headers": [], "query_string": b""}
+    asyncio.run(app(scope, receive, send))
+    assert events == ["produced 0", "sent 0", "produced 1", "sent 1", "produced 2", "sent 2"]
@@ -0,0 +1,20 @@
+import app.core.db as db_module
+from app.core.db import build_db
+from app.core.security import get_pwd_ctx
+
+
+def test_seed_hashes_match_documented_passwords():
+    users = {user.username: user for user in build_db().users}
+    pwd_context = get_pwd_ctx()
+    assert pwd_context.verify("wonderland", users["alice"].hashed_password)
+    assert pwd_context.verify("secret", users["admin"].hashed_password)
+
+
+def test_build_db_returns_independent_copies():
+    first, second = build_db(), build_db()
+    first.users[0].scopes.append("admin")
+    assert "admin" not in second.users[0].scopes
+
+
+def test_mock_db_is_the_lazily_built_singleton():
+    assert db_module.mock_db is db_module.get_db()
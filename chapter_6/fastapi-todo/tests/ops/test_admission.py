@@ -0,0 +1,89 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.ops.admission import (
+    PRIORITY_AUTH,
+    PRIORITY_CRUD,
+    PRIORITY_EXEMPT,
+    AdmissionController,
+    AdmissionMiddleware,
+    admission_controller,
+)
+
+client = TestClient(app)
+
+
+def test_delay_must_stay_above_target_for_an_interval():
+    controller = AdmissionController(target_delay=0.05, interval=1.0)
+    controller.observe_delay(0.2, now=10.0)
+    assert not controller.overloaded(now=10.5)
+    controller.observe_delay(0.2, now=10.9)
+    assert controller.overloaded(now=11.0)
+    controller.observe_delay(0.01, now=11.1)
+    assert not controller.overloaded(now=11.1)
+
+
+def test_overload_expires_without_fresh_measurements():
+    controller = AdmissionController(target_delay=0.05, interval=1.0)
+    controller.observe_delay(0.2, now=10.0)
+    controller.observe_delay(0.2, now=11.0)
+    assert controller.overloaded(now=11.5)
+    assert not controller.overloaded(now=12.5)
+
+
+def test_auth_is_shed_before_crud():
+    controller = AdmissionController(max_in_flight=2, hard_limit=4)
+    controller.in_flight = 2
+    assert not controller.admit(PRIORITY_AUTH)
+    assert controller.admit(PRIORITY_CRUD)
+    controller.in_flight = 4
+    assert not controller.admit(PRIORITY_CRUD)
+    assert controller.admit(PRIORITY_EXEMPT)
+
+
+def test_middleware_rejects_with_retry_after():
+    controller = AdmissionController(max_in_flight=0)
+    sent = []
+
+    async def app_(scope, receive, send):
+        raise AssertionError("should not be called")
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/auth/token"}
+    asyncio.run(AdmissionMiddleware(app_, controller)(scope, None, send))
+    assert sent[0]["status"] == 503
+    assert (b"retry-after", b"1") in sent[0]["headers"]
+
+
+def test_exempt_requests_are_not_counted_in_flight():
+    controller = AdmissionController(max_in_flight=1)
+    seen = []
+
+    async def app_(scope, receive, send):
+        seen.append(controller.in_flight)
+
+    for path in ("/health/ready", "/metrics", "/api/todos"):
+        asyncio.run(AdmissionMiddleware(app_, controller)({"type": "http", "method": "GET", "path": path}, None, None))
+    assert seen == [0, 0, 1]
+
+
+def test_admission_is_the_outermost_middleware():
+    assert app.user_middleware[0].cls is AdmissionMiddleware
+
+
+def test_readiness_reports_overload():
+    assert client.get("/health/live").json() == {"status": "ok"}
+    assert client.get("/health/ready").status_code == 200
+    original = admission_controller.max_in_flight
+    admission_controller.max_in_flight = 0
+    try:
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "overloaded"
+        assert client.post("/auth/token", data={"username": "alice", "password": "x"}).status_code == 503
+    finally:
+        admission_controller.max_in_flight = original
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.auth.service import AuthService
+from app.core.db import get_db
+from app.core.lanes import Lane
+from app.main import app
+from app.ops.deadlines import (
+    DEADLINE_EXCEEDED, DeadlineExceeded, DeadlineMiddleware, check_deadline, deadline_scope,
+    parse_route_deadlines, remaining_budget, route_budget, within_deadline,
+)
+from app.todos.repository import TodoRepository
+from app.todos.router import get_todo_service
+from app.todos.service import TodoService
+
+READER = {"Authorization": f"Bearer {AuthService.create_token({'sub': 'alice', 'scopes': ['read']})}"}
+
+
+def test_route_budget_uses_longest_matching_prefix():
+    routes = parse_route_deadlines("/api=2, /api/users/bulk=60")
+    assert routes == {"/api": 2.0, "/api/users/bulk": 60.0}
+    assert route_budget("/api/users/bulk", routes, default=10) == 60
+    assert route_budget("/api/todos", routes, default=10) == 2
+    assert route_budget("/health/live", routes, default=10) == 10
+
+
+def test_checks_are_no_ops_outside_a_request():
+    assert remaining_budget() is None
+    check_deadline("service")
+
+
+def test_within_deadline_aborts_after_the_budget_is_spent():
+    calls = []
+    work = within_deadline("service")(lambda: calls.append(1))
+    with deadline_scope(0.02):
+        work()
+        time.sleep(0.03)
+        with pytest.raises(DeadlineExceeded) as exc_info:
+            work()
+    assert calls == [1]
+    assert exc_info.value.status_code == 504
+    assert exc_info.value.stage == "service"
+
+
+def test_nested_scope_keeps_the_earlier_deadline():
+    with deadline_scope(0.5) as outer:
+        with deadline_scope(10) as inner:
+            assert inner is outer
+            assert remaining_budget() <= 0.5
+
+
+def test_queued_lane_call_is_dropped_after_its_deadline():
+    lane = Lane("deadline", capacity=1, max_queue=5)
+    release = threading.Event()
+    ran = []
+
+    async def scenario():
+        blocker = asyncio.create_task(lane.run(release.wait))
+        await asyncio.sleep(0.01)
+        with deadline_scope(0.02):
+            queued = asyncio.create_task(lane.run(ran.append, 1))
+        await asyncio.sleep(0.05)
+        release.set()
+        await blocker
+        with pytest.raises(DeadlineExceeded) as exc_info:
+            await queued
+        return exc_info.value
+
+    assert asyncio.run(scenario()).stage == "lane"
+    assert ran == []
+
+
+def test_expired_request_gets_504_and_is_counted():
+    def slow_todo_service():
+        time.sleep(0.1)
+        return TodoService(TodoRepository(get_db()))
+
+    app.dependency_overrides[get_todo_service] = slow_todo_service
+    # The endpoint is dropped before it gets a crud lane thread.
+    labels = ("/api/todos/{todo_id}", "lane")
+    before = DEADLINE_EXCEEDED.value(labels)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=DeadlineMiddleware(app, routes={}, default=0.05))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/todos/1", headers=READER)
+
+    try:
+        response = asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.pop(get_todo_service)
+    assert response.status_code == 504
+    assert response.json() == {"error": "Request deadline exceeded"}
+    assert DEADLINE_EXCEEDED.value(labels) == before + 1
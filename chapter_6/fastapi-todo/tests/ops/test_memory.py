@@ -0,0 +1,75 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.service import AuthService
+from app.core.db import DB
+from app.main import app
+from app.ops.memory import MemoryTracer, collection_stats, memory_tracer, module_of
+from app.todos.entities import TodoItemEntity
+from app.todos.repository import TodoRepository
+
+client = TestClient(app)
+
+ADMIN = {"Authorization": f"Bearer {AuthService.create_token({'sub': 'admin', 'role': 'admin', 'scopes': ['admin']})}"}
+
+
+@pytest.fixture
+def tracer():
+    tracer = MemoryTracer()
+    tracer.start()
+    yield tracer
+    tracer.stop()
+
+
+def test_module_of_groups_app_files_by_subpackage():
+    import app.todos.repository as repository
+    import pydantic
+    assert module_of(repository.__file__) == "app.todos"
+    assert module_of(pydantic.__file__) == "pydantic"
+
+
+def test_diff_attributes_growth_to_the_allocating_module(tracer):
+    tracer.take_snapshot("before")
+    db = DB(users=[], todos=[])
+    repo = TodoRepository(db)
+    for i in range(2000):
+        repo.create_todo(title=f"todo {i}", completed=False)
+    tracer.take_snapshot("after")
+
+    diff = tracer.diff("before", "after")
+    grown = {group["module"]: group["size"] for group in diff}
+    assert grown["app.todos"] > 100_000
+    assert tracer.top("after", limit=5, group_by="line")[0]["site"]
+
+
+def test_snapshot_requires_tracing():
+    with pytest.raises(RuntimeError):
+        MemoryTracer().take_snapshot("x")
+
+
+def test_collection_stats_counts_objects_and_bytes():
+    small = collection_stats(DB(users=[], todos=[TodoItemEntity(1, "a")]))
+    large = collection_stats(DB(users=[], todos=[TodoItemEntity(i, f"todo {i}") for i in range(100)]))
+    assert small["todos"]["objects"] == 1
+    assert large["todos"]["objects"] == 100
+    assert large["todos"]["bytes"] > 50 * small["todos"]["bytes"]
+    assert small["users"]["objects"] == 0
+
+
+def test_memory_endpoints_are_admin_only():
+    user = {"Authorization": f"Bearer {AuthService.create_token({'sub': 'alice', 'scopes': ['read']})}"}
+    assert client.get("/admin/memory/store", headers=user).status_code == 403
+
+    store = client.get("/admin/memory/store", headers=ADMIN).json()
+    assert store["users"]["objects"] >= 2
+    try:
+        assert client.post("/admin/memory/tracemalloc/start", headers=ADMIN).json()["tracing"] is True
+        assert client.post("/admin/memory/snapshots/one", headers=ADMIN).status_code == 200
+        top = client.get("/admin/memory/snapshots/one/top?limit=3", headers=ADMIN)
+        assert top.status_code == 200 and len(top.json()) <= 3
+        assert client.get("/admin/memory/diff?base=one&target=missing", headers=ADMIN).status_code == 404
+    finally:
+        client.post("/admin/memory/tracemalloc/stop", headers=ADMIN)
+        memory_tracer.clear()
+    assert client.post("/admin/memory/snapshots/two", headers=ADMIN).status_code == 409
+    assert 'store_objects{collection="todos"}' in client.get("/metrics").text
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.service import AuthService
+from app.main import app
+from app.ops.metrics import Histogram, MetricsRegistry, REQUEST_DURATION, log_linear_bounds
+
+client = TestClient(app)
+
+
+def test_log_linear_bounds_keep_relative_error():
+    bounds = log_linear_bounds(1e-3, 1.0)
+    assert bounds[0] >= 1e-3 and bounds[-1] >= 1.0
+    assert all(b / a <= 1.25 + 1e-9 for a, b in zip(bounds, bounds[1:]))
+
+
+def test_histogram_percentile_is_bucket_upper_bound():
+    histogram = Histogram("h", "test", bounds=[0.1, 0.2, 0.4])
+    for value in (0.05, 0.15, 0.15, 0.3):
+        histogram.observe(value)
+    assert histogram.percentile(50) == 0.2
+    assert histogram.percentile(100) == 0.4
+    histogram.observe(1.0)
+    assert histogram.percentile(100) == float("inf")
+
+
+def test_updates_from_many_threads_are_not_lost():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs.")
+    histogram = registry.histogram("latency_seconds", "Latency.", bounds=[0.1, 1.0])
+
+    def work():
+        for _ in range(10_000):
+            counter.inc()
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.value() == 80_000
+    assert histogram.series().count == 80_000
+    assert 'latency_seconds_bucket{le="1"} 80000' in registry.render()
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs.", ("kind",))
+    counter.inc(("a",))
+    counter.inc(("a",))
+    histogram = registry.histogram("latency_seconds", "Latency.", bounds=[0.1, 1.0])
+    histogram.observe(0.5)
+    text = registry.render()
+    assert '# TYPE jobs_total counter' in text
+    assert 'jobs_total{kind="a"} 2' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert 'latency_seconds_count 1' in text
+    with pytest.raises(ValueError):
+        registry.counter("jobs_total", "Again.")
+
+
+def test_requests_are_labelled_by_route_template():
+    token = AuthService.create_token({"sub": "alice", "scopes": ["read"]})
+    labels = ("GET", "/api/todos/{todo_id}", "4xx")
+    series = REQUEST_DURATION.series(labels)
+    before = series.count if series else 0
+
+    response = client.get("/api/todos/9999", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 404
+    assert REQUEST_DURATION.series(labels).count == before + 1
+
+    body = client.get("/metrics")
+    assert body.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'route="/api/todos/{todo_id}",status="4xx"' in body.text
+    assert "/api/todos/9999" not in body.text
+    assert "http_requests_in_flight" in body.text
+    assert 'threadpool_threads{state="capacity"}' in body.text
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.auth.service import AuthService
+from app.auth.user_status import user_status_cache
+from app.main import app
+from app.ops import profiling
+from app.ops.profiling import ProfilingMiddleware, StackSampler, profile_store, render_collapsed, render_flamegraph
+
+client = TestClient(app)
+profiled_client = TestClient(ProfilingMiddleware(app))
+
+ADMIN = {"Authorization": f"Bearer {AuthService.create_token({'sub': 'admin', 'role': 'admin', 'scopes': ['read', 'admin']})}"}
+USER = {"Authorization": f"Bearer {AuthService.create_token({'sub': 'alice', 'role': 'user', 'scopes': ['read']})}"}
+
+
+def test_profile_header_is_ignored_for_non_admins():
+    response = profiled_client.get("/api/todos", headers={**USER, "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_profile_header_is_ignored_for_inactive_admins(monkeypatch):
+    # A token with the admin role and scope whose user no longer exists.
+    ghost = {"Authorization": f"Bearer {AuthService.create_token({'sub': 'ghost', 'role': 'admin', 'scopes': ['read', 'admin']})}"}
+    monkeypatch.setattr(user_status_cache, "max_staleness", 60)
+    user_status_cache.clear()
+    try:
+        response = profiled_client.get("/api/todos", headers={**ghost, "X-Profile": "1"})
+    finally:
+        user_status_cache.clear()
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_admin_can_profile_a_request_and_fetch_the_output():
+    profile_store.clear()
+    response = profiled_client.get("/api/todos", headers={**ADMIN, "X-Profile": "1"})
+    profile_id = response.headers["X-Profile-Id"]
+
+    listed = client.get("/admin/profiles", headers=ADMIN).json()
+    assert listed[0]["id"] == profile_id
+    assert listed[0]["path"] == "/api/todos"
+    assert client.get(f"/admin/profiles/{profile_id}/collapsed", headers=ADMIN).status_code == 200
+    svg = client.get(f"/admin/profiles/{profile_id}/flamegraph.svg", headers=ADMIN)
+    assert svg.headers["content-type"] == "image/svg+xml"
+    assert client.get(f"/admin/profiles/{profile_id}/collapsed", headers=USER).status_code == 403
+    assert client.get("/admin/profiles/missing/collapsed", headers=ADMIN).status_code == 404
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler_records_stacks_through_application_code(monkeypatch):
+    monkeypatch.setattr(profiling, "_APP_DIR", os.path.dirname(__file__))
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    worker = threading.Thread(target=_busy, args=(0.1,))
+    worker.start()
+    worker.join()
+    samples = sampler.stop()
+    assert any(stack.endswith(f"{__name__}:_busy") for stack in samples)
+
+
+def _busy_elsewhere(seconds):
+    _busy(seconds)
+
+
+def test_sampler_keeps_only_the_profiled_request(monkeypatch):
+    monkeypatch.setattr(profiling, "_APP_DIR", os.path.dirname(__file__))
+
+    async def profile():
+        threads = set()
+        sampler = StackSampler(0.001, asyncio.current_task(), threads)
+        mine = threading.Thread(target=_busy, args=(0.1,))
+        other = threading.Thread(target=_busy_elsewhere, args=(0.1,))
+        sampler.start()
+        mine.start()
+        threads.add(mine.ident)
+        other.start()
+        while mine.is_alive() or other.is_alive():
+            await asyncio.sleep(0.005)
+        return sampler.stop()
+
+    samples = asyncio.run(profile())
+    assert any(stack.endswith(f"{__name__}:_busy") for stack in samples)
+    assert not any("_busy_elsewhere" in stack for stack in samples)
+
+
+def test_renderers():
+    samples = {"app:main;app:handler": 3, "app:main;app:<lambda>": 1}
+    assert render_collapsed(samples) == "app:main;app:<lambda> 1\napp:main;app:handler 3\n"
+    svg = render_flamegraph(samples, "GET /")
+    assert svg.count("<rect") == 3
+    assert "app:&lt;lambda&gt; (1 samples, 25.0%)" in svg
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+from anyio import to_thread
+from fastapi.testclient import TestClient
+
+from app.auth.service import AuthService
+from app.main import app
+from app.ops.runtime_monitor import RuntimeMonitor, THREADPOOL_SATURATED, configure_threadpool, threadpool_stats
+
+ADMIN = {"Authorization": f"Bearer {AuthService.create_token({'sub': 'admin', 'role': 'admin', 'scopes': ['admin']})}"}
+
+
+def test_monitor_measures_event_loop_lag():
+    async def scenario():
+        monitor = RuntimeMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)  # block the loop
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert monitor.max_lag >= 0.05
+    assert monitor.samples >= 2
+
+
+def test_monitor_sees_threadpool_saturation():
+    release = threading.Event()
+
+    async def scenario():
+        configure_threadpool(2)
+        monitor = RuntimeMonitor(interval=0.01)
+        calls = [asyncio.create_task(to_thread.run_sync(release.wait)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        stats = threadpool_stats()
+        before = THREADPOOL_SATURATED.value()
+        monitor.sample_threadpool()
+        release.set()
+        await asyncio.gather(*calls)
+        return stats, monitor, THREADPOOL_SATURATED.value() - before
+
+    stats, monitor, saturated = asyncio.run(scenario())
+    assert stats == {"capacity": 2, "in_use": 2, "waiting": 1}
+    assert monitor.peak_waiting == 1
+    assert saturated == 1
+
+
+def test_runtime_diagnostics_endpoint():
+    with TestClient(app) as client:
+        body = client.get("/admin/diagnostics/runtime", headers=ADMIN).json()
+        assert body["threadpool"]["capacity"] == 40
+        assert {"last_ms", "max_ms", "p99_ms"} <= body["event_loop_lag"].keys()
+        assert "pending" in body["password_hashing"]
+        assert "threadpool_saturated_samples_total" in client.get("/metrics").text
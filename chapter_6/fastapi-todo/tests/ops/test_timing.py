@@ -0,0 +1,48 @@
+import re
+
+from fastapi.testclient import TestClient
+
+from app.auth.service import AuthService
+from app.main import app
+from app.ops.timing import PHASE_DURATION, PhaseTimer, _current_timer, phase, timed
+
+client = TestClient(app)
+
+
+def _phases(header):
+    return {name: float(dur) for name, dur in re.findall(r"(\w+);dur=([\d.]+)", header)}
+
+
+def test_todo_route_reports_each_phase():
+    token = AuthService.create_token({"sub": "alice", "scopes": ["read"]})
+    response = client.get("/api/todos", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    phases = _phases(response.headers["Server-Timing"])
+    assert {"auth", "service", "repo", "serialize", "total"} <= phases.keys()
+    assert phases["service"] >= phases["repo"]
+    assert phases["total"] >= phases["service"]
+    assert PHASE_DURATION.series(("/api/todos", "serialize")).count >= 1
+
+
+def test_phases_without_a_request_are_not_recorded():
+    @timed("repo")
+    def work():
+        return 42
+
+    assert work() == 42
+    with phase("auth"):
+        pass
+
+
+def test_timer_accumulates_repeated_phases():
+    timer = PhaseTimer()
+    token = _current_timer.set(timer)
+    try:
+        with phase("repo"):
+            pass
+        with phase("repo"):
+            pass
+    finally:
+        _current_timer.reset(token)
+    assert list(timer.phases) == ["repo"]
+    assert timer.header(0.002).endswith("total;dur=2.000")
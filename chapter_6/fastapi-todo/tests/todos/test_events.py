@@ -0,0 +1,197 @@
+import json
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.service import AuthService
+from app.main import app
+from app.todos import events as todo_events
+from app.todos.events import (
+    TODO_CREATED, TODO_DELETED, TODO_UPDATED, EventLog, Projection, TodoEvent, TodoEventStore,
+    default_projections, read_log_file, replay,
+)
+from app.todos.repository import EventSourcedTodoRepository
+from app.todos.service import TodoService
+
+client = TestClient(app)
+
+
+def _headers(sub: str, scopes) -> dict:
+    return {"Authorization": f"Bearer {AuthService.create_token({'sub': sub, 'scopes': scopes})}"}
+
+
+def _service(store: TodoEventStore) -> TodoService:
+    return TodoService(EventSourcedTodoRepository(store))
+
+
+def _scenario(service: TodoService) -> None:
+    service.create_todo("a", False, actor="alice")
+    service.create_todo("b", False, actor="alice")
+    service.create_todo("c", False, actor="bob")
+    service.update_todo(1, "a", True, actor="alice")
+    service.delete_todo(2, actor="bob")
+
+
+def test_commands_append_events_and_update_projections():
+    store = TodoEventStore(EventLog())
+    service = _service(store)
+    _scenario(service)
+
+    assert [event.type for event in store.log.events] == [TODO_CREATED] * 3 + [TODO_UPDATED, TODO_DELETED]
+    assert [(todo.id, todo.completed) for todo in service.list_todos()] == [(1, True), (3, False)]
+    assert store.view("by-status") == {"open": [3], "completed": [1]}
+    assert store.view("by-owner") == {"alice": [1], "bob": [3]}
+    assert store.view("counts") == {"total": 2, "open": 1, "completed": 1, "by_owner": {"alice": 1, "bob": 1}}
+    assert [event["actor"] for event in store.history(2)] == ["alice", "bob"]
+    assert json.loads(service.list_todos_json()) == [
+        {"id": 1, "title": "a", "completed": True}, {"id": 3, "title": "c", "completed": False},
+    ]
+
+
+def test_events_are_immutable():
+    event = TodoEventStore(EventLog()).append(TODO_CREATED, 1, {"title": "a", "completed": False})
+    with pytest.raises(AttributeError):
+        event.type = TODO_DELETED
+
+
+def test_log_file_replays_to_the_same_views(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    store = TodoEventStore(EventLog(path))
+    _scenario(_service(store))
+    store.log.close()
+
+    assert [event.seq for event in read_log_file(path)] == [1, 2, 3, 4, 5]
+    reloaded = TodoEventStore(EventLog(path))
+    for name in ("by-status", "by-owner", "counts"):
+        assert reloaded.view(name) == store.view(name)
+    # New commands continue the sequence and the id counter.
+    assert _service(reloaded).create_todo("d", False).id == 4
+    assert reloaded.log.events[-1].seq == 6
+
+
+def test_log_file_is_fsynced_and_history_reads_from_the_log(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(todo_events.os, "fsync", synced.append)
+    path = str(tmp_path / "events.jsonl")
+    store = TodoEventStore(EventLog(path, fsync=True))
+    monkeypatch.setattr(todo_events, "_event_store", store)
+    _scenario(_service(store))
+    assert len(synced) == 5
+
+    todo_events.close_event_store()
+    assert len(synced) == 6
+    assert store.log._file is None
+    assert todo_events._event_store is None
+
+    reloaded = TodoEventStore(EventLog(path, fsync=False))
+    assert list(reloaded.projections["history"].seqs[2]) == [2, 5]
+    assert reloaded.history(2) == store.history(2)
+    assert reloaded.history(2)[1]["type"] == TODO_DELETED
+    reloaded.log.close()
+
+
+def test_torn_last_line_is_cut_off_and_other_corruption_fails(tmp_path):
+    path = tmp_path / "events.jsonl"
+    store = TodoEventStore(EventLog(str(path)))
+    _scenario(_service(store))
+    store.log.close()
+    intact = path.read_bytes()
+    path.write_bytes(intact + b'{"seq":6,"type":"todo_cr')
+
+    assert len(list(read_log_file(str(path)))) == 5
+    reloaded = TodoEventStore(EventLog(str(path)))
+    assert path.read_bytes() == intact
+    assert _service(reloaded).create_todo("d", False).id == 4
+    reloaded.log.close()
+    assert [event.seq for event in read_log_file(str(path))] == [1, 2, 3, 4, 5, 6]
+
+    lines = intact.splitlines(keepends=True)
+    path.write_bytes(lines[0] + b"{not json}\n" + b"".join(lines[1:]))
+    with pytest.raises(ValueError, match="corrupt event at byte"):
+        EventLog(str(path))
+
+
+def test_stores_sharing_a_log_file_see_each_others_commands(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    first, second = TodoEventStore(EventLog(path)), TodoEventStore(EventLog(path))
+    first_service, second_service = _service(first), _service(second)
+
+    first_service.create_todo("a", False, actor="alice")
+    assert second_service.create_todo("b", False, actor="bob").id == 2
+    assert [todo.title for todo in first_service.list_todos()] == ["a", "b"]
+    second_service.update_todo(1, "a", True, actor="bob")
+    assert first_service.get_todo(1).completed
+    assert json.loads(first_service.list_todos_json())[0]["completed"] is True
+    assert first.view("counts")["completed"] == 1
+    assert [event.seq for event in read_log_file(path)] == [1, 2, 3]
+    first.log.close()
+    second.log.close()
+
+
+_APPEND_SCRIPT = """
+import sys
+from app.todos.events import EventLog, TodoEventStore
+from app.todos.repository import EventSourcedTodoRepository
+
+repository = EventSourcedTodoRepository(TodoEventStore(EventLog(sys.argv[1], fsync=False)))
+for i in range(200):
+    repository.create_todo(title=f"{sys.argv[2]} {i}", completed=False)
+"""
+
+
+def test_processes_appending_to_one_log_file_get_distinct_seqs_and_ids(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    workers = [subprocess.Popen([sys.executable, "-c", _APPEND_SCRIPT, path, name]) for name in ("a", "b")]
+    assert [worker.wait() for worker in workers] == [0, 0]
+
+    events = list(read_log_file(path))
+    assert [event.seq for event in events] == list(range(1, 401))
+    assert sorted(event.todo_id for event in events) == list(range(1, 401))
+
+
+def test_projections_must_define_a_view():
+    with pytest.raises(TypeError):
+        Projection()
+
+
+def test_replay_resets_projections_first():
+    events = [TodoEvent(1, TODO_CREATED, 1, {"title": "a", "completed": False}, "alice")]
+    projections = default_projections()
+    assert replay(events, projections) == 1
+    assert replay(events, projections) == 1
+    counts = next(p for p in projections if p.name == "counts")
+    assert counts.view()["total"] == 1
+    assert counts.position == 1
+
+
+def test_replay_tool_prints_views(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    store = TodoEventStore(EventLog(path))
+    _scenario(_service(store))
+    store.log.close()
+
+    result = subprocess.run(
+        [sys.executable, "-m", "app.todos.replay", path, "--view", "counts"],
+        capture_output=True, text=True, check=True,
+    )
+    assert "replayed 5 events" in result.stderr
+    assert json.loads(result.stdout)["counts"]["total"] == 2
+
+
+def test_view_endpoints_follow_the_backend(monkeypatch):
+    reader = _headers("alice", ["read"])
+    assert client.get("/api/todos/views/counts", headers=reader).status_code == 404
+
+    store = TodoEventStore(EventLog())
+    monkeypatch.setattr(todo_events, "TODO_BACKEND", "events")
+    monkeypatch.setattr(todo_events, "_event_store", store)
+    writer = _headers("carol", ["read", "write"])
+    created = client.post("/api/todos", json={"title": "evented"}, headers=writer).json()
+    client.put(f"/api/todos/{created['id']}", json={"title": "evented", "completed": True}, headers=writer)
+
+    assert client.get("/api/todos/views/counts", headers=reader).json()["by_owner"] == {"carol": 1}
+    assert client.get("/api/todos/views/nope", headers=reader).status_code == 404
+    history = client.get(f"/api/todos/{created['id']}/history", headers=reader).json()
+    assert [(event["type"], event["actor"]) for event in history] == [(TODO_CREATED, "carol"), (TODO_UPDATED, "carol")]
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+
+from app.core.db import DB
+from app.todos.entities import TodoItemEntity
+from app.todos.repository import TodoRepository
+from app.todos.tiering import ColdTodoStore, TodoTiering, cold_store_for, enable_tiering, spill
+
+
+def _tiered_repo(tmp_path, count: int) -> TodoRepository:
+    db = DB(users=[], todos=[])
+    enable_tiering(db, str(tmp_path))
+    repo = TodoRepository(db)
+    for i in range(count):
+        repo.create_todo(title=f"todo {i}", completed=i % 2 == 0)
+    return repo
+
+
+def _titles(body: bytes) -> list:
+    return [todo["title"] for todo in json.loads(body)]
+
+
+def test_spill_moves_completed_todos_to_compressed_segments(tmp_path):
+    repo = _tiered_repo(tmp_path, 10)
+    before = repo.list_todos_json()
+
+    assert spill(repo.db, repo.cold, hot_max_items=100) == 5
+    assert [todo.id for todo in repo.db.todos] == [2, 4, 6, 8, 10]
+    assert repo.cold.count() == 5
+    assert os.path.dirname(repo.cold.directory) == str(tmp_path)
+    assert os.listdir(repo.cold.directory) == ["segment-000001.z"]
+    # Reads are unchanged; pages holding cold todos are rebuilt, not kept.
+    assert repo.list_todos_json() == before
+    assert repo.list_todos_json() == before
+    assert repo.cache.stats()["pages"] == 0
+    assert repo.cache.stats()["items"] == 5
+    assert [todo.id for todo in repo.list_todos()] == list(range(1, 11))
+    assert repo.get_todo(3) == TodoItemEntity(3, "todo 2", True)
+
+
+def test_oldest_open_todos_spill_over_the_hot_cap(tmp_path):
+    repo = _tiered_repo(tmp_path, 10)
+    spill(repo.db, repo.cold, hot_max_items=2)
+    assert [todo.id for todo in repo.db.todos] == [8, 10]
+    assert _titles(repo.list_todos_json(offset=6, limit=3)) == ["todo 6", "todo 7", "todo 8"]
+
+
+def test_updating_a_cold_todo_makes_it_hot_again(tmp_path):
+    repo = _tiered_repo(tmp_path, 6)
+    spill(repo.db, repo.cold, hot_max_items=100)
+
+    repo.update_todo(3, title="reopened", completed=False)
+
+    assert [todo.id for todo in repo.db.todos] == [2, 3, 4, 6]
+    assert repo.cold.count() == 2
+    assert _titles(repo.list_todos_json())[2] == "reopened"
+
+
+def test_cold_deletes_tombstone_and_compact(tmp_path):
+    repo = _tiered_repo(tmp_path, 8)
+    spill(repo.db, repo.cold, hot_max_items=100)
+    repo.delete_todo(1)
+    repo.delete_todo(3)
+    repo.delete_todo(5)
+
+    assert repo.get_todo(3) is None
+    assert repo.cold.count() == 1
+    # The next spill rewrites the mostly deleted segment.
+    spill(repo.db, repo.cold, hot_max_items=100)
+    assert repo.cold.stats()["segments"] == 1
+    assert os.listdir(repo.cold.directory) == ["segment-000002.z"]
+    assert repo.get_todo(7) == TodoItemEntity(7, "todo 6", True)
+    # Ids stay unique although the hot list is short.
+    assert repo.create_todo(title="new", completed=False).id == 9
+
+
+def test_stores_sharing_a_directory_keep_their_own_segments(tmp_path):
+    first, second = ColdTodoStore(str(tmp_path)), ColdTodoStore(str(tmp_path))
+    first.write([TodoItemEntity(1, "first", True)])
+    second.write([TodoItemEntity(1, "second", True)])
+    assert first.directory != second.directory
+
+    second.close()
+    assert os.listdir(tmp_path) == [os.path.basename(first.directory)]
+    assert first.get(1).title == "first"
+
+
+def test_tiering_is_opt_in_and_removes_its_segments_on_shutdown(tmp_path):
+    assert cold_store_for(DB()) is None
+    db = DB()
+    TodoTiering(interval=0.01).start(db, directory=None)
+    assert cold_store_for(db) is None
+
+    tiering = TodoTiering(interval=60)
+    tiering.start(db, directory=str(tmp_path))
+    cold_store_for(db).write([TodoItemEntity(1, "done", True)])
+    tiering.shutdown()
+    assert cold_store_for(db) is None
+    assert os.listdir(tmp_path) == []
+
+
+def _lock_is_free(lock) -> bool:
+    result = []
+
+    def probe():
+        acquired = lock.acquire(blocking=False)
+        if acquired:
+            lock.release()
+        result.append(acquired)
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_segment_io_happens_outside_the_lock(tmp_path, monkeypatch):
+    repo = _tiered_repo(tmp_path, 10)
+    cold = repo.cold
+    free = []
+    write_segments = cold.write_segments
+    read = cold._read
+
+    def checked_write(todos):
+        free.append(_lock_is_free(cold.lock))
+        return write_segments(todos)
+
+    def checked_read(segment):
+        free.append(_lock_is_free(cold.lock))
+        return read(segment)
+
+    monkeypatch.setattr(cold, "write_segments", checked_write)
+    monkeypatch.setattr(cold, "_read", checked_read)
+    spill(repo.db, cold, hot_max_items=100)
+    assert len(cold.rows()) == 5
+    assert free == [True, True]
+
+
+def test_spill_keeps_todos_changed_while_their_segment_is_written(tmp_path, monkeypatch):
+    repo = _tiered_repo(tmp_path, 10)
+    write_segments = repo.cold.write_segments
+
+    def write_while_changing(todos):
+        segments = write_segments(todos)
+        repo.update_todo(3, title="reopened", completed=False)
+        repo.delete_todo(5)
+        return segments
+
+    monkeypatch.setattr(repo.cold, "write_segments", write_while_changing)
+    assert spill(repo.db, repo.cold, hot_max_items=100) == 3
+
+    assert [todo.id for todo in repo.db.todos] == [2, 3, 4, 6, 8, 10]
+    assert repo.get_todo(3).title == "reopened"
+    assert repo.get_todo(5) is None
+    assert [row_id for row_id, _ in repo.cold.rows()] == [1, 7, 9]
+
+
+def test_compaction_rewrites_segments_outside_the_lock(tmp_path, monkeypatch):
+    repo = _tiered_repo(tmp_path, 8)
+    spill(repo.db, repo.cold, hot_max_items=100)
+    for todo_id in (1, 3, 5):
+        repo.delete_todo(todo_id)
+    free = []
+    write_file = repo.cold._write_file
+
+    def write_while_deleting(rows):
+        free.append(_lock_is_free(repo.cold.lock))
+        repo.delete_todo(7)
+        return write_file(rows)
+
+    monkeypatch.setattr(repo.cold, "_write_file", write_while_deleting)
+    assert repo.cold.compact() == 1
+    assert free == [True]
+    assert repo.get_todo(7) is None
+    assert repo.cold.count() == 0
+    assert os.listdir(repo.cold.directory) == []
+
+
+def test_a_missing_segment_file_is_dropped_not_retried(tmp_path, caplog):
+    repo = _tiered_repo(tmp_path, 10)
+    spill(repo.db, repo.cold, hot_max_items=100)
+    os.remove(repo.cold.segments[0].path)
+
+    assert repo.cold.rows() == []
+    assert repo.cold.stats()["segments"] == 0
+    assert "is missing" in caplog.text
+    assert [todo.id for todo in repo.list_todos()] == [2, 4, 6, 8, 10]
+
+
+class _MovesBackAfterScan(list):
+    """A hot list whose first full scan is followed by an update moving todo 3 back to it."""
+    repo = None
+
+    def __iter__(self):
+        yield from list.__iter__(self)
+        repo, self.repo = self.repo, None
+        if repo is not None:
+            repo.update_todo(3, title="reopened", completed=False)
+
+
+def test_get_todo_sees_a_todo_moved_back_during_the_read(tmp_path):
+    repo = _tiered_repo(tmp_path, 6)
+    spill(repo.db, repo.cold, hot_max_items=100)
+    repo.db.todos = _MovesBackAfterScan(repo.db.todos)
+    repo.db.todos.repo = repo
+
+    assert repo.get_todo(3).title == "reopened"
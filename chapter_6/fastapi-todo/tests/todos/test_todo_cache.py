@@ -0,0 +1,73 @@
+import json
+
+from app.core.db import DB
+from app.todos import cache as cache_module
+from app.todos.cache import TODO_PAGE_REQUESTS, TodoResponseCache, response_cache_for
+from app.todos.entities import TodoItemEntity
+from app.todos.repository import TodoRepository
+from app.todos.schemas import TodoItem
+
+
+def _repo(count: int) -> TodoRepository:
+    repo = TodoRepository(DB(users=[], todos=[]))
+    for i in range(count):
+        repo.create_todo(title=f"todo {i}", completed=False)
+    return repo
+
+
+def _expected(todos) -> list:
+    return [TodoItem.model_validate(todo, from_attributes=True).model_dump() for todo in todos]
+
+
+def test_page_matches_full_serialization():
+    repo = _repo(5)
+    assert json.loads(repo.list_todos_json()) == _expected(repo.db.todos)
+    assert json.loads(repo.list_todos_json(offset=1, limit=2)) == _expected(repo.db.todos[1:3])
+
+
+def test_unchanged_page_is_served_from_stored_bytes():
+    repo = _repo(3)
+    first = repo.list_todos_json()
+    hits = TODO_PAGE_REQUESTS.value(("hit",))
+    assert repo.list_todos_json() is first
+    assert TODO_PAGE_REQUESTS.value(("hit",)) == hits + 1
+
+
+def test_update_reencodes_only_the_changed_todo(monkeypatch):
+    repo = _repo(4)
+    repo.list_todos_json()
+    encoded = []
+    monkeypatch.setattr(cache_module, "encode_todo", lambda todo: encoded.append(todo.id) or
+                        TodoItem.model_validate(todo, from_attributes=True).model_dump_json().encode())
+
+    repo.update_todo(2, title="changed", completed=True)
+    body = json.loads(repo.list_todos_json())
+
+    assert encoded == [2]
+    assert body[1] == {"id": 2, "title": "changed", "completed": True}
+
+
+def test_create_and_delete_invalidate_pages():
+    repo = _repo(2)
+    repo.list_todos_json()
+    repo.create_todo(title="new", completed=False)
+    assert [todo["title"] for todo in json.loads(repo.list_todos_json())] == ["todo 0", "todo 1", "new"]
+    repo.delete_todo(1)
+    assert [todo["title"] for todo in json.loads(repo.list_todos_json())] == ["todo 1", "new"]
+
+
+def test_reused_ids_are_encoded_separately():
+    repo = _repo(2)
+    repo.list_todos_json()
+    repo.delete_todo(1)
+    repo.create_todo(title="reused id", completed=False)
+    assert json.loads(repo.list_todos_json()) == _expected(repo.db.todos)
+
+
+def test_pages_are_bounded_and_caches_are_per_store():
+    cache = TodoResponseCache(max_pages=2)
+    todos = [TodoItemEntity(i, f"todo {i}") for i in range(5)]
+    for offset in range(4):
+        cache.page(todos, offset, 1)
+    assert cache.stats()["pages"] == 2
+    assert response_cache_for(DB()) is not response_cache_for(DB())
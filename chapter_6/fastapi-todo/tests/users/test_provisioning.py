@@ -0,0 +1,185 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.service import AuthService
+from app.core.db import DB
+from app.core.hash_policy import HashPolicy, context_for
+from app.core.hashing import PasswordHasher
+from app.core.security import get_hash_policy, set_hash_policy
+from app.core.seed import build_seed_users
+from app.main import app
+from app.ops.deadlines import DeadlineExceeded, deadline_scope
+from app.users import cli, repository
+from app.users.repository import UserRepository
+from app.users.service import UserService, get_user_service
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def service():
+    original = get_hash_policy()
+    set_hash_policy(HashPolicy(bcrypt_rounds=4))
+    yield UserService(UserRepository(DB(build_seed_users(), [])), hasher=PasswordHasher(workers=0))
+    set_hash_policy(original)
+
+
+def test_provision_creates_users_with_hashes(service):
+    rows = [{"username": f"user{i}", "password": f"pw-{i}", "name": f"User {i}"} for i in range(5)]
+    results = asyncio.run(service.provision_users(rows, scopes=["read", "write"], batch_size=2))
+    assert [result["status"] for result in results] == ["created"] * 5
+    user = service.get_user("user3")
+    assert user.id == results[3]["id"]
+    assert user.scopes == ["read", "write"]
+    assert context_for(get_hash_policy()).verify("pw-3", user.hashed_password)
+
+
+def test_provision_reports_errors_per_row(service):
+    rows = [
+        {"username": "alice", "password": "x", "name": "Taken"},
+        {"username": "new", "password": "x", "name": "New"},
+        {"username": "new", "password": "y", "name": "Duplicate"},
+        {"username": "bad", "name": "No password"},
+        {"username": "mail", "password": "x", "name": "Bad email", "email": "not-an-email"},
+    ]
+    results = asyncio.run(service.provision_users(rows))
+    assert [result["status"] for result in results] == ["error", "created", "error", "error", "error"]
+    assert results[0]["error"] == "User already exists"
+    assert results[2]["error"] == "User already exists"
+    assert "password" in results[3]["error"]
+    assert "email" in results[4]["error"]
+    assert [user.username for user in service.list_users()].count("new") == 1
+
+
+def test_provision_rechecks_usernames_taken_while_hashing(service):
+    hash_many = service.hasher.hash_many
+
+    async def register_during_hashing(passwords):
+        service.repo.create_user(username="late", hashed_password="x", name="Late", email="", scopes=[])
+        return await hash_many(passwords)
+
+    service.hasher.hash_many = register_during_hashing
+    rows = [{"username": "late", "password": "x", "name": "Bulk"}, {"username": "other", "password": "x", "name": "Other"}]
+    results = asyncio.run(service.provision_users(rows))
+    assert [result["status"] for result in results] == ["error", "created"]
+    assert results[0]["error"] == "User already exists"
+    assert [user.username for user in service.list_users()].count("late") == 1
+
+
+def test_provision_reports_rows_left_when_the_deadline_passes(service):
+    hash_many = service.hasher.hash_many
+
+    calls = []
+
+    async def slow_hash_many(passwords):
+        calls.append(passwords)
+        if len(calls) > 1:
+            await asyncio.sleep(0.1)
+        return await hash_many(passwords)
+
+    service.hasher.hash_many = slow_hash_many
+    rows = [{"username": f"late{i}", "password": "x", "name": "Late"} for i in range(4)]
+
+    async def provision():
+        with deadline_scope(0.05):
+            return await service.provision_users(rows, batch_size=2)
+
+    async def provision_expired():
+        with deadline_scope(0.0):
+            return await service.provision_users([{"username": "never", "password": "x", "name": "Never"}])
+
+    results = asyncio.run(provision())
+    assert [result["status"] for result in results] == ["created", "created", "error", "error"]
+    assert results[2]["error"] == "Request deadline exceeded"
+    assert service.get_user("late1") is not None
+    assert service.get_user("late2") is None
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(provision_expired())
+    assert service.get_user("never") is None
+
+
+def test_provision_reports_rows_left_when_hashing_is_busy(service):
+    hash_many = service.hasher.hash_many
+    calls = []
+
+    async def busy_after_first_batch(passwords):
+        calls.append(passwords)
+        if len(calls) > 1:
+            service.hasher.pending = service.hasher.max_pending
+        return await hash_many(passwords)
+
+    service.hasher.hash_many = busy_after_first_batch
+    rows = [{"username": f"busy{i}", "password": "x", "name": "Busy"} for i in range(4)]
+    results = asyncio.run(service.provision_users(rows, batch_size=2))
+    service.hasher.pending = 0
+    assert [result["status"] for result in results] == ["created", "created", "error", "error"]
+    assert results[2]["error"] == "Too many concurrent authentication requests"
+    assert service.get_user("busy1") is not None
+    assert service.get_user("busy2") is None
+
+
+def test_single_registration_waits_for_a_batch_insert(service):
+    repo = service.repo
+    before = len(repo.db.users)
+    thread = threading.Thread(
+        target=repo.create_user,
+        kwargs={"username": "solo", "hashed_password": "x", "name": "Solo", "email": "", "scopes": []},
+    )
+    with repository._create_lock:
+        thread.start()
+        thread.join(0.05)
+        assert len(repo.db.users) == before
+    thread.join()
+    assert sorted(user.id for user in repo.db.users) == list(range(1, before + 2))
+
+
+def test_hash_many_keeps_order_across_processes():
+    hasher = PasswordHasher(workers=2)
+    try:
+        hashes = asyncio.run(hasher.hash_many([f"pw-{i}" for i in range(5)]))
+        assert len(hashes) == 5
+        context = context_for(get_hash_policy())
+        assert all(context.verify(f"pw-{i}", hashed) for i, hashed in enumerate(hashes))
+    finally:
+        hasher.shutdown()
+
+
+def test_bulk_endpoint_requires_admin(service):
+    app.dependency_overrides[get_user_service] = lambda: service
+    try:
+        body = {"users": [{"username": "bob", "password": "x", "name": "Bob"}]}
+        user_headers = {"Authorization": f"Bearer {AuthService.create_token({'sub': 'alice', 'role': 'user', 'scopes': ['read', 'write']})}"}
+        assert client.post("/api/users/bulk", json=body, headers=user_headers).status_code == 403
+
+        admin_token = AuthService.create_token({"sub": "admin", "role": "admin", "scopes": ["read", "write", "admin"]})
+        response = client.post("/api/users/bulk", json=body, headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        assert response.json()["created"] == 1
+        assert response.json()["failed"] == 0
+        assert service.get_user("bob") is not None
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_cli_posts_rows_to_the_bulk_endpoint(service, tmp_path, monkeypatch, capsys):
+    app.dependency_overrides[get_user_service] = lambda: service
+    path = tmp_path / "users.csv"
+    path.write_text("username,password,name,email\ncarol,pw,Carol,\nalice,pw,Taken,\ndave,pw,Dave,\n")
+
+    def post_through_app(url, body, headers):
+        response = client.post(url.removeprefix("http://server"), content=body, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    monkeypatch.setattr(cli, "_post", post_through_app)
+    admin_token = AuthService.create_token({"sub": "admin", "role": "admin", "scopes": ["read", "write", "admin"]})
+    try:
+        status = cli.provision("http://server", admin_token, cli.read_rows(str(path)), ["read"], rows_per_request=2)
+    finally:
+        app.dependency_overrides.clear()
+    assert status == 1
+    assert "created 2, failed 1" in capsys.readouterr().out
+    assert service.get_user("dave").scopes == ["read"]